@@ -0,0 +1,169 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+import argparse
+import csv
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+import simulation
+from clock import EventClock
+from engine import Engine
+from index import AllShareIndex
+
+# parameters of a scenario, see at simulation.generate_columns
+#  - stocks : number of synthetic stocks, the simulation stocks (simulation.STOCKS) if 0
+Scenario = namedtuple('Scenario', ('number_of_trades', 'stocks', 'skew', 'out_of_order', 'quantity_min', 'quantity_max',
+                                   'trade_price_min', 'trade_price_max', 'trade_period', 'seed'))
+
+DEFAULTS = Scenario(simulation.NUMBER_OF_TRADES, 0, 0.0, 0.0, simulation.QUANTITY_INTERVAL[0], simulation.QUANTITY_INTERVAL[1],
+                    simulation.TRADE_PRICE_INTERVAL[0], simulation.TRADE_PRICE_INTERVAL[1], simulation.TRADE_PERIOD, 0)
+
+# time of the first trade of every scenario, 2026-01-01 00:00:00 in nanoseconds since epoch
+BEGINING = 1767225600 * 10**9
+
+# columns of the result table besides the parameters of the scenario, a row per scenario, sample and stock
+#  - scenario : position of the scenario in the grid
+#  - time : the sample, nanoseconds since epoch
+#  - trades : number of the trades of the scenario until the sample
+#  - vwsp : VWSP of the stock in the interval before the sample
+#  - dividend_yield, pe_ratio : at the price of the latest trade (by timestamp) of the stock, 0.0 before its first trade
+#  - gbce : GBCE All Share Index of the session until the sample
+COLUMNS = ('scenario', 'time', 'symbol', 'trades', 'vwsp', 'dividend_yield', 'pe_ratio', 'gbce')
+
+
+class BacktestException(Exception):
+    def __init__(self, message_):
+        super(BacktestException, self).__init__(message_)
+
+
+def grid(seeds_=(0,), **parameters_):
+    '''
+    Scenarios of every combination of the parameters
+
+    @seeds_ - Random seeds, every combination is run with every seed
+    @parameters_ - Name of a Scenario field -> list of its values, the other fields are DEFAULTS
+
+    @return - List of Scenarios
+    '''
+    unknown = set(parameters_) - set(Scenario._fields)
+    if unknown:
+        raise BacktestException('Unknown parameters: {0}'.format(', '.join(sorted(unknown))))
+    names = list(parameters_)
+    return [DEFAULTS._replace(seed=seed, **dict(zip(names, values)))
+            for values in product(*(list(parameters_[name]) for name in names)) for seed in seeds_]
+
+
+def run_scenario(scenario_, sample_=60, interval_=15):
+    '''
+    Replaying a scenario in its own Engine without printing the trades
+
+    @scenario_ - Scenario
+    @sample_ - Time between the samples of the metrics in seconds
+    @interval_ - Length of the VWSP window in seconds
+
+    @return - dict of the COLUMNS arrays of the scenario (scenario is 0)
+    '''
+    stocks = simulation.synthetic_stocks(scenario_.stocks) if scenario_.stocks else simulation.STOCKS
+    clock = EventClock(BEGINING)
+    engine = Engine(simulation.HEADER, stocks, clock_=clock)
+    stock_manager, trade_manager = engine.stocks, engine.trades
+    symbols = list(stock_manager.symbols)
+    columns = simulation.generate_columns(scenario_.number_of_trades, symbols, scenario_.skew, scenario_.out_of_order,
+                                          scenario_.seed, BEGINING, (scenario_.quantity_min, scenario_.quantity_max),
+                                          (scenario_.trade_price_min, scenario_.trade_price_max), scenario_.trade_period)
+    timestamps = columns[1]
+
+    # a sample is taken when the latest trade passes its time
+    samples = np.arange(BEGINING + sample_ * 10**9, int(timestamps.max()) + sample_ * 10**9 + 1, sample_ * 10**9)
+    ends = np.searchsorted(np.maximum.accumulate(timestamps), samples, 'right')
+    market_prices = np.zeros(len(symbols))
+    result = {name: [] for name in COLUMNS}
+    start = 0
+    for time, end in zip(samples.tolist(), ends.tolist()):
+        if end > start:
+            trade_manager.add_many(*(column[start:end] for column in columns))
+            latest_prices = trade_manager.latest_prices()
+            market_prices = np.array([latest_prices.get(symbol, 0) for symbol in symbols], dtype=np.float64)
+            start = end
+        clock.observe(time)
+        result['time'].append(np.full(len(symbols), time, dtype=np.int64))
+        result['trades'].append(np.full(len(symbols), end, dtype=np.int64))
+        result['vwsp'].append(np.array([trade_manager.volume_weighted_stock_price(interval_, symbol) for symbol in symbols]))
+        result['dividend_yield'].append(stock_manager.dividend_yields(market_prices))
+        result['pe_ratio'].append(stock_manager.pe_ratios(market_prices))
+        result['gbce'].append(np.full(len(symbols), trade_manager.gbce_all_share_index(AllShareIndex.SESSION)))
+    result = {name: np.concatenate(values) for name, values in result.items() if values}
+    result['symbol'] = np.tile(np.array(symbols), len(samples))
+    result['scenario'] = np.zeros(len(result['symbol']), dtype=np.int64)
+    return result
+
+
+def _run_scenario(arguments_):
+    return run_scenario(*arguments_)
+
+
+def run(scenarios_, workers_=None, sample_=60, interval_=15):
+    '''
+    Running scenarios on a process pool
+
+    @scenarios_ - List of Scenarios (e.g. of grid)
+    @workers_ - Number of processes, the number of CPUs by default
+    @sample_ - Time between the samples of the metrics in seconds
+    @interval_ - Length of the VWSP window in seconds
+
+    @return - The result table: dict of arrays of the COLUMNS and the Scenario fields
+    '''
+    scenarios = list(scenarios_)
+    if not scenarios:
+        raise BacktestException('No scenario')
+    with ProcessPoolExecutor(workers_) as executor:
+        results = list(executor.map(_run_scenario, [(scenario, sample_, interval_) for scenario in scenarios]))
+    for position, (scenario, result) in enumerate(zip(scenarios, results)):
+        result['scenario'][:] = position
+        for name, value in scenario._asdict().items():
+            result[name] = np.full(len(result['scenario']), value)
+    return {name: np.concatenate([result[name] for result in results]) for name in COLUMNS + Scenario._fields}
+
+
+def write_csv(table_, file_):
+    '''
+    @table_ - The result table of run
+    @file_ - Opened text file
+    '''
+    writer = csv.writer(file_)
+    names = list(table_)
+    writer.writerow(names)
+    writer.writerows(zip(*(table_[name].tolist() for name in names)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parameter sweep of simulated trading sessions')
+    parser.add_argument('--trades', type=int, nargs='+', default=[simulation.NUMBER_OF_TRADES], help='trades per scenario')
+    parser.add_argument('--stocks', type=int, nargs='+', default=[0], help='synthetic stocks, the simulation stocks if 0')
+    parser.add_argument('--skew', type=float, nargs='+', default=[0.0], help='Zipf exponents of the popularity of the stocks')
+    parser.add_argument('--out-of-order', type=float, nargs='+', default=[0.0], help='ratios of the late trades')
+    parser.add_argument('--trade-period', type=float, nargs='+', default=[simulation.TRADE_PERIOD],
+                        help='milliseconds between the trades')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0], help='random seeds')
+    parser.add_argument('--sample', type=int, default=60, help='seconds between the samples')
+    parser.add_argument('--interval', type=int, default=15, help='VWSP window in seconds')
+    parser.add_argument('--workers', type=int, help='processes, the number of CPUs by default')
+    parser.add_argument('--output', help='CSV result file, stdout by default')
+    args = parser.parse_args()
+
+    table = run(grid(args.seeds, number_of_trades=args.trades, stocks=args.stocks, skew=args.skew,
+                     out_of_order=args.out_of_order, trade_period=args.trade_period),
+                args.workers, args.sample, args.interval)
+    if args.output:
+        with open(args.output, 'w', newline='') as output:
+            write_csv(table, output)
+    else:
+        write_csv(table, sys.stdout)
@@ -0,0 +1,468 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+import numpy as np
+from ticks import INT64_MAX, exact_sum
+
+
+class BarsException(Exception):
+    def __init__(self, message_):
+        super(BarsException, self).__init__(message_)
+
+
+# columns of the stored bars, every column is int64
+#  - start : beginning of the bar, nanoseconds since epoch
+#  - turnover : sum of trade_price * quantity (VWAP = turnover / volume)
+#  - buy_volume : sum of quantity of the bought stocks (Trade.BUY)
+#  - open_time / close_time : timestamps of the open and the close trade
+#  - overflow : 1 if the turnover of the bar overflows int64, its turnover is then not valid 
+#               (volume <= turnover as the prices are at least a tick, so only the turnover can overflow)
+COLUMNS = ('start', 'open', 'high', 'low', 'close', 'volume', 'turnover', 'buy_volume', 'trades', 'open_time', 'close_time',
+           'overflow')
+
+
+def _ordered(values_):
+    return not np.any(values_[1:] < values_[:-1])
+
+
+def _overflowing(values_, first_):
+    '''
+    @values_ - Non-negative int64 array
+    @first_ - Positions of the first values of the groups, as for np.add.reduceat
+
+    @return - Mask of the groups whose sum overflows int64
+    '''
+    overflow = np.zeros(len(first_), dtype=bool)
+    ends = np.append(first_[1:], len(values_))
+    if len(values_) == 0 or int(values_.max()) * int((ends - first_).max()) <= INT64_MAX:
+        return overflow
+    for i, (start, end) in enumerate(zip(first_.tolist(), ends.tolist())):
+        overflow[i] = exact_sum(values_[start:end]) > INT64_MAX
+    return overflow
+
+
+def _aggregate(starts_, bars_):
+    '''
+    Aggregating bars (a trade is a bar of a single trade) by their new start
+
+    @starts_ - int64 array, the start of the aggregated bar of every row
+    @bars_ - dict of the COLUMNS arrays (start is ignored)
+
+    @return - dict of the COLUMNS arrays of the aggregated bars, in the order of their start
+    '''
+    if _ordered(starts_) and _ordered(bars_['open_time']) and _ordered(bars_['close_time']):
+        # time ordered rows (the usual case) need no sorting
+        open_order = close_order = slice(None)
+        starts = starts_
+    else:
+        open_order = np.lexsort((bars_['open_time'], starts_))
+        close_order = np.lexsort((bars_['close_time'], starts_))
+        starts = starts_[open_order]
+    first = np.flatnonzero(np.concatenate(([True], starts[1:] != starts[:-1])))
+    last = np.concatenate((first[1:], [len(starts)])) - 1
+
+    result = {'start': starts[first]}
+    for name in ('volume', 'turnover', 'buy_volume', 'trades'):
+        result[name] = np.add.reduceat(bars_[name][open_order], first)
+    result['overflow'] = (np.maximum.reduceat(bars_['overflow'][open_order], first) 
+                          | _overflowing(bars_['turnover'][open_order], first))
+    result['high'] = np.maximum.reduceat(bars_['high'][open_order], first)
+    result['low'] = np.minimum.reduceat(bars_['low'][open_order], first)
+    result['open'] = bars_['open'][open_order][first]
+    result['open_time'] = bars_['open_time'][open_order][first]
+    result['close'] = bars_['close'][close_order][last]
+    result['close_time'] = bars_['close_time'][close_order][last]
+    return result
+
+
+# columns of the prefix sums of the bars
+CUMULATED = ('turnover', 'volume', 'overflow')
+
+
+class _BarSeries(object):
+    '''
+    Bars of a single stock at a single resolution, in columnar NumPy arrays
+    ordered by their start.
+
+    The prefix sums of the CUMULATED columns are brought up to date when they
+    are read, from the earliest bar changed since then, so a sum over any range
+    of bars is the difference of two prefix sums. The columns are not negative,
+    so an int64 overflow of a prefix sum is detected where it decreases, and the
+    ranges beyond it are summed exactly from the bars. A bar whose own turnover 
+    overflows is marked (see COLUMNS), the sums of a range of it are not valid.
+    '''
+
+    def __init__(self, capacity_=64):
+        self.size = 0
+        self.__columns = {name: np.empty(capacity_, dtype=np.int64) for name in COLUMNS}
+        # prefix[i] is the sum of the bars before i, valid up to cumulated
+        self.__prefix = np.zeros((len(CUMULATED), capacity_ + 1), dtype=np.int64)
+        self.__cumulated = 0
+        # the first position of an overflowed prefix sum, None if there is no overflow up to cumulated
+        self.__overflow = None
+
+    def __reserve(self, size_):
+        capacity = len(self.__columns['start'])
+        if size_ <= capacity:
+            return
+        while capacity < size_:
+            capacity *= 2
+        for name, column in self.__columns.items():
+            grown = np.empty(capacity, dtype=np.int64)
+            grown[:self.size] = column[:self.size]
+            self.__columns[name] = grown
+        prefix = np.zeros((len(CUMULATED), capacity + 1), dtype=np.int64)
+        prefix[:, :self.__cumulated + 1] = self.__prefix[:, :self.__cumulated + 1]
+        self.__prefix = prefix
+
+    def add(self, start_, timestamp_, quantity_, buy_or_sell_, trade_price_):
+        '''
+        Adding a single trade, a trade of the latest bar or after it is handled in place
+        '''
+        columns = self.__columns
+        last = self.size - 1
+        if self.size and start_ == columns['start'][last]:
+            if trade_price_ > columns['high'][last]:
+                columns['high'][last] = trade_price_
+            if trade_price_ < columns['low'][last]:
+                columns['low'][last] = trade_price_
+            if timestamp_ < columns['open_time'][last]:
+                columns['open'][last], columns['open_time'][last] = trade_price_, timestamp_
+            if timestamp_ >= columns['close_time'][last]:
+                columns['close'][last], columns['close_time'][last] = trade_price_, timestamp_
+            columns['volume'][last] += quantity_
+            turnover = quantity_ * trade_price_
+            if columns['turnover'][last] > INT64_MAX - turnover:
+                columns['overflow'][last] = 1
+            else:
+                columns['turnover'][last] += turnover
+            columns['buy_volume'][last] += quantity_ if buy_or_sell_ else 0
+            columns['trades'][last] += 1
+            self.__cumulated = min(self.__cumulated, last)
+        elif self.size == 0 or start_ > columns['start'][last]:
+            self.__reserve(self.size + 1)
+            for name, value in zip(COLUMNS, (start_, trade_price_, trade_price_, trade_price_, trade_price_, quantity_,
+                                             quantity_ * trade_price_, quantity_ if buy_or_sell_ else 0, 1,
+                                             timestamp_, timestamp_, 0)):
+                columns[name][self.size] = value
+            self.size += 1
+        else:
+            self.merge(_trades_as_bars(np.array([start_]), np.array([timestamp_]), np.array([quantity_]),
+                                       np.array([buy_or_sell_]), np.array([trade_price_])))
+
+    def merge(self, bars_):
+        '''
+        Merging bars ordered by start into the series, the bars of the same start are combined
+
+        @bars_ - dict of the COLUMNS arrays
+        '''
+        count = len(bars_['start'])
+        if count == 0:
+            return
+        columns = self.__columns
+        size = self.size
+        position = size
+        if size and bars_['start'][0] <= columns['start'][size - 1]:
+            position = int(np.searchsorted(columns['start'][:size], bars_['start'][0]))
+            merged = {name: np.concatenate((columns[name][position:size], bars_[name])) for name in COLUMNS}
+            bars_ = _aggregate(merged['start'], merged)
+            count = len(bars_['start'])
+        self.__reserve(position + count)
+        for name in COLUMNS:
+            self.__columns[name][position:position + count] = bars_[name]
+        self.size = position + count
+        self.__cumulated = min(self.__cumulated, position)
+
+    def replace(self, start_, bars_):
+        '''
+        Replacing the bar of a start, the bar is dropped if bars_ is empty
+
+        @bars_ - dict of the COLUMNS arrays of at most one bar starting at start_
+        '''
+        columns = self.__columns
+        size = self.size
+        position = int(np.searchsorted(columns['start'][:size], start_))
+        exists = position < size and columns['start'][position] == start_
+        count = len(bars_['start'])
+        if exists and count:
+            for name in COLUMNS:
+                columns[name][position] = bars_[name][0]
+        elif exists:
+            for column in columns.values():
+                column[position:size - 1] = column[position + 1:size]
+            self.size -= 1
+        elif count:
+            self.merge(bars_)
+        self.__cumulated = min(self.__cumulated, position)
+
+    def truncate(self, start_):
+        '''
+        Dropping the bars from start_
+        '''
+        self.size = int(np.searchsorted(self.__columns['start'][:self.size], start_))
+        self.__cumulated = min(self.__cumulated, self.size)
+
+    def sums(self, start_, end_):
+        '''
+        @return - list of the sums of the CUMULATED columns of the bars starting in [start_, end_)
+        '''
+        starts = self.__columns['start'][:self.size]
+        first = int(np.searchsorted(starts, start_))
+        last = max(first, int(np.searchsorted(starts, end_)))
+        cumulated = self.__cumulated
+        if self.__overflow is not None and self.__overflow > cumulated:
+            self.__overflow = None
+        if cumulated < last:
+            for i, name in enumerate(CUMULATED):
+                prefix = self.__prefix[i, cumulated:last + 1]
+                np.cumsum(self.__columns[name][cumulated:last], out=prefix[1:])
+                prefix[1:] += prefix[0]
+                decreasing = np.flatnonzero(prefix[1:] < prefix[:-1])
+                if len(decreasing) and self.__overflow is None:
+                    self.__overflow = cumulated + 1 + int(decreasing[0])
+                elif len(decreasing):
+                    self.__overflow = min(self.__overflow, cumulated + 1 + int(decreasing[0]))
+            self.__cumulated = last
+        if self.__overflow is not None and self.__overflow <= last:
+            return [exact_sum(self.__columns[name][first:last]) for name in CUMULATED]
+        return (self.__prefix[:, last] - self.__prefix[:, first]).tolist()
+
+    def since(self, start_):
+        '''
+        @return - dict of views on the bars from start_
+        '''
+        position = int(np.searchsorted(self.__columns['start'][:self.size], start_))
+        return {name: column[position:self.size] for name, column in self.__columns.items()}
+
+    def between(self, start_, end_):
+        '''
+        @return - dict of copies of the bars starting in [start_, end_)
+        '''
+        starts = self.__columns['start'][:self.size]
+        rows = slice(int(np.searchsorted(starts, start_)), int(np.searchsorted(starts, end_)))
+        return {name: column[rows].copy() for name, column in self.__columns.items()}
+
+
+def _trades_as_bars(starts_, timestamps_, quantities_, buy_or_sells_, trade_prices_):
+    '''
+    @return - dict of the COLUMNS arrays, a bar for every trade
+    '''
+    quantities = np.asarray(quantities_, dtype=np.int64)
+    trade_prices = np.asarray(trade_prices_, dtype=np.int64)
+    return {'start': starts_, 'open': trade_prices, 'high': trade_prices, 'low': trade_prices, 'close': trade_prices,
+            'volume': quantities, 'turnover': quantities * trade_prices,
+            'buy_volume': np.where(buy_or_sells_, quantities, 0), 'trades': np.ones(len(quantities), dtype=np.int64),
+            'open_time': timestamps_, 'close_time': timestamps_, 'overflow': np.zeros(len(quantities), dtype=np.int64)}
+
+
+class _StockBars(object):
+    '''
+    Bars of a single stock at every resolution. The trades update the finest
+    resolution, the coarser ones are rolled up from the next finer resolution
+    when they are read, from the earliest bar changed since the last roll up.
+    '''
+
+    def __init__(self, resolutions_ns_):
+        self.__resolutions = resolutions_ns_
+        self.__series = [_BarSeries() for _ in resolutions_ns_]
+        # earliest changed timestamp of the finer resolution, per resolution
+        self.__changed = [None] * len(resolutions_ns_)
+
+    def __touch(self, timestamp_):
+        for level in range(1, len(self.__changed)):
+            if self.__changed[level] is None or timestamp_ < self.__changed[level]:
+                self.__changed[level] = timestamp_
+
+    def add(self, timestamp_, quantity_, buy_or_sell_, trade_price_):
+        resolution = self.__resolutions[0]
+        self.__series[0].add(timestamp_ - timestamp_ % resolution, timestamp_, quantity_, buy_or_sell_, trade_price_)
+        self.__touch(timestamp_)
+
+    def add_many(self, timestamps_, quantities_, buy_or_sells_, trade_prices_):
+        if len(timestamps_) == 0:
+            return
+        starts = timestamps_ - timestamps_ % self.__resolutions[0]
+        bars = _trades_as_bars(starts, timestamps_, quantities_, buy_or_sells_, trade_prices_)
+        self.__series[0].merge(_aggregate(starts, bars))
+        self.__touch(int(timestamps_.min()))
+
+    def replace(self, start_, timestamps_, quantities_, buy_or_sells_, trade_prices_):
+        starts = np.full(len(timestamps_), start_, dtype=np.int64)
+        bars = _trades_as_bars(starts, timestamps_, quantities_, buy_or_sells_, trade_prices_)
+        self.__series[0].replace(start_, _aggregate(starts, bars) if len(starts) else bars)
+        self.__touch(start_)
+
+    def sums(self, start_, end_):
+        '''
+        @return - list of the sums of the CUMULATED columns of the finest bars starting in [start_, end_)
+        '''
+        return self.__series[0].sums(start_, end_)
+
+    def series(self, level_):
+        '''
+        @return - The series of the resolution, rolled up if needed
+        '''
+        for level in range(1, level_ + 1):
+            changed = self.__changed[level]
+            if changed is None:
+                continue
+            resolution = self.__resolutions[level]
+            start = changed - changed % resolution
+            finer = self.__series[level - 1].since(start)
+            series = self.__series[level]
+            series.truncate(start)
+            series.merge(_aggregate(finer['start'] - finer['start'] % resolution, finer))
+            self.__changed[level] = None
+            if level + 1 < len(self.__changed):
+                following = self.__changed[level + 1]
+                self.__changed[level + 1] = start if following is None else min(following, start)
+        return self.__series[level_]
+
+
+class BarBuilder(object):
+    '''
+    Streaming OHLCV bars of every stock at several resolutions.
+
+    Every bar has open, high, low, close, volume, VWAP, buy and sell volume and
+    the number of trades. The trades are aggregated into the bars of the finest
+    resolution (out of order trades are merged into their bar), every coarser
+    resolution is rolled up from the bars of the next finer one instead of the
+    trades, so every resolution has to be a multiple of the previous one.
+    '''
+
+    def __init__(self, resolutions_=(1, 60, 300)):
+        '''
+        Constructor
+
+        @resolutions_ - Lengths of the bars in seconds, in increasing order
+        '''
+        try:
+            resolutions = [int(resolution) for resolution in resolutions_]
+        except (TypeError, ValueError) as error:
+            raise BarsException('Non-valid resolution: {0}'.format(error))
+        if not resolutions or resolutions[0] <= 0 or any(
+                coarser <= finer or coarser % finer for finer, coarser in zip(resolutions, resolutions[1:])):
+            raise BarsException('Non-valid resolutions: {0}'.format(resolutions_))
+        self.__resolutions = tuple(resolutions)
+        self.__resolutions_ns = tuple(resolution * 10**9 for resolution in resolutions)
+        self.__bars = {}
+
+    @property
+    def resolutions(self):
+        return self.__resolutions
+
+    def __bars_of(self, symbol_):
+        try:
+            return self.__bars[symbol_]
+        except KeyError:
+            self.__bars[symbol_] = _StockBars(self.__resolutions_ns)
+            return self.__bars[symbol_]
+
+    def add(self, symbol_, timestamp_, quantity_, buy_or_sell_, trade_price_):
+        '''
+        Adding a trade to the bars of the stock
+
+        @symbol_ - Symbol of the stock
+        @timestamp_ - Nanoseconds since epoch
+        @quantity_ - Quantity of the stock
+        @buy_or_sell_ - The stocks are bought (Trade.BUY) or sold (Trade.SELL)
+        @trade_price_ - The price of the stock
+        '''
+        self.__bars_of(symbol_).add(timestamp_, quantity_, buy_or_sell_, trade_price_)
+
+    def add_many(self, symbol_, timestamps_, quantities_, buy_or_sells_, trade_prices_):
+        '''
+        Adding a batch of trades of a stock to its bars
+
+        @symbol_ - Symbol of the stock
+        @timestamps_ - int64 array, nanoseconds since epoch
+        @quantities_ - int64 array
+        @buy_or_sells_ - bool array
+        @trade_prices_ - int64 array
+        '''
+        self.__bars_of(symbol_).add_many(timestamps_, quantities_, buy_or_sells_, trade_prices_)
+
+    def replace(self, symbol_, timestamp_, timestamps_, quantities_, buy_or_sells_, trade_prices_):
+        '''
+        Rebuilding the bar of the finest resolution of a trade from the trades
+        of that bar (e.g. after a trade of it was cancelled or amended), the
+        coarser bars are rolled up again from it when they are read
+
+        @symbol_ - Symbol of the stock
+        @timestamp_ - Nanoseconds since epoch, a time in the bar
+        @timestamps_ - int64 array, the timestamps of every trade of the bar
+        @quantities_ - int64 array
+        @buy_or_sells_ - bool array
+        @trade_prices_ - int64 array
+        '''
+        bars = self.__bars.get(symbol_)
+        if bars is None and len(timestamps_) == 0:
+            return
+        resolution = self.__resolutions_ns[0]
+        self.__bars_of(symbol_).replace(timestamp_ - timestamp_ % resolution, timestamps_, quantities_, 
+                                        buy_or_sells_, trade_prices_)
+
+    def bounds(self, timestamp_):
+        '''
+        @return - (start, end) of the bar of the finest resolution of a time
+        '''
+        resolution = self.__resolutions_ns[0]
+        start = timestamp_ - timestamp_ % resolution
+        return start, start + resolution
+
+    def bars(self, symbol_, resolution_, start_, end_):
+        '''
+        Bars of a stock starting in a time range
+
+        @symbol_ - Symbol of the stock
+        @resolution_ - A resolution in seconds
+        @start_ - Nanoseconds since epoch, inclusive
+        @end_ - Nanoseconds since epoch, exclusive
+
+        @return - dict of arrays in time order: start, open, high, low, close, volume,
+                  vwap, buy_volume, sell_volume, trades
+        '''
+        try:
+            level = self.__resolutions.index(int(resolution_))
+        except (TypeError, ValueError):
+            raise BarsException('Non-valid resolution: {0}'.format(resolution_))
+        bars = self.__bars.get(symbol_)
+        columns = bars.series(level).between(start_, end_) if bars is not None else _BarSeries(1).between(0, 0)
+        if columns['overflow'].any():
+            raise BarsException('The turnover of a bar of {0} overflows int64'.format(symbol_))
+        volume = columns['volume']
+        return {'start': columns['start'], 'open': columns['open'], 'high': columns['high'],
+                'low': columns['low'], 'close': columns['close'], 'volume': volume,
+                'vwap': np.divide(columns['turnover'], volume, out=np.zeros(len(volume)), where=volume != 0),
+                'buy_volume': columns['buy_volume'], 'sell_volume': volume - columns['buy_volume'],
+                'trades': columns['trades']}
+
+    def symbols(self):
+        return list(self.__bars)
+
+    def sums(self, symbol_, start_, end_):
+        '''
+        Turnover and volume of the bars of the finest resolution in a time range,
+        from the prefix sums of the bars, without reading the trades.
+        A range not aligned to the bars includes the bars starting in it.
+
+        @symbol_ - Symbol of the stock
+        @start_ - Nanoseconds since epoch, inclusive
+        @end_ - Nanoseconds since epoch, exclusive
+
+        @return - (sum of trade_price * quantity, sum of quantity) as ints, BarsException 
+                  is raised if the turnover of a bar of the range overflows int64
+        '''
+        bars = self.__bars.get(symbol_)
+        if bars is None:
+            return 0, 0
+        turnover, volume, overflow = bars.sums(start_, end_)
+        if overflow:
+            raise BarsException('The turnover of a bar of {0} overflows int64'.format(symbol_))
+        return turnover, volume
+
+    def clear(self):
+        self.__bars = {}
@@ -0,0 +1,99 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+
+Benchmark of many independent engines in one process: backtest contexts
+sharing the same stocks read only, every context replays its own synthetic
+feed at event time and computes its metrics. The contexts are run one after
+the other and on a thread pool, and their set up is compared with starting
+a worker interpreter which imports the engine.
+
+Usage (from the root of the repository):
+    python -m benchmarks.bench_contexts [--contexts 100] [--trades 100000] [--stocks 50] [--threads 8]
+'''
+
+import argparse
+import gc
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import simulation
+from clock import EventClock
+from engine import Engine
+from index import AllShareIndex
+
+# trades of an add_many call
+BATCH = 10000
+
+
+def _backtest(engine_, columns_):
+    '''
+    Replaying a feed in the engine and computing its metrics
+
+    @return - (VWSP of the last 15 seconds, GBCE All Share Index)
+    '''
+    for start in range(0, len(columns_[0]), BATCH):
+        engine_.add_many(*(column[start:start + BATCH] for column in columns_))
+    return engine_.trades.volume_weighted_stock_price(15), engine_.trades.gbce_all_share_index(AllShareIndex.SESSION)
+
+
+def _interpreter_start():
+    '''
+    @return - Seconds of starting an interpreter importing the engine
+    '''
+    start = time.perf_counter()
+    subprocess.check_call([sys.executable, '-c', 'import engine'])
+    return time.perf_counter() - start
+
+
+def run(contexts_, trades_, stocks_, threads_):
+    '''
+    @return - dict of the results
+    '''
+    stocks = simulation.synthetic_stocks(stocks_)
+    shared = Engine(simulation.HEADER, stocks).stocks
+    symbols = [stock[0] for stock in stocks]
+    feeds = [simulation.generate_columns(trades_, symbols, 1.1, 0.01, seed, 10**18) for seed in range(contexts_)]
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    engines = [Engine(stock_manager_=shared, clock_=EventClock()) for _ in range(contexts_)]
+    setup = (time.perf_counter() - start) / contexts_
+    empty, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    sequential = [_backtest(engine, feed) for engine, feed in zip(engines, feeds)]
+    sequential_seconds = time.perf_counter() - start
+
+    engines = [Engine(stock_manager_=shared, clock_=EventClock()) for _ in range(contexts_)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads_) as executor:
+        parallel = list(executor.map(_backtest, engines, feeds))
+    parallel_seconds = time.perf_counter() - start
+    if parallel != sequential:
+        raise RuntimeError('The contexts are not independent')
+
+    return {'contexts': contexts_, 'trades per context': trades_,
+            'context setup ms': setup * 1000, 'empty context bytes': empty / contexts_,
+            'interpreter start ms': _interpreter_start() * 1000,
+            'sequential s': sequential_seconds, 'sequential trades/s': contexts_ * trades_ / sequential_seconds,
+            '{0} threads s'.format(threads_): parallel_seconds,
+            '{0} threads trades/s'.format(threads_): contexts_ * trades_ / parallel_seconds}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Independent backtest contexts in one process')
+    parser.add_argument('--contexts', type=int, default=100, help='number of contexts')
+    parser.add_argument('--trades', type=int, default=100000, help='trades per context')
+    parser.add_argument('--stocks', type=int, default=50, help='number of synthetic stocks')
+    parser.add_argument('--threads', type=int, default=8, help='threads of the parallel run')
+    args = parser.parse_args()
+
+    for name, value in run(args.contexts, args.trades, args.stocks, args.threads).items():
+        print('{0:<24} {1:>16,.1f}'.format(name, value))
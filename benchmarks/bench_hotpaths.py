@@ -0,0 +1,193 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+
+Benchmarks of the trade and stock hot paths on synthetic feeds
+(simulation.generate_columns): ingestion throughput of Trade.__init__,
+TradeManager.add and TradeManager.add_many, p50/p99 latency of the queries and
+the peak memory of the ingestion.
+
+The results are written as JSON, two result files of different revisions
+are compared with --compare.
+
+Usage (from the root of the repository):
+    python -m benchmarks.bench_hotpaths [--sizes 1000 100000 10000000] [--stocks 5] [--skew 1.1]
+                                        [--out-of-order 0.01] [--output results.json]
+    python -m benchmarks.bench_hotpaths --compare old.json new.json
+'''
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas
+
+import simulation
+from index import AllShareIndex
+from stocks import StockManager
+from trades import Trade, TradeManager
+
+# trades added one by one at most, the per object paths are measured on a prefix of the feed
+OBJECT_LIMIT = 100000
+
+# trades of an add_many call
+BATCH = 10000
+
+# measurements of a query
+REPEAT = 200
+
+
+def _revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _throughput(function_, count_):
+    '''
+    @return - Calls of function_ per second, it is called count_ times in total
+    '''
+    gc.collect()
+    start = time.perf_counter()
+    function_()
+    return count_ / (time.perf_counter() - start)
+
+
+def _latency(function_, repeat_=REPEAT):
+    '''
+    @return - (p50, p99) of the calls of function_ in microseconds
+    '''
+    timings = np.empty(repeat_)
+    for i in range(repeat_):
+        start = time.perf_counter()
+        function_()
+        timings[i] = time.perf_counter() - start
+    p50, p99 = np.percentile(timings, (50, 99)) * 10**6
+    return float(p50), float(p99)
+
+
+def _ingest(trade_manager_, columns_):
+    for start in range(0, len(columns_[0]), BATCH):
+        trade_manager_.add_many(*(column[start:start + BATCH] for column in columns_))
+
+
+def run(size_, symbols_, skew_, out_of_order_, seed_=0):
+    '''
+    @return - List of result records of a feed of size_ trades
+    '''
+    columns = simulation.generate_columns(size_, symbols_, skew_, out_of_order_, seed_)
+    objects = min(size_, OBJECT_LIMIT)
+    rows = list(zip(*(column[:objects].tolist() for column in columns)))
+    results = []
+
+    def record(benchmark_, **values_):
+        results.append(dict(size=size_, benchmark=benchmark_, **values_))
+
+    record('Trade.__init__', trades_per_second=_throughput(lambda: [Trade(*row) for row in rows], objects))
+    trades = [Trade(*row) for row in rows]
+    TradeManager._clear()
+    trade_manager = TradeManager()
+
+    def add():
+        for trade in trades:
+            trade_manager.add(trade)
+
+    record('TradeManager.add', trades_per_second=_throughput(add, objects))
+
+    TradeManager._clear()
+    trade_manager = TradeManager()
+    record('TradeManager.add_many', trades_per_second=_throughput(lambda: _ingest(trade_manager, columns), size_))
+
+    symbol = str(columns[0][0])
+    queries = (('volume_weighted_stock_price(15)', lambda: trade_manager.volume_weighted_stock_price(15)),
+               ('volume_weighted_stock_price(15, symbol)', lambda: trade_manager.volume_weighted_stock_price(15, symbol)),
+               ('volume_weighted_stock_price(45)', lambda: trade_manager.volume_weighted_stock_price(45)),
+               ('gbce_all_share_index(session)', lambda: trade_manager.gbce_all_share_index(AllShareIndex.SESSION)),
+               ('gbce_all_share_index(latest)', lambda: trade_manager.gbce_all_share_index(AllShareIndex.LATEST)),
+               ('gbce_all_share_index(window, 60)', lambda: trade_manager.gbce_all_share_index(AllShareIndex.WINDOW, 60)),
+               ('gbce_all_share_index(window, 45)', lambda: trade_manager.gbce_all_share_index(AllShareIndex.WINDOW, 45)))
+    for name, query in queries:
+        p50, p99 = _latency(query)
+        record(name, p50_us=p50, p99_us=p99)
+
+    stock_manager = StockManager()
+    market_prices = {str(symbol): 100 for symbol in np.unique(columns[0]).tolist()}
+    p50, p99 = _latency(lambda: stock_manager.dividend_yields(market_prices))
+    record('StockManager.dividend_yields', p50_us=p50, p99_us=p99)
+    p50, p99 = _latency(lambda: [stock_manager[symbol].dividend_yield(100) for symbol in market_prices])
+    record('Stock.dividend_yield', p50_us=p50, p99_us=p99)
+
+    TradeManager._clear()
+    gc.collect()
+    tracemalloc.start()
+    _ingest(TradeManager(), columns)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    record('TradeManager.add_many memory', peak_bytes=peak, peak_bytes_per_trade=peak / size_)
+    TradeManager._clear()
+    return results
+
+
+def compare(baseline_, current_):
+    '''
+    @return - Lines of the relative changes of the metrics of two result files
+    '''
+    def metrics(results_):
+        return {(record['size'], record['benchmark'], name): value for record in results_['results']
+                for name, value in record.items() if name not in ('size', 'benchmark')}
+
+    before, after = metrics(baseline_), metrics(current_)
+    lines = []
+    for key in sorted(before.keys() & after.keys(), key=str):
+        change = (after[key] - before[key]) / before[key] * 100 if before[key] else float('nan')
+        lines.append('{0:>9} {1:<42} {2:<22} {3:>14.1f} {4:>14.1f} {5:>+8.1f}%'.format(
+            key[0], key[1], key[2], before[key], after[key], change))
+    return lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of the trade and stock hot paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='numbers of trades')
+    parser.add_argument('--stocks', type=int, default=0, help='number of synthetic stocks, the simulation stocks if 0')
+    parser.add_argument('--skew', type=float, default=0.0, help='Zipf exponent of the popularity of the stocks')
+    parser.add_argument('--out-of-order', type=float, default=0.0, help='ratio of the late trades')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the feed')
+    parser.add_argument('--output', help='JSON result file, stdout by default')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help='comparing two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as baseline, open(args.compare[1]) as current:
+            print('\n'.join(compare(json.load(baseline), json.load(current))))
+        sys.exit(0)
+
+    symbols = None
+    if args.stocks:
+        stocks = simulation.synthetic_stocks(args.stocks)
+        StockManager().create_stocks_header(simulation.HEADER, stocks)
+        symbols = [stock[0] for stock in stocks]
+    else:
+        simulation.create_stocks()
+
+    results = {'meta': {'revision': _revision(), 'python': platform.python_version(), 'numpy': np.__version__,
+                        'pandas': pandas.__version__, 'platform': platform.platform(), 'processor': platform.processor(),
+                        'stocks': args.stocks or len(simulation.STOCKS), 'skew': args.skew,
+                        'out_of_order': args.out_of_order, 'seed': args.seed},
+               'results': []}
+    for size in args.sizes:
+        results['results'].extend(run(size, symbols, args.skew, args.out_of_order, args.seed))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as result_file:
+            result_file.write(output + '\n')
+    else:
+        print(output)
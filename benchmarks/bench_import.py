@@ -0,0 +1,74 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+
+Import time benchmark of the engine modules: every import is measured in a new
+interpreter, together with whether it loaded pandas. pandas is measured alone
+as the reference of the cost the core engine (stocks, trades) avoids.
+
+Usage (from the root of the repository):
+    python -m benchmarks.bench_import [--modules stocks trades pandas] [--repeat 10] [--output results.json]
+'''
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+MODULES = ('stocks', 'trades', 'sharding', 'simulation', 'pandas')
+
+# measured in the new interpreter, the interpreter start up is not included
+SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import {0}
+print(time.perf_counter() - start, 'pandas' in sys.modules)
+'''
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(module_, repeat_):
+    '''
+    @module_ - Name of the module
+    @repeat_ - Number of the interpreters importing it
+
+    @return - Result record: median and minimum import time in milliseconds, pandas was loaded
+    '''
+    timings, pandas = [], False
+    for _ in range(repeat_):
+        output = subprocess.check_output([sys.executable, '-c', SCRIPT.format(module_)], cwd=ROOT).decode().split()
+        timings.append(float(output[0]) * 1000)
+        pandas = output[1] == 'True'
+    return {'module': module_, 'median_ms': float(np.median(timings)), 'min_ms': min(timings), 'loads_pandas': pandas}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import time of the engine modules')
+    parser.add_argument('--modules', nargs='+', default=list(MODULES), help='modules to import')
+    parser.add_argument('--repeat', type=int, default=10, help='interpreters per module')
+    parser.add_argument('--output', help='JSON result file, stdout by default')
+    args = parser.parse_args()
+
+    results = {'meta': {'revision': _revision(), 'python': platform.python_version(), 'platform': platform.platform(),
+                        'repeat': args.repeat},
+               'results': [run(module, args.repeat) for module in args.modules]}
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as result_file:
+            result_file.write(output + '\n')
+    else:
+        print(output)
@@ -0,0 +1,70 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+
+Restart benchmark of the trade journal: writing a session of trades and
+rebuilding the TradeManager (store, rolling windows, GBCE accumulators) from it.
+
+Usage (from the root of the repository):
+    python -m benchmarks.bench_journal [--trades 10000000] [--path /tmp/trades.journal]
+'''
+
+import argparse
+import os
+import time
+
+import numpy as np
+from pandas import Timestamp
+
+from journal import TradeJournal
+from stocks import StockManager
+from trades import TradeManager
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100],
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100],
+          ['JOE', 'Common', 13, '', 250]]
+
+# length of the simulated trading session in seconds
+SESSION = 8 * 3600
+
+
+def run(number_of_trades_, path_):
+    '''
+    @return - (seconds of writing the journal, seconds of the replay)
+    '''
+    stock_manager = StockManager()
+    if not len(stock_manager):
+        stock_manager.create_stocks_header(HEADER, STOCKS)
+    rng = np.random.default_rng(0)
+    start = Timestamp.now().value - SESSION * 10**9
+    if os.path.exists(path_):
+        os.remove(path_)
+
+    begin = time.perf_counter()
+    journal = TradeJournal(path_, number_of_trades_)
+    journal.extend(start + np.arange(number_of_trades_, dtype=np.int64) * (SESSION * 10**9 // number_of_trades_),
+                   np.array([stock[0] for stock in STOCKS])[rng.integers(0, len(STOCKS), number_of_trades_)],
+                   rng.integers(1000, 2000, number_of_trades_), rng.integers(0, 2, number_of_trades_).astype(bool),
+                   rng.integers(500, 1000, number_of_trades_))
+    journal.close()
+    writing = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    trade_manager = TradeManager()
+    trade_manager.open_journal(path_)
+    replay = time.perf_counter() - begin
+    trade_manager.close_journal()
+    os.remove(path_)
+    return writing, replay
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Writing and replaying the trade journal')
+    parser.add_argument('--trades', type=int, default=10000000, help='number of trades')
+    parser.add_argument('--path', default='trades.journal', help='path of the journal file')
+    args = parser.parse_args()
+
+    writing, replay = run(args.trades, args.path)
+    print('journal {0:>8.3f} s  replay {1:>8.3f} s  ({2:,} trades)'.format(writing, replay, args.trades))
@@ -0,0 +1,95 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+
+Memory benchmark: bytes per trade of the former dict based Trade, the slotted
+Trade and the columnar TradeStore.
+
+Usage (from the root of the repository):
+    python -m benchmarks.bench_memory [--trades 1000000]
+'''
+
+import argparse
+import gc
+import tracemalloc
+from random import randint
+
+from pandas import Timestamp
+from stocks import StockManager
+from store import TradeStore
+from trades import Trade
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100],
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100],
+          ['JOE', 'Common', 13, '', 250]]
+
+
+class _DictTrade(dict):
+    '''
+    The former dict based Trade, kept here only for comparison
+    '''
+    def __init__(self, stock_, timestamp_, quantity_, buy_or_sell_, trade_price_):
+        self['stock'] = stock_
+        self['timestamp'] = Timestamp(timestamp_)
+        self['quantity'] = int(quantity_)
+        self['buy_or_sell'] = bool(buy_or_sell_)
+        self['trade_price'] = int(trade_price_)
+
+
+def _measure(build_):
+    '''
+    @build_ - Function building the trades
+
+    @return - (bytes allocated by the kept result, result)
+    '''
+    gc.collect()
+    tracemalloc.start()
+    result = build_()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+def run(number_of_trades_):
+    '''
+    @number_of_trades_ - Number of trades of each representation
+
+    @return - {representation: bytes per trade}
+    '''
+    stock_manager = StockManager()
+    if not len(stock_manager):
+        stock_manager.create_stocks_header(HEADER, STOCKS)
+    symbols = list(stock_manager.keys())
+    start = Timestamp.now().value
+    rows = [(symbols[randint(0, len(symbols) - 1)], start + i * 10**6, randint(1000, 2000), randint(0, 1), randint(500, 1000))
+            for i in range(number_of_trades_)]
+
+    def build_dict_trades():
+        return [_DictTrade(stock_manager[row[0]], *row[1:]) for row in rows]
+
+    def build_trades():
+        return [Trade(*row) for row in rows]
+
+    def build_store():
+        store = TradeStore(number_of_trades_)
+        for symbol, timestamp, quantity, buy_or_sell, trade_price in rows:
+            store.append(timestamp, symbol, quantity, buy_or_sell, trade_price)
+        return store
+
+    result = {}
+    for name, build in (('dict Trade', build_dict_trades), ('slotted Trade', build_trades), ('TradeStore', build_store)):
+        size, built = _measure(build)
+        result[name] = size / number_of_trades_
+        del built
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bytes per trade of the trade representations')
+    parser.add_argument('--trades', type=int, default=1000000, help='number of trades')
+    args = parser.parse_args()
+
+    for name, bytes_per_trade in run(args.trades).items():
+        print('{0:<15} {1:>8.1f} bytes/trade'.format(name, bytes_per_trade))
@@ -0,0 +1,87 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+
+Scaling benchmark of the sharded engine: ingestion throughput and latency of
+the VWSP / GBCE queries with 1, 2, 4 and 8 worker processes, compared with a
+single TradeManager in the process. The speedup is bounded by the number of cores.
+
+Usage (from the root of the repository):
+    python -m benchmarks.bench_sharding [--trades 1000000] [--batch 10000] [--stocks 64] [--workers 1 2 4 8]
+'''
+
+import argparse
+import time
+
+import numpy as np
+from pandas import Timestamp
+
+from sharding import ShardedEngine
+from stocks import StockManager
+from trades import TradeManager
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+
+
+def _stocks(number_of_stocks_):
+    return [['S{0:03d}'.format(i), 'Common', 8, '', 100] for i in range(number_of_stocks_)]
+
+
+def _batches(number_of_trades_, batch_, stocks_):
+    '''
+    @return - List of column batches (symbols, timestamps, quantities, buy_or_sells, trade_prices)
+    '''
+    rng = np.random.default_rng(0)
+    symbols = np.array([stock[0] for stock in stocks_])[rng.integers(0, len(stocks_), number_of_trades_)]
+    timestamps = Timestamp.now().value - 60 * 10**9 + np.arange(number_of_trades_, dtype=np.int64) * 1000
+    quantities = rng.integers(1000, 2000, number_of_trades_)
+    buy_or_sells = rng.integers(0, 2, number_of_trades_).astype(bool)
+    trade_prices = rng.integers(500, 1000, number_of_trades_)
+    return [(symbols[i:i + batch_], timestamps[i:i + batch_], quantities[i:i + batch_],
+             buy_or_sells[i:i + batch_], trade_prices[i:i + batch_]) for i in range(0, number_of_trades_, batch_)]
+
+
+def _run(engine_, batches_):
+    '''
+    @return - (trades per second of the ingestion, seconds of a VWSP and a GBCE query)
+    '''
+    start = time.perf_counter()
+    for batch in batches_:
+        engine_.add_many(*batch)
+    ingestion = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine_.volume_weighted_stock_price(15)
+    engine_.gbce_all_share_index()
+    query = time.perf_counter() - start
+    return sum(len(batch[0]) for batch in batches_) / ingestion, query
+
+
+def run(number_of_trades_, batch_, number_of_stocks_, workers_):
+    '''
+    @return - {engine: (trades per second, query seconds)}
+    '''
+    stocks = _stocks(number_of_stocks_)
+    stock_manager = StockManager()
+    stock_manager.create_stocks_header(HEADER, stocks)
+    batches = _batches(number_of_trades_, batch_, stocks)
+
+    result = {'single process': _run(TradeManager(), batches)}
+    TradeManager._clear()
+    for workers in workers_:
+        with ShardedEngine(workers, HEADER, stocks) as engine:
+            result['{0} workers'.format(workers)] = _run(engine, batches)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scaling of the sharded engine')
+    parser.add_argument('--trades', type=int, default=1000000, help='number of trades')
+    parser.add_argument('--batch', type=int, default=10000, help='trades per add_many call')
+    parser.add_argument('--stocks', type=int, default=64, help='number of stocks')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='numbers of worker processes')
+    args = parser.parse_args()
+
+    for name, (throughput, query) in run(args.trades, args.batch, args.stocks, args.workers).items():
+        print('{0:<15} {1:>12,.0f} trades/s {2:>10.2f} ms/query'.format(name, throughput, query * 1000))
@@ -0,0 +1,64 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+from time import localtime, time_ns
+
+
+class WallClock(object):
+    '''
+    The current time as pandas Timestamp.now() gives it (local time as
+    nanoseconds since epoch), without building a Timestamp
+    '''
+
+    def now(self):
+        '''
+        @return - Nanoseconds since epoch
+        '''
+        return time_ns() + localtime().tm_gmtoff * 10**9
+
+    def observe(self, timestamp_):
+        '''
+        The wall clock does not depend on the trades
+        '''
+        pass
+
+
+class EventClock(object):
+    '''
+    Event time driven by the trade stream: the time is the latest timestamp
+    of the trades seen, so a historical session replayed at full speed has
+    its windows evaluated at the time of its trades.
+
+    The clock is not locked, its owner (e.g. TradeManager) observes the trades
+    under its own lock.
+    '''
+
+    def __init__(self, start_=0):
+        '''
+        Constructor
+
+        @start_ - Nanoseconds since epoch before the first trade
+        '''
+        self.__now = int(start_)
+
+    def now(self):
+        '''
+        @return - Nanoseconds since epoch
+        '''
+        return self.__now
+
+    def observe(self, timestamp_):
+        '''
+        Moving the time forward to the trade, an earlier trade does not move it back
+
+        @timestamp_ - Nanoseconds since epoch
+        '''
+        if timestamp_ > self.__now:
+            self.__now = int(timestamp_)
+
+
+# the default clock of the trades and the trade managers
+WALL_CLOCK = WallClock()
@@ -0,0 +1,90 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+from clock import WALL_CLOCK
+from stocks import StockManager, StockManagerException
+from trades import Trade, TradeManager, TradeManagerException, TradeException
+
+
+class EngineException(Exception):
+    def __init__(self, message_):
+        super(EngineException, self).__init__(message_)
+
+
+class Engine(object):
+    '''
+    An isolated market: its own stock universe (StockManager) and trade book
+    (TradeManager), independent of the singletons and of the other engines.
+
+    Several engines of a process (venues, backtest scenarios) can share the
+    same stocks, which are read only after they are created. The singletons are
+    the default engine (Engine.default()) of the code using StockManager() and
+    TradeManager() directly.
+    '''
+
+    def __init__(self, header_=None, stocks_=None, stock_manager_=None, clock_=WALL_CLOCK, tick_size_=None):
+        '''
+        Constructor
+
+        @header_ - The attribute list of the stocks (see StockManager.create_stocks_header)
+        @stocks_ - List of stocks, created in a new stock universe of the engine
+        @stock_manager_ - Stocks shared with other engines, instead of header_ and stocks_
+        @clock_ - The clock the windows are evaluated at (see TradeManager.set_clock)
+        @tick_size_ - The price of a tick (see TradeManager.set_tick_size), TradeManager.TICK_SIZE by default
+        '''
+        if stock_manager_ is None:
+            stock_manager_ = StockManager.new_instance()
+            if stocks_ is not None:
+                try:
+                    stock_manager_.create_stocks_header(header_, stocks_)
+                except (StockManagerException, KeyError, TypeError, ValueError) as error:
+                    raise EngineException('Invalid stocks: {0}'.format(error))
+        elif stocks_ is not None:
+            raise EngineException('Stocks are given both as a StockManager and as a list')
+        self.stocks = stock_manager_
+        self.trades = TradeManager.new_instance(stock_manager_)
+        if clock_ is not WALL_CLOCK:
+            self.trades.set_clock(clock_)
+        if tick_size_ is not None:
+            try:
+                self.trades.set_tick_size(tick_size_)
+            except TradeManagerException as error:
+                raise EngineException(str(error))
+
+    @classmethod
+    def default(cls):
+        '''
+        @return - Engine of the StockManager and TradeManager singletons
+        '''
+        engine = cls.__new__(cls)
+        engine.stocks = StockManager()
+        engine.trades = TradeManager()
+        return engine
+
+    def trade(self, stock_symbol_, timestamp_, quantity_, buy_or_sell_, trade_price_):
+        '''
+        @return - A Trade of a stock of the engine (see Trade)
+        '''
+        return Trade(stock_symbol_, timestamp_, quantity_, buy_or_sell_, trade_price_, self.stocks)
+
+    def add(self, stock_symbol_, timestamp_, quantity_, buy_or_sell_, trade_price_):
+        '''
+        Adding a trade to the trade book of the engine
+        
+        @return - Trade id of the trade (see TradeManager.cancel and amend)
+        '''
+        try:
+            return self.trades.add(self.trade(stock_symbol_, timestamp_, quantity_, buy_or_sell_, trade_price_))
+        except TradeException as error:
+            raise EngineException('Invalid trade: {0}'.format(error))
+
+    def add_many(self, stock_symbols_, timestamps_=None, quantities_=None, buy_or_sells_=None, trade_prices_=None):
+        '''
+        Adding a batch of trades (see TradeManager.add_many)
+
+        @return - Indices of the rejected trades
+        '''
+        return self.trades.add_many(stock_symbols_, timestamps_, quantities_, buy_or_sells_, trade_prices_)
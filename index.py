@@ -0,0 +1,183 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+from math import exp, fsum, log
+
+
+class AllShareIndexException(Exception):
+    def __init__(self, message_):
+        super(AllShareIndexException, self).__init__(message_)
+
+
+class AllShareIndex(object):
+    '''
+    Incrementally maintained GBCE All Share Index.
+
+    Running accumulators are kept per stock and updated when a trade is added:
+     - session : sum of quantity * log(trade_price) and sum of quantity
+     - latest : the latest (by timestamp) trade price and its log
+
+    The partials of the stocks are combined with math.fsum, which does not depend
+    on the order of the stocks, and the result is cached until the next trade,
+    so reading the index never touches the stored trades.
+    '''
+
+    # geometric mean of every trade price weighted by quantity since the start of the session
+    SESSION = 'session'
+    # geometric mean of the latest trade price of every stock
+    LATEST = 'latest'
+    # geometric mean of the trade prices weighted by quantity in a time window
+    WINDOW = 'window'
+
+    MODES = (SESSION, LATEST, WINDOW)
+
+    def __init__(self):
+        '''
+        Constructor
+        '''
+        self.__session = {}
+        self.__latest = {}
+        self.__cache = {}
+        # reads of the index answered from the cache or computed
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, symbol_, timestamp_, quantity_, trade_price_):
+        '''
+        Updating the accumulators of the stock with a trade
+
+        @symbol_ - Symbol of the stock
+        @timestamp_ - Nanoseconds since epoch
+        @quantity_ - Quantity of the stock
+        @trade_price_ - The price of the stock
+        '''
+        log_price = log(trade_price_)
+        try:
+            session = self.__session[symbol_]
+            session[0] += quantity_ * log_price
+            session[1] += quantity_
+        except KeyError:
+            self.__session[symbol_] = [quantity_ * log_price, quantity_]
+
+        latest = self.__latest.get(symbol_)
+        if latest is None or timestamp_ >= latest[0]:
+            self.__latest[symbol_] = (timestamp_, log_price, trade_price_)
+        self.__cache.clear()
+
+    def add_partials(self, symbol_, log_turnover_, volume_, timestamp_, trade_price_):
+        '''
+        Merging already aggregated trades of a stock into the accumulators
+
+        @symbol_ - Symbol of the stock
+        @log_turnover_ - Sum of quantity * log(trade_price) of the trades
+        @volume_ - Sum of quantity of the trades
+        @timestamp_ - Timestamp of the latest trade
+        @trade_price_ - Price of the latest trade
+        '''
+        try:
+            session = self.__session[symbol_]
+            session[0] += log_turnover_
+            session[1] += volume_
+        except KeyError:
+            self.__session[symbol_] = [log_turnover_, volume_]
+
+        latest = self.__latest.get(symbol_)
+        if latest is None or timestamp_ >= latest[0]:
+            self.__latest[symbol_] = (timestamp_, log(trade_price_), trade_price_)
+        self.__cache.clear()
+
+    def set_session(self, symbol_, log_turnover_, volume_):
+        '''
+        Setting the session accumulators of the stock after a correction (a cancelled
+        or amended trade), rebuilt from the trades of the stock, as subtracting 
+        the trade would leave the rounding errors of the float sum behind. The 
+        latest price is set by set_latest
+
+        @symbol_ - Symbol of the stock
+        @log_turnover_ - Sum of quantity * log(trade_price) of the trades of the stock
+        @volume_ - Sum of quantity of the trades of the stock
+        '''
+        if volume_ > 0:
+            self.__session[symbol_] = [log_turnover_, volume_]
+        else:
+            self.__session.pop(symbol_, None)
+        self.__cache.clear()
+
+    def set_latest(self, symbol_, timestamp_=None, trade_price_=None):
+        '''
+        Setting the latest trade of the stock after a correction
+
+        @timestamp_ - Timestamp of the latest trade, the stock has no trade if it is None
+        @trade_price_ - Price of the latest trade
+        '''
+        if timestamp_ is None:
+            self.__latest.pop(symbol_, None)
+        else:
+            self.__latest[symbol_] = (timestamp_, log(trade_price_), trade_price_)
+        self.__cache.clear()
+
+    def value(self, mode_=SESSION):
+        '''
+        The index based on the accumulators
+
+        @mode_ - SESSION or LATEST
+
+        @return - The index, 0.0 if there is no trade
+        '''
+        try:
+            result = self.__cache[mode_]
+            self.hits += 1
+            return result
+        except KeyError:
+            self.misses += 1
+
+        result = self.combine(*self.partials(mode_))
+        self.__cache[mode_] = result
+        return result
+
+    def partials(self, mode_=SESSION):
+        '''
+        The per stock partial sums the index is combined from
+
+        @mode_ - SESSION or LATEST
+
+        @return - (list of the sums of quantity * log(trade_price), list of the sums of quantity)
+        '''
+        if mode_ == self.SESSION:
+            return ([session[0] for session in self.__session.values()],
+                    [session[1] for session in self.__session.values()])
+        if mode_ == self.LATEST:
+            return [latest[1] for latest in self.__latest.values()], [1] * len(self.__latest)
+        raise AllShareIndexException('Invalid mode: {0}'.format(mode_))
+
+    def latest_prices(self):
+        '''
+        @return - dict of the latest (by timestamp) trade price of every stock
+        '''
+        return {symbol: latest[2] for symbol, latest in self.__latest.items()}
+
+    @staticmethod
+    def combine(log_turnovers_, volumes_):
+        '''
+        Geometric mean from partial sums
+
+        RELATIONSHIP WITH LOGARITHMS
+        https://en.wikipedia.org/wiki/Geometric_mean#Relationship_with_logarithms
+
+        @log_turnovers_ - Partial sums of quantity * log(trade_price)
+        @volumes_ - Partial sums of quantity
+
+        @return - The geometric mean, 0.0 if the volume is zero
+        '''
+        volume = sum(volumes_)
+        return exp(fsum(log_turnovers_) / volume) if volume else 0.0
+
+    def clear(self):
+        self.__session = {}
+        self.__latest = {}
+        self.__cache = {}
+        self.hits = 0
+        self.misses = 0
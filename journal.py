@@ -0,0 +1,186 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+import os
+import numpy as np
+
+
+class TradeJournalException(Exception):
+    def __init__(self, message_):
+        super(TradeJournalException, self).__init__(message_)
+
+
+class TradeJournal(object):
+    '''
+    Append-only, memory-mapped binary journal of trades.
+
+    The file is a 16 bytes header (MAGIC and the number of records as int64)
+    followed by fixed-width records of RECORD. The records are written before the
+    count is updated, so a crash while appending loses at most the trades of
+    the unfinished append. The file is grown geometrically and mapped again.
+
+    The records of an opened journal are a structured NumPy view on the mapped
+    file, so a restart reads its columns without building an object per trade.
+
+    A record is either a trade with its trade id, or a correction of the trade
+    of trade_id: a cancel (quantity is 0) or an amend (the new attributes of
+    the trade).
+    '''
+
+    MAGIC = b'SSSTRDJ2'
+
+    HEADER_SIZE = 16
+
+    RECORD = np.dtype([('timestamp', '<i8'),
+                       ('symbol', 'S8'),
+                       ('quantity', '<i8'),
+                       ('buy_or_sell', '?'),
+                       ('trade_price', '<i8'),
+                       ('trade_id', '<i8'),
+                       ('correction', '?')])
+
+    # trade id of a trade written without it, the trades get the next ids when they are replayed
+    NO_TRADE_ID = -1
+
+    GROWTH_FACTOR = 2
+
+    def __init__(self, path_, capacity_=1 << 16):
+        '''
+        Constructor, opening the journal or creating it if it does not exist
+
+        @path_ - Path of the journal file
+        @capacity_ - Number of records preallocated in a new file
+        '''
+        self.path = path_
+        if not os.path.exists(path_) or os.path.getsize(path_) == 0:
+            with open(path_, 'wb') as journal:
+                journal.write(self.MAGIC + np.int64(0).tobytes())
+                journal.truncate(self.HEADER_SIZE + max(int(capacity_), 1) * self.RECORD.itemsize)
+        elif os.path.getsize(path_) < self.HEADER_SIZE:
+            raise TradeJournalException('Not a trade journal: {0}'.format(path_))
+        self.__map()
+        if bytes(self.__file[:len(self.MAGIC)]) != self.MAGIC:
+            self.close()
+            raise TradeJournalException('Not a trade journal: {0}'.format(path_))
+        if not 0 <= len(self) <= self.capacity:
+            self.close()
+            raise TradeJournalException('Corrupted trade journal: {0}'.format(path_))
+
+    def __map(self):
+        self.__file = np.memmap(self.path, dtype=np.uint8, mode='r+')
+        records = (len(self.__file) - self.HEADER_SIZE) // self.RECORD.itemsize
+        self.__count = self.__file[len(self.MAGIC):self.HEADER_SIZE].view(np.int64)
+        self.__records = self.__file[self.HEADER_SIZE:self.HEADER_SIZE + records * self.RECORD.itemsize].view(self.RECORD)
+
+    def __reserve(self, size_):
+        '''
+        Growing the file geometrically to hold at least size_ records
+        '''
+        capacity = self.capacity
+        if size_ <= capacity:
+            return
+        while capacity < size_:
+            capacity *= self.GROWTH_FACTOR
+        self.__file.flush()
+        self.__file = self.__count = self.__records = None
+        with open(self.path, 'r+b') as journal:
+            journal.truncate(self.HEADER_SIZE + capacity * self.RECORD.itemsize)
+        self.__map()
+
+    def __len__(self):
+        return int(self.__count[0])
+
+    @property
+    def capacity(self):
+        return len(self.__records)
+
+    @property
+    def records(self):
+        '''
+        Read-only structured view on the written records, the file is not copied
+        '''
+        view = self.__records[:len(self)]
+        view.flags.writeable = False
+        return view
+
+    @staticmethod
+    def __symbol(symbol_):
+        symbol = symbol_.encode() if isinstance(symbol_, str) else bytes(symbol_)
+        if len(symbol) > TradeJournal.RECORD['symbol'].itemsize:
+            raise TradeJournalException('Too long symbol: {0}'.format(symbol_))
+        return symbol
+
+    def __write(self, record_):
+        size = len(self)
+        self.__reserve(size + 1)
+        self.__records[size] = record_
+        self.__count[0] = size + 1
+
+    def append(self, timestamp_, symbol_, quantity_, buy_or_sell_, trade_price_, trade_id_=NO_TRADE_ID):
+        '''
+        Writing a single trade
+
+        @timestamp_ - Nanoseconds since epoch
+        @symbol_ - Symbol of the stock
+        @quantity_ - Quantity of the stock
+        @buy_or_sell_ - The stocks are bought or sold
+        @trade_price_ - The price of the stocks
+        @trade_id_ - Trade id of the trade
+        '''
+        self.__write((timestamp_, self.__symbol(symbol_), quantity_, buy_or_sell_, trade_price_, trade_id_, False))
+
+    def correct(self, trade_id_, timestamp_, symbol_, quantity_, buy_or_sell_, trade_price_):
+        '''
+        Writing a correction of a trade
+
+        @trade_id_ - Trade id of the corrected trade
+        @timestamp_, @symbol_, @buy_or_sell_, @trade_price_ - The attributes of the amended trade
+        @quantity_ - Quantity of the amended trade, 0 if the trade is cancelled
+        '''
+        self.__write((timestamp_, self.__symbol(symbol_), quantity_, buy_or_sell_, trade_price_, trade_id_, True))
+
+    def extend(self, timestamps_, symbols_, quantities_, buy_or_sells_, trade_prices_, trade_ids_=NO_TRADE_ID):
+        '''
+        Writing a batch of trades given by columns
+
+        @timestamps_ - int64 array, nanoseconds since epoch
+        @symbols_ - Array of the symbols of the stocks
+        @quantities_ - int64 array
+        @buy_or_sells_ - bool array
+        @trade_prices_ - int64 array
+        @trade_ids_ - int64 array, the trade ids of the trades
+        '''
+        count = len(timestamps_)
+        if count == 0:
+            return
+        symbols = np.asarray(symbols_)
+        if symbols.dtype.kind == 'U':
+            symbols = symbols.astype('S')
+        if symbols.dtype.itemsize > self.RECORD['symbol'].itemsize:
+            for symbol in symbols.tolist():
+                self.__symbol(symbol)
+        size = len(self)
+        self.__reserve(size + count)
+        records = self.__records[size:size + count]
+        records['timestamp'] = timestamps_
+        records['symbol'] = symbols
+        records['quantity'] = quantities_
+        records['buy_or_sell'] = buy_or_sells_
+        records['trade_price'] = trade_prices_
+        records['trade_id'] = trade_ids_
+        records['correction'] = False
+        self.__count[0] = size + count
+
+    def flush(self):
+        '''
+        Writing the mapped pages to the disk
+        '''
+        if self.__file is not None:
+            self.__file.flush()
+
+    def close(self):
+        self.flush()
+        self.__file = self.__count = self.__records = None
@@ -0,0 +1,419 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+import asyncio
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from trades import TradeManager
+
+# a message is a frame: its length (uint32) and the payload
+FRAME = struct.Struct('<I')
+
+# payload header: kind, sequence number, time (nanoseconds since epoch), GBCE All Share Index, number of records
+HEADER = struct.Struct('<BIqdH')
+
+# the symbol table, a record is the id (uint16), the length of the symbol (uint8) and the symbol in UTF-8
+SYMBOLS = 0
+# the metrics of every stock, sent to a new subscriber or to one which fell behind
+SNAPSHOT = 1
+# the metrics of the stocks changed since the previous tick
+DELTA = 2
+
+SYMBOL = struct.Struct('<HB')
+
+# the longest symbol in UTF-8 bytes
+MAX_SYMBOL_SIZE = 255
+
+# record of SNAPSHOT and DELTA, 34 bytes
+RECORD = np.dtype([('id', '<u2'), ('vwsp', '<f8'), ('price', '<f8'), ('dividend_yield', '<f8'), ('pe_ratio', '<f8')])
+
+# metrics of a stock at its latest trade price
+Quote = namedtuple('Quote', ['vwsp', 'price', 'dividend_yield', 'pe_ratio'])
+
+# decoded payload, records are {id: symbol} for SYMBOLS and {id: Quote} otherwise
+Message = namedtuple('Message', ['kind', 'sequence', 'time', 'gbce', 'records'])
+
+
+class MarketDataException(Exception):
+    def __init__(self, message_):
+        super(MarketDataException, self).__init__(message_)
+
+
+def _symbol(symbol_):
+    '''
+    @symbol_ - Symbol of a stock
+
+    @return - The symbol in UTF-8
+    '''
+    symbol = str(symbol_).encode('utf-8')
+    if len(symbol) > MAX_SYMBOL_SIZE:
+        raise MarketDataException('Too long symbol: {0}'.format(symbol_))
+    return symbol
+
+
+def encode(kind_, sequence_, time_, gbce_, records_):
+    '''
+    @kind_ - SYMBOLS, SNAPSHOT or DELTA
+    @records_ - List of (id, symbol) for SYMBOLS, RECORD array otherwise
+
+    @return - The frame
+    '''
+    if kind_ == SYMBOLS:
+        body = b''.join(SYMBOL.pack(id_, len(symbol)) + symbol
+                        for id_, symbol in ((id_, _symbol(symbol)) for id_, symbol in records_))
+    else:
+        body = records_.tobytes()
+    payload = HEADER.pack(kind_, sequence_ & 0xFFFFFFFF, time_, gbce_, len(records_)) + body
+    return FRAME.pack(len(payload)) + payload
+
+
+def decode(payload_):
+    '''
+    @payload_ - Payload of a frame
+
+    @return - Message
+    '''
+    try:
+        kind, sequence, time, gbce, count = HEADER.unpack_from(payload_)
+        if kind == SYMBOLS:
+            records, offset = {}, HEADER.size
+            for _ in range(count):
+                id_, length = SYMBOL.unpack_from(payload_, offset)
+                offset += SYMBOL.size
+                records[id_] = bytes(payload_[offset:offset + length]).decode('utf-8')
+                offset += length
+        elif kind in (SNAPSHOT, DELTA):
+            array = np.frombuffer(payload_, RECORD, count, HEADER.size)
+            records = {id_: Quote(*values) for id_, *values in array.tolist()}
+        else:
+            raise MarketDataException('Unknown message kind: {0}'.format(kind))
+    except (struct.error, ValueError, UnicodeDecodeError) as error:
+        raise MarketDataException('Non-valid message: {0}'.format(error))
+    return Message(kind, sequence, time, gbce, records)
+
+
+async def _open(address_):
+    '''
+    @address_ - Path of a Unix domain socket or (host, port) of a TCP socket
+
+    @return - (asyncio.StreamReader, asyncio.StreamWriter)
+    '''
+    if isinstance(address_, str):
+        return await asyncio.open_unix_connection(address_)
+    return await asyncio.open_connection(*address_)
+
+
+class MarketDataPublisher(object):
+    '''
+    Publisher of the metrics of the traded stocks: VWSP of the interval, the
+    latest trade price, dividend yield and P/E ratio at that price, and the GBCE
+    All Share Index of the session.
+
+    The metrics are computed once per tick, at most max_rate_ times per second,
+    so the trades between two ticks are coalesced. A tick sends only the stocks
+    whose metrics changed (DELTA), the same encoded frame to every subscriber.
+    A new subscriber gets the symbol table and a SNAPSHOT first. A subscriber
+    which does not read its socket is skipped while more than buffer_size_ bytes
+    are waiting for it, and gets a new SNAPSHOT instead of the skipped deltas
+    when it caught up.
+    '''
+
+    def __init__(self, trade_manager_=None, interval_=15, max_rate_=10, buffer_size_=1 << 20):
+        '''
+        Constructor
+
+        @trade_manager_ - The TradeManager, the singleton by default
+        @interval_ - Time window (seconds) of the published VWSP
+        @max_rate_ - Maximum number of ticks per second
+        @buffer_size_ - Bytes waiting for a subscriber before it is skipped
+        '''
+        self.trade_manager = trade_manager_ if trade_manager_ is not None else TradeManager()
+        if max_rate_ <= 0 or buffer_size_ <= 0:
+            raise MarketDataException('Non-valid rate or buffer size')
+        for symbol in self.trade_manager.stock_manager:
+            _symbol(symbol)
+        self.interval = interval_
+        self.period = 1.0 / max_rate_
+        self.buffer_size = int(buffer_size_)
+        self.address = None
+        # published frames, snapshots and skipped deltas
+        self.ticks = 0
+        self.snapshots = 0
+        self.skipped = 0
+        self.__symbols = []
+        self.__ids = {}
+        self.__values = np.zeros(0, RECORD)
+        self.__gbce = 0.0
+        self.__time = 0
+        self.__sequence = 0
+        self.__changed = 0
+        # writer -> it fell behind
+        self.__subscribers = {}
+        self.__server = None
+
+    def __len__(self):
+        '''
+        @return - Number of the subscribers
+        '''
+        return len(self.__subscribers)
+
+    def __compute(self):
+        '''
+        The metrics of the traded stocks, new stocks get the next ids
+
+        @return - (RECORD array in the order of the ids, the new symbols)
+        '''
+        trade_manager = self.trade_manager
+        prices = trade_manager.latest_prices()
+        new = [symbol for symbol in prices if symbol not in self.__ids]
+        if len(self.__symbols) + len(new) > 1 << 16:
+            raise MarketDataException('Too many stocks to publish')
+        for symbol in new:
+            _symbol(symbol)
+        for symbol in new:
+            self.__ids[symbol] = len(self.__symbols)
+            self.__symbols.append(symbol)
+        values = np.zeros(len(self.__symbols), RECORD)
+        if self.__symbols:
+            market_prices = {symbol: prices.get(symbol, 0.0) for symbol in self.__symbols}
+            stock_manager = trade_manager.stock_manager
+            values['id'] = np.arange(len(self.__symbols))
+            values['vwsp'] = [trade_manager.volume_weighted_stock_price(self.interval, symbol) for symbol in self.__symbols]
+            values['price'] = list(market_prices.values())
+            values['dividend_yield'] = stock_manager.dividend_yields(market_prices)
+            values['pe_ratio'] = stock_manager.pe_ratios(market_prices)
+        return values, new
+
+    def snapshot(self):
+        '''
+        @return - Frames of the symbol table and of the metrics of every stock as of the latest tick
+        '''
+        return (encode(SYMBOLS, self.__sequence, self.__time, self.__gbce, list(enumerate(self.__symbols))) +
+                encode(SNAPSHOT, self.__sequence, self.__time, self.__gbce, self.__values))
+
+    def tick(self):
+        '''
+        Computing the metrics and encoding the changed ones
+
+        @return - Frames of the new symbols and of the DELTA, None if nothing changed
+        '''
+        values, new = self.__compute()
+        gbce = self.trade_manager.gbce_all_share_index()
+        old = self.__values
+        changed = np.ones(len(values), dtype=bool)
+        changed[:len(old)] = (values[:len(old)] != old)
+        self.__changed = int(changed.sum())
+        if not self.__changed and gbce == self.__gbce:
+            return None
+        self.__values, self.__gbce = values, gbce
+        self.__time = self.trade_manager.now()
+        self.__sequence += 1
+        frames = encode(DELTA, self.__sequence, self.__time, gbce, values[changed])
+        if new:
+            frames = encode(SYMBOLS, self.__sequence, self.__time, gbce,
+                            [(self.__ids[symbol], symbol) for symbol in new]) + frames
+        return frames
+
+    def publish(self):
+        '''
+        A tick: sending the changed metrics to every subscriber
+
+        @return - Number of the stocks changed
+        '''
+        frames = self.tick()
+        self.ticks += 1
+        if frames is None:
+            return 0
+        for writer, behind in list(self.__subscribers.items()):
+            if writer.is_closing():
+                del self.__subscribers[writer]
+            elif writer.transport.get_write_buffer_size() > self.buffer_size:
+                self.__subscribers[writer] = True
+                self.skipped += 1
+            elif behind:
+                self.__subscribers[writer] = False
+                self.snapshots += 1
+                writer.write(self.snapshot())
+            else:
+                writer.write(frames)
+        return self.__changed
+
+    async def __connected(self, reader_, writer_):
+        self.__subscribers[writer_] = False
+        self.snapshots += 1
+        writer_.write(self.snapshot())
+        try:
+            # the subscribers do not send anything, only their disconnection is waited for
+            while await reader_.read(1 << 12):
+                pass
+        except OSError:
+            pass
+        finally:
+            self.__subscribers.pop(writer_, None)
+            writer_.close()
+
+    async def serve(self, address_):
+        '''
+        Starting to accept subscribers
+
+        @address_ - Path of a Unix domain socket or (host, port) of a TCP socket, port 0 picks a free port
+
+        @return - The address the subscribers connect to
+        '''
+        if self.__server is not None:
+            raise MarketDataException('The publisher is already serving')
+        try:
+            if isinstance(address_, str):
+                self.__server = await asyncio.start_unix_server(self.__connected, address_)
+            else:
+                self.__server = await asyncio.start_server(self.__connected, *address_)
+        except OSError as error:
+            raise MarketDataException('Serving on {0!r} failed: {1}'.format(address_, error))
+        self.address = self.__server.sockets[0].getsockname()
+        if not isinstance(address_, str):
+            self.address = self.address[:2]
+        return self.address
+
+    async def run(self, address_):
+        '''
+        Serving the subscribers and ticking until the task is cancelled
+
+        @address_ - See at serve
+        '''
+        await self.serve(address_)
+        try:
+            while True:
+                self.publish()
+                await asyncio.sleep(self.period)
+        finally:
+            await self.close()
+
+    async def close(self):
+        '''
+        Disconnecting the subscribers and stopping the server
+        '''
+        server, self.__server = self.__server, None
+        if server is not None:
+            server.close()
+        for writer in list(self.__subscribers):
+            writer.close()
+        self.__subscribers.clear()
+        if server is not None:
+            await server.wait_closed()
+
+
+class MarketDataSubscriber(object):
+    '''
+    Subscriber of a MarketDataPublisher keeping the latest metrics of every stock
+
+    Iterating over the subscriber gives the received messages (after they are
+    applied) until the publisher disconnects.
+    '''
+
+    def __init__(self):
+        '''
+        Constructor
+        '''
+        self.symbols = {}
+        # symbol -> Quote
+        self.quotes = {}
+        self.gbce = 0.0
+        self.time = 0
+        self.sequence = None
+        # deltas lost between two sequence numbers
+        self.gaps = 0
+        self.__reader = None
+        self.__writer = None
+
+    async def connect(self, address_):
+        '''
+        @address_ - Path of a Unix domain socket or (host, port) of a TCP socket
+        '''
+        try:
+            self.__reader, self.__writer = await _open(address_)
+        except OSError as error:
+            raise MarketDataException('Connecting to {0!r} failed: {1}'.format(address_, error))
+        return self
+
+    def apply(self, message_):
+        '''
+        Updating the metrics with a decoded message
+        '''
+        if message_.kind == SYMBOLS:
+            self.symbols.update(message_.records)
+            return
+        if message_.kind == DELTA and self.sequence is not None and message_.sequence != (self.sequence + 1) & 0xFFFFFFFF:
+            self.gaps += 1
+        if message_.kind == SNAPSHOT:
+            self.quotes = {}
+        for id_, quote in message_.records.items():
+            self.quotes[self.symbols[id_]] = quote
+        self.sequence, self.time, self.gbce = message_.sequence, message_.time, message_.gbce
+
+    async def receive(self):
+        '''
+        @return - The next message (applied), None if the publisher disconnected
+        '''
+        try:
+            size = FRAME.unpack(await self.__reader.readexactly(FRAME.size))[0]
+            message = decode(await self.__reader.readexactly(size))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        self.apply(message)
+        return message
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.receive()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def close(self):
+        if self.__writer is not None:
+            self.__writer.close()
+            try:
+                await self.__writer.wait_closed()
+            except OSError:
+                pass
+            self.__writer = None
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    import simulation
+    from pipeline import Pipeline, file_source
+
+    parser = argparse.ArgumentParser(description='Publishing the metrics of the trades read from stdin')
+    parser.add_argument('--address', help='path of a Unix domain socket')
+    parser.add_argument('--port', type=int, default=9100, help='localhost TCP port if there is no --address')
+    parser.add_argument('--rate', type=float, default=10, help='maximum ticks per second')
+    parser.add_argument('--interval', type=int, default=15, help='VWSP window in seconds')
+    args = parser.parse_args()
+
+    simulation.create_stocks()
+
+    async def main():
+        publisher = MarketDataPublisher(interval_=args.interval, max_rate_=args.rate)
+        task = asyncio.ensure_future(publisher.run(args.address or ('127.0.0.1', args.port)))
+        try:
+            await Pipeline(interval_=args.interval).run(file_source(sys.stdin))
+            await asyncio.sleep(publisher.period)
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    asyncio.run(main())
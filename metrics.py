@@ -0,0 +1,180 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+import os
+import socket
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+
+
+class MetricsException(Exception):
+    def __init__(self, message_):
+        super(MetricsException, self).__init__(message_)
+
+
+# upper bounds (in seconds) of the latency buckets, 1 microsecond - 10 seconds
+LATENCY_BOUNDS = tuple(float('{0}e{1}'.format(mantissa, exponent)) for exponent in range(-6, 1) for mantissa in (1, 2.5, 5)) + (10.0,)
+
+# prefix of the Prometheus metric names
+PREFIX = 'supersimplestocks'
+
+
+class Histogram(object):
+    '''
+    Latency histogram with fixed buckets, the quantiles are estimated by the
+    upper bound of their bucket
+    '''
+
+    def __init__(self, bounds_=LATENCY_BOUNDS):
+        '''
+        Constructor
+
+        @bounds_ - Increasing upper bounds of the buckets in seconds, the last bucket is unbounded
+        '''
+        self.bounds = tuple(bounds_)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds_):
+        self.buckets[bisect_left(self.bounds, seconds_)] += 1
+        self.count += 1
+        self.sum += seconds_
+        if seconds_ > self.max:
+            self.max = seconds_
+
+    def quantile(self, quantile_):
+        '''
+        @quantile_ - Between 0 and 1
+
+        @return - Upper bound of the bucket of the quantile (the maximum for the last bucket), 0.0 without observations
+        '''
+        if self.count == 0:
+            return 0.0
+        rank = quantile_ * self.count
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def stats(self):
+        return {'count': self.count, 'total_seconds': self.sum, 'max_seconds': self.max,
+                'p50_seconds': self.quantile(0.5), 'p99_seconds': self.quantile(0.99)}
+
+
+class Metrics(object):
+    '''
+    Counters and latency histograms of the operations.
+
+    The operations are instrumented by wrapping the bound methods (see timed),
+    so an object without metrics runs its methods without any overhead.
+    '''
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__counters = {}
+        self.__histograms = {}
+
+    def count(self, name_, value_=1):
+        with self.__lock:
+            self.__counters[name_] = self.__counters.get(name_, 0) + value_
+
+    def observe(self, name_, seconds_):
+        with self.__lock:
+            try:
+                histogram = self.__histograms[name_]
+            except KeyError:
+                histogram = self.__histograms[name_] = Histogram()
+            histogram.observe(seconds_)
+
+    def timed(self, name_, function_):
+        '''
+        @name_ - Name of the operation
+        @function_ - The function (bound method) of the operation
+
+        @return - The function measuring its latency and counting its errors
+        '''
+        @wraps(function_)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function_(*args, **kwargs)
+            except Exception:
+                self.count(name_ + '_errors')
+                raise
+            finally:
+                self.observe(name_, perf_counter() - start)
+        return timed
+
+    def stats(self):
+        '''
+        @return - {'operations': {name: latency statistics}, 'counters': {name: value}}
+        '''
+        with self.__lock:
+            return {'operations': {name: histogram.stats() for name, histogram in self.__histograms.items()},
+                    'counters': dict(self.__counters)}
+
+    def prometheus(self, gauges_=None):
+        '''
+        Prometheus text exposition format of the metrics
+
+        @gauges_ - {name: value} of the current values to export as well
+
+        @return - The text
+        '''
+        lines = []
+        with self.__lock:
+            if self.__histograms:
+                name = '{0}_operation_seconds'.format(PREFIX)
+                lines += ['# HELP {0} Latency of the operations'.format(name), '# TYPE {0} histogram'.format(name)]
+                for operation, histogram in sorted(self.__histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.bounds + (float('inf'),), histogram.buckets):
+                        cumulative += count
+                        lines.append('{0}_bucket{{operation="{1}",le="{2}"}} {3}'.format(
+                            name, operation, '+Inf' if bound == float('inf') else repr(bound), cumulative))
+                    lines.append('{0}_sum{{operation="{1}"}} {2!r}'.format(name, operation, histogram.sum))
+                    lines.append('{0}_count{{operation="{1}"}} {2}'.format(name, operation, histogram.count))
+            if self.__counters:
+                name = '{0}_events_total'.format(PREFIX)
+                lines += ['# HELP {0} Number of the events'.format(name), '# TYPE {0} counter'.format(name)]
+                for event, value in sorted(self.__counters.items()):
+                    lines.append('{0}{{event="{1}"}} {2}'.format(name, event, value))
+        for gauge, value in sorted((gauges_ or {}).items()):
+            name = '{0}_{1}'.format(PREFIX, gauge)
+            lines += ['# TYPE {0} gauge'.format(name), '{0} {1!r}'.format(name, value)]
+        return '\n'.join(lines) + '\n'
+
+
+def dump(text_, target_):
+    '''
+    Writing a metrics text to a file or a socket
+
+    @text_ - The text
+    @target_ - Path of a file (replaced atomically, e.g. for a textfile collector),
+               (host, port) of a TCP listener or a connected socket
+    '''
+    data = text_.encode()
+    try:
+        if isinstance(target_, str):
+            temporary = '{0}.{1}.tmp'.format(target_, os.getpid())
+            with open(temporary, 'wb') as metrics_file:
+                metrics_file.write(data)
+            os.replace(temporary, target_)
+        elif isinstance(target_, tuple):
+            with socket.create_connection(target_) as connection:
+                connection.sendall(data)
+        elif hasattr(target_, 'sendall'):
+            target_.sendall(data)
+        else:
+            raise MetricsException('Non-valid target: {0!r}'.format(target_))
+    except OSError as error:
+        raise MetricsException('Dumping the metrics failed: {0}'.format(error))
@@ -0,0 +1,333 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+import asyncio
+from collections import namedtuple
+
+from trades import TradeManager
+
+
+class PipelineException(Exception):
+    def __init__(self, message_):
+        super(PipelineException, self).__init__(message_)
+
+
+# published after every ingested micro-batch
+MetricsUpdate = namedtuple('MetricsUpdate', ['trades', 'rejected', 'vwsp', 'gbce', 'dividend_yield', 'pe_ratio'])
+
+_BUY = frozenset(('1', 'true', 'buy', 'b'))
+_SELL = frozenset(('0', 'false', 'sell', 's'))
+
+
+def parse_trade(line_):
+    '''
+    @line_ - "stock_symbol,timestamp,quantity,buy_or_sell,trade_price" (str or bytes)
+
+    @return - Tuple of the fields, they are converted and validated at ingestion,
+              buy_or_sell is None if it is neither a BUY nor a SELL (case insensitive 
+              1/true/buy/b or 0/false/sell/s), such a trade is rejected
+    '''
+    if isinstance(line_, bytes):
+        line_ = line_.decode()
+    fields = ([field.strip() for field in line_.split(',')] + [''] * 5)[:5]
+    symbol, timestamp, quantity, buy_or_sell, trade_price = fields
+    side = buy_or_sell.lower()
+    buy_or_sell = True if side in _BUY else False if side in _SELL else None
+    return symbol, int(timestamp) if timestamp.isdigit() else timestamp, quantity, buy_or_sell, trade_price
+
+
+async def iterable_source(rows_):
+    '''
+    Async source of an iterable of trade tuples, e.g. simulation.generate_trades()
+    '''
+    for row in rows_:
+        yield row
+        await asyncio.sleep(0)
+
+
+async def stream_source(reader_):
+    '''
+    Async source of trade lines read from an asyncio.StreamReader (socket, pipe)
+
+    @reader_ - asyncio.StreamReader
+    '''
+    while True:
+        line = await reader_.readline()
+        if not line:
+            return
+        if line.strip():
+            yield parse_trade(line)
+
+
+async def tcp_source(host_, port_):
+    '''
+    Async source of trade lines of a TCP connection
+    '''
+    reader, writer = await asyncio.open_connection(host_, port_)
+    try:
+        async for trade in stream_source(reader):
+            yield trade
+    finally:
+        writer.close()
+
+
+async def unix_source(path_):
+    '''
+    Async source of trade lines of a Unix domain socket
+    '''
+    reader, writer = await asyncio.open_unix_connection(path_)
+    try:
+        async for trade in stream_source(reader):
+            yield trade
+    finally:
+        writer.close()
+
+
+async def file_source(file_):
+    '''
+    Async source of trade lines of a file (or sys.stdin), the lines are read in a
+    worker thread so the event loop is not blocked by the disk
+
+    @file_ - Path or an opened text file
+    '''
+    loop = asyncio.get_running_loop()
+    opened = open(file_) if isinstance(file_, str) else file_
+    try:
+        while True:
+            lines = await loop.run_in_executor(None, opened.readlines, 1 << 16)
+            if not lines:
+                return
+            for line in lines:
+                if line.strip():
+                    yield parse_trade(line)
+            await asyncio.sleep(0)
+    finally:
+        if opened is not file_:
+            opened.close()
+
+
+class Subscription(object):
+    '''
+    Queue of the metric updates of a subscriber.
+
+    If the subscriber falls behind and its queue is full, the pipeline either waits
+    for it (backpressure, the default) or, if it is conflating, drops its oldest
+    update. Iterating over the subscription stops when the pipeline is finished,
+    a full subscriber is waited for at most Pipeline.CLOSE_TIMEOUT seconds at the end.
+    '''
+
+    _END = object()
+
+    def __init__(self, maxsize_=16, conflate_=False):
+        '''
+        Constructor
+
+        @maxsize_ - Number of updates queued for the subscriber
+        @conflate_ - Dropping the oldest update instead of waiting for the subscriber
+        '''
+        self.__queue = asyncio.Queue(maxsize_)
+        self.conflate = conflate_
+        self.dropped = 0
+
+    async def _publish(self, update_):
+        if self.conflate and self.__queue.full():
+            self.__queue.get_nowait()
+            self.dropped += 1
+        await self.__queue.put(update_)
+
+    async def _close(self, timeout_):
+        '''
+        Ending the updates, a subscriber which does not make room for the end in 
+        timeout_ seconds loses its oldest update instead of blocking the shutdown
+        '''
+        try:
+            await asyncio.wait_for(self.__queue.put(self._END), timeout_)
+        except asyncio.TimeoutError:
+            if self.__queue.full():
+                self.__queue.get_nowait()
+                self.dropped += 1
+            self.__queue.put_nowait(self._END)
+
+    async def get(self):
+        '''
+        @return - The next update or None if the pipeline is finished
+        '''
+        update = await self.__queue.get()
+        return None if update is self._END else update
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        update = await self.get()
+        if update is None:
+            raise StopAsyncIteration
+        return update
+
+
+class Pipeline(object):
+    '''
+    asyncio trade ingestion pipeline:
+     source -> micro-batches -> TradeManager.add_many -> metric updates -> subscribers
+
+    The source is read by a separate task into a bounded queue, so a slow ingestion
+    slows down the reading of the feed. A micro-batch is closed when it has batch_size_
+    trades or batch_timeout_ seconds after its first trade.
+    '''
+
+    # seconds a full subscriber is waited for at the end of the pipeline
+    CLOSE_TIMEOUT = 1.0
+
+    def __init__(self, trade_manager_=None, batch_size_=1000, batch_timeout_=0.05, interval_=15, queue_size_=10000):
+        '''
+        Constructor
+
+        @trade_manager_ - The TradeManager, the singleton by default
+        @batch_size_ - Maximum number of trades of a micro-batch
+        @batch_timeout_ - Maximum waiting time (seconds) for a micro-batch
+        @interval_ - Time window (seconds) of the published VWSP
+        @queue_size_ - Number of trades read ahead from the source
+        '''
+        self.trade_manager = trade_manager_ if trade_manager_ is not None else TradeManager()
+        self.batch_size = int(batch_size_)
+        self.batch_timeout = float(batch_timeout_)
+        self.interval = interval_
+        self.queue_size = int(queue_size_)
+        if self.batch_size <= 0 or self.batch_timeout <= 0:
+            raise PipelineException('Non-valid batch size or timeout')
+        self.__subscriptions = []
+
+    def subscribe(self, maxsize_=16, conflate_=False):
+        '''
+        @return - A new Subscription for the metric updates
+        '''
+        subscription = Subscription(maxsize_, conflate_)
+        self.__subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription_):
+        self.__subscriptions.remove(subscription_)
+
+    async def __read(self, source_, queue_):
+        try:
+            async for trade in source_:
+                await queue_.put(trade)
+        finally:
+            await queue_.put(None)
+
+    async def batches(self, source_):
+        '''
+        Grouping the trades of the source into micro-batches
+
+        @source_ - Async iterable of trade tuples
+
+        @return - Async generator of lists of trade tuples
+        '''
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(self.queue_size)
+        reader = asyncio.ensure_future(self.__read(source_, queue))
+        try:
+            finished = False
+            while not finished:
+                trade = await queue.get()
+                if trade is None:
+                    break
+                batch = [trade]
+                deadline = loop.time() + self.batch_timeout
+                while len(batch) < self.batch_size:
+                    try:
+                        trade = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            trade = await asyncio.wait_for(queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    if trade is None:
+                        finished = True
+                        break
+                    batch.append(trade)
+                yield batch
+        finally:
+            if not reader.done():
+                reader.cancel()
+            try:
+                await reader
+            except asyncio.CancelledError:
+                pass
+
+    def ingest(self, batch_):
+        '''
+        Adding a micro-batch to the TradeManager and computing the metrics
+
+        @batch_ - List of trade tuples
+
+        @return - MetricsUpdate
+        '''
+        rows = [trade for trade in batch_ if trade[3] is not None]
+        rejected = len(batch_) - len(rows)
+        if rows:
+            rejected += len(self.trade_manager.add_many(rows))
+        stock_manager = self.trade_manager.stock_manager
+        # the market price of a stock is the price of its latest trade by timestamp
+        market_prices = {symbol: float(price) for symbol, price in self.trade_manager.latest_prices().items() 
+                         if symbol in stock_manager}
+        symbols = list(market_prices)
+        tm = self.trade_manager
+        return MetricsUpdate(trades=len(batch_) - rejected,
+                             rejected=rejected,
+                             vwsp={symbol: tm.volume_weighted_stock_price(self.interval, symbol) for symbol in symbols},
+                             gbce=tm.gbce_all_share_index(),
+                             dividend_yield=dict(zip(symbols, stock_manager.dividend_yields(market_prices).tolist())),
+                             pe_ratio=dict(zip(symbols, stock_manager.pe_ratios(market_prices).tolist())))
+
+    async def publish(self, update_):
+        '''
+        Sending an update to every subscriber, waiting for the ones which are full
+        and not conflating
+        '''
+        await asyncio.gather(*[subscription._publish(update_) for subscription in list(self.__subscriptions)])
+
+    async def run(self, source_):
+        '''
+        Running the pipeline until the source is exhausted
+
+        @source_ - Async iterable of trade tuples
+
+        @return - Number of ingested trades
+        '''
+        ingested = 0
+        try:
+            async for batch in self.batches(source_):
+                update = self.ingest(batch)
+                ingested += update.trades
+                await self.publish(update)
+        finally:
+            await asyncio.gather(*[subscription._close(self.CLOSE_TIMEOUT) for subscription in list(self.__subscriptions)])
+        return ingested
+
+
+if __name__ == '__main__':
+    import sys
+    import simulation
+
+    simulation.create_stocks()
+
+    async def main():
+        pipeline = Pipeline()
+        subscription = pipeline.subscribe(conflate_=True)
+
+        async def show():
+            async for update in subscription:
+                print('PIPELINE -- trades: {0}, rejected: {1}, GBCE All Share Index: {2}'.format(update.trades, update.rejected, update.gbce))
+
+        printer = asyncio.ensure_future(show())
+        await pipeline.run(file_source(sys.stdin))
+        await printer
+
+    asyncio.run(main())
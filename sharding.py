@@ -0,0 +1,256 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+import multiprocessing
+from zlib import crc32
+
+import numpy as np
+
+from clock import EventClock, WALL_CLOCK
+from index import AllShareIndex
+from stocks import StockManager
+from ticks import TickSize, TickSizeException
+from trades import TradeManager, TradeManagerException
+
+
+class ShardedEngineException(Exception):
+    def __init__(self, message_):
+        super(ShardedEngineException, self).__init__(message_)
+
+
+def _shard_of(symbol_, workers_):
+    '''
+    @return - Position of the worker owning the stock, stable across processes and runs
+    '''
+    return crc32(str(symbol_).encode()) % workers_
+
+
+def _take(column_, rows_):
+    '''
+    @return - The rows of a column given as an array or as a sequence
+    '''
+    if isinstance(column_, np.ndarray):
+        return column_[rows_]
+    return [column_[i] for i in rows_.tolist()]
+
+
+def _serve(connection_, header_, stocks_, clock_, tick_size_):
+    '''
+    Command loop of a worker process owning its own StockManager and TradeManager
+
+    Commands:
+     - ('call', name of a TradeManager method, tuple of arguments) -> (True, result) or (False, error)
+     - ('stop',)
+    '''
+    # a forked worker inherits the singletons of the coordinator, it uses its own instances
+    stock_manager = StockManager.new_instance()
+    stock_manager.create_stocks_header(header_, stocks_)
+    trade_manager = TradeManager.new_instance(stock_manager)
+    trade_manager.set_clock(clock_)
+    trade_manager.set_tick_size(tick_size_)
+    while True:
+        command = connection_.recv()
+        if command[0] == 'stop':
+            break
+        _, name, args = command
+        try:
+            connection_.send((True, getattr(trade_manager, name)(*args)))
+        except Exception as error:
+            connection_.send((False, error))
+    connection_.close()
+
+
+class ShardedEngine(object):
+    '''
+    Trade engine partitioned by stock symbol over worker processes.
+
+    Every worker owns a TradeManager (trade store, rolling windows, GBCE accumulators)
+    of the stocks routed to it by crc32(symbol) % workers. The coordinator splits
+    the batches by stock, and combines the partial sums of the workers: integer sums
+    of turnover and volume for VWSP, per stock sums of quantity * log(trade_price)
+    for the GBCE All Share Index. The per stock sums are computed the same way as
+    in a single TradeManager and combined with math.fsum, so the results match the
+    single process exactly. Every worker stores the prices in the same ticks, the
+    combined sums are converted to prices by the coordinator.
+
+    With an event clock every worker keeps the event time of its own trades,
+    the windows are evaluated at the latest event time of all the workers.
+    '''
+
+    def __init__(self, workers_, header_, stocks_, start_method_=None, clock_=WALL_CLOCK, tick_size_=TradeManager.TICK_SIZE):
+        '''
+        Constructor, starting the worker processes
+
+        @workers_ - Number of worker processes
+        @header_ - The attribute list of the stocks (see StockManager.create_stocks_header)
+        @stocks_ - List of stocks
+        @start_method_ - multiprocessing start method, the platform default if it is None
+        @clock_ - The clock the windows are evaluated at (see clock.WallClock and clock.EventClock),
+                  every worker gets a copy of it
+        @tick_size_ - The price of a tick (see TradeManager.set_tick_size)
+        '''
+        self.workers = int(workers_)
+        if self.workers <= 0:
+            raise ShardedEngineException('Non-valid number of workers: {0}'.format(workers_))
+        try:
+            self.tick_size = TickSize(tick_size_) if not isinstance(tick_size_, TickSize) else tick_size_
+        except TickSizeException as error:
+            raise ShardedEngineException(str(error))
+        self.__clock = clock_
+        context = multiprocessing.get_context(start_method_)
+        self.__connections = []
+        self.__processes = []
+        for _ in range(self.workers):
+            connection, child = context.Pipe()
+            process = context.Process(target=_serve, args=(child, list(header_), [list(stock) for stock in stocks_], clock_,
+                                                           self.tick_size), daemon=True)
+            process.start()
+            child.close()
+            self.__connections.append(connection)
+            self.__processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args_):
+        self.close()
+
+    def close(self):
+        '''
+        Stopping the worker processes
+        '''
+        for connection, process in zip(self.__connections, self.__processes):
+            try:
+                connection.send(('stop',))
+            except (OSError, ValueError):
+                pass
+            process.join()
+            connection.close()
+        self.__connections = []
+        self.__processes = []
+
+    def __call(self, calls_):
+        '''
+        Calling TradeManager methods of the workers in parallel
+
+        @calls_ - {worker position: (name of the method, tuple of arguments)}
+
+        @return - {worker position: result}
+        '''
+        if not self.__connections:
+            raise ShardedEngineException('The engine is closed')
+        for i, (name, args) in calls_.items():
+            self.__connections[i].send(('call', name, args))
+        results, error = {}, None
+        for i in calls_:
+            succeeded, result = self.__connections[i].recv()
+            if succeeded:
+                results[i] = result
+            elif error is None:
+                error = result
+        if error is not None:
+            if isinstance(error, TradeManagerException):
+                raise error
+            raise ShardedEngineException('Worker failed: {0!r}'.format(error))
+        return results
+
+    def __broadcast(self, name_, *args_):
+        return self.__call({i: (name_, args_) for i in range(self.workers)})
+
+    def shard_of(self, stock_symbol_):
+        '''
+        @return - Position of the worker owning the stock
+        '''
+        return _shard_of(stock_symbol_, self.workers)
+
+    def __len__(self):
+        return sum(self.__broadcast('__len__').values())
+
+    def now(self):
+        '''
+        @return - The current time of the clock, the latest event time of the workers for an event clock
+        '''
+        if isinstance(self.__clock, EventClock):
+            return max(self.__broadcast('now').values())
+        return self.__clock.now()
+
+    def add(self, trade_):
+        '''
+        Adding a trade to the worker of its stock
+
+        @trade_ - Trade
+        '''
+        self.__call({self.shard_of(trade_.symbol): ('add', (trade_,))})
+
+    def add_many(self, stock_symbols_, timestamps_=None, quantities_=None, buy_or_sells_=None, trade_prices_=None):
+        '''
+        Adding a batch of trades, the batch is split by the workers of the stocks.
+        Arguments as at TradeManager.add_many.
+
+        @return - Positions of the rejected trades in the batch
+        '''
+        if timestamps_ is None:
+            rows = list(stock_symbols_)
+            if not rows:
+                return np.empty(0, dtype=np.int64)
+            try:
+                stock_symbols_, timestamps_, quantities_, buy_or_sells_, trade_prices_ = zip(*rows)
+            except ValueError as error:
+                raise TradeManagerException('Invalid trades: {0}'.format(error))
+
+        unique_symbols, inverse = np.unique(np.asarray(stock_symbols_).astype(str), return_inverse=True)
+        shards = np.array([self.shard_of(symbol) for symbol in unique_symbols.tolist()], dtype=np.int64)[inverse]
+        columns = (stock_symbols_, timestamps_, quantities_, buy_or_sells_, trade_prices_)
+
+        positions, calls = {}, {}
+        for i in np.unique(shards).tolist():
+            rows = np.flatnonzero(shards == i)
+            positions[i] = rows
+            calls[i] = ('add_many', tuple(_take(column, rows) for column in columns))
+        rejected = [positions[i][result] for i, result in self.__call(calls).items()]
+        return np.sort(np.concatenate(rejected)) if rejected else np.empty(0, dtype=np.int64)
+
+    def register_window(self, interval_):
+        '''
+        Registering a window length in every worker (see at TradeManager.register_window)
+        '''
+        self.__broadcast('register_window', interval_)
+
+    def volume_weighted_stock_price(self, interval_, stock_symbol_=None):
+        '''
+        VWSP of the last interval_ seconds combined from the sums of the workers
+
+        @interval_ - Length of the time window in seconds
+        @stock_symbol_ - Symbol of the given stock, all stocks are used if it is None
+        '''
+        now = self.now()
+        if stock_symbol_ is None:
+            results = self.__broadcast('turnover_and_volume', interval_, None, now).values()
+        else:
+            results = self.__call({self.shard_of(stock_symbol_): ('turnover_and_volume', (interval_, stock_symbol_, now))}).values()
+        turnover = sum(result[0] for result in results)
+        volume = sum(result[1] for result in results)
+        return self.tick_size.vwap(turnover, volume)
+
+    def price_statistics(self, interval_, stock_symbol_, quantiles_=(0.5, 0.95)):
+        '''
+        Price statistics of a stock from its worker (see at TradeManager.price_statistics)
+        '''
+        shard = self.shard_of(stock_symbol_)
+        return self.__call({shard: ('price_statistics', (interval_, stock_symbol_, quantiles_))})[shard]
+
+    def gbce_all_share_index(self, mode_=AllShareIndex.SESSION, interval_=None):
+        '''
+        GBCE All Share Index combined from the per stock partial sums of the workers
+
+        @mode_ - See at TradeManager.gbce_all_share_index
+        @interval_ - Length of the time window in seconds, only for WINDOW mode
+        '''
+        log_turnovers, volumes = [], []
+        for log_turnover, volume in self.__broadcast('gbce_partials', mode_, interval_, self.now()).values():
+            log_turnovers.extend(log_turnover)
+            volumes.extend(volume)
+        return self.tick_size.scale(AllShareIndex.combine(log_turnovers, volumes))
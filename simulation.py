@@ -4,11 +4,17 @@ Created on 13 May 2018
 @author: agocsi
 '''
 
-from pandas import Timestamp, Timedelta, date_range
-from random import randint
-from stocks import StockManager, StockManagerException, StockException
+import numpy as np
+from clock import WALL_CLOCK
+from stocks import StockManager
 from trades import Trade, TradeManager
 
+
+class SimulationException(Exception):
+    def __init__(self, message_):
+        super(SimulationException, self).__init__(message_)
+
+
 # stock's header
 HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
 
@@ -24,25 +30,80 @@ NUMBER_OF_TRADES = 1000
 QUANTITY_INTERVAL = (1000, 2000)
 TRADE_PRICE_INTERVAL = (500, 1000)
 
-_stock_manager = StockManager()
-_stock_manager.create_stocks_header(HEADER, STOCKS)
+# time between the trades in milliseconds
+TRADE_PERIOD = 200
+# maximum delay (in seconds) of an out of order trade
+MAX_DELAY = 5
 
-BEGINING_OF_TRADES = Timestamp.now()-Timedelta(seconds=SHIFT)
 
-def generate_trades():
+def create_stocks():
     '''
-    Generator of trades (attributes of trades)
+    Creating the simulation stocks (STOCKS) in the StockManager
     '''
-    number_of_stocks = len(_stock_manager)
-    list_of_stock_symbol = list(_stock_manager.keys())
+    StockManager().create_stocks_header(HEADER, STOCKS)
+
+
+def synthetic_stocks(number_of_stocks_):
+    '''
+    Stocks S00000, S00001, ... in the format of HEADER, every 10th is preferred
+    '''
+    return [['S{0:05d}'.format(i), 'Preferred' if i % 10 == 9 else 'Common', 1 + i % 30, 
+             0.02 if i % 10 == 9 else '', 100] for i in range(number_of_stocks_)]
+
+
+def generate_columns(number_of_trades_=NUMBER_OF_TRADES, symbols_=None, skew_=0.0, out_of_order_=0.0, 
+                     seed_=None, begining_=None, quantity_interval_=QUANTITY_INTERVAL, 
+                     trade_price_interval_=TRADE_PRICE_INTERVAL, trade_period_=TRADE_PERIOD):
+    '''
+    Vectorised generator of a synthetic trade feed
+    
+    @number_of_trades_ - Number of trades
+    @symbols_ - Symbols of the traded stocks, the stocks of the StockManager by default
+    @skew_ - Zipf exponent of the popularity of the stocks, 0 is uniform
+    @out_of_order_ - Ratio of the trades arriving late (by at most MAX_DELAY seconds)
+    @seed_ - Seed of the random generator
+    @begining_ - Time of the first trade (nanoseconds since epoch or a value pandas.Timestamp 
+                 accepts), SHIFT seconds before the current time by default
+    @quantity_interval_ - (minimum, maximum) of the quantities
+    @trade_price_interval_ - (minimum, maximum) of the trade prices
+    @trade_period_ - Time between the trades in milliseconds
+    
+    @return - (symbols, timestamps as nanoseconds since epoch, quantities, buy_or_sells, trade_prices) 
+              NumPy arrays in the order of arrival
+    '''
+    rng = np.random.default_rng(seed_)
+    symbols = np.array(list(StockManager().keys()) if symbols_ is None else list(symbols_))
+    if len(symbols) == 0 or not 0 <= out_of_order_ <= 1:
+        raise SimulationException('Non-valid feed parameters')
+    popularity = 1.0 / np.arange(1, len(symbols) + 1) ** skew_
     
-    list_of_stocks = [list_of_stock_symbol[randint(0, number_of_stocks-1)] for x in range(0, NUMBER_OF_TRADES)]
-    list_of_quantities = [randint(QUANTITY_INTERVAL[0], QUANTITY_INTERVAL[1]) for x in range(0, NUMBER_OF_TRADES)]
-    list_of_buys_or_sells = [randint(0,1) for x in range(0, NUMBER_OF_TRADES)]
-    list_of_trade_prices = [randint(TRADE_PRICE_INTERVAL[0], TRADE_PRICE_INTERVAL[1]) for x in range(0, NUMBER_OF_TRADES)]
-    list_of_timestamps = date_range(BEGINING_OF_TRADES, periods=NUMBER_OF_TRADES, freq='200L')
+    if begining_ is None:
+        begining = WALL_CLOCK.now() - SHIFT * 10**9
+    elif isinstance(begining_, (int, np.integer)):
+        begining = int(begining_)
+    else:
+        from pandas import Timestamp
+        begining = Timestamp(begining_).value
+    timestamps = begining + np.arange(number_of_trades_, dtype=np.int64) * int(trade_period_ * 10**6)
+    late = rng.random(number_of_trades_) < out_of_order_
+    timestamps[late] -= rng.integers(0, MAX_DELAY * 10**9, int(late.sum()))
     
-    return zip(list_of_stocks, list_of_timestamps, list_of_quantities, list_of_buys_or_sells, list_of_trade_prices)
+    return (symbols[rng.choice(len(symbols), number_of_trades_, p=popularity / popularity.sum())],
+            timestamps,
+            rng.integers(quantity_interval_[0], quantity_interval_[1] + 1, number_of_trades_),
+            rng.integers(0, 2, number_of_trades_).astype(bool),
+            rng.integers(trade_price_interval_[0], trade_price_interval_[1] + 1, number_of_trades_))
+
+
+def generate_trades(number_of_trades_=NUMBER_OF_TRADES, symbols_=None, skew_=0.0, out_of_order_=0.0, seed_=None):
+    '''
+    Generator of trades (attributes of trades), see at generate_columns
+    '''
+    from pandas import to_datetime
+    symbols, timestamps, quantities, buy_or_sells, trade_prices = generate_columns(
+        number_of_trades_, symbols_, skew_, out_of_order_, seed_)
+    return zip(symbols.tolist(), to_datetime(timestamps), quantities.tolist(), 
+               buy_or_sells.astype(int).tolist(), trade_prices.tolist())
 
 
 def simulation():
@@ -52,12 +113,15 @@ def simulation():
      - last 15 secs trades - Valume Weighted Stock Price
      - all trades - GBCE ALL Share Index
     '''
+    stock_manager = StockManager()
+    if not len(stock_manager):
+        create_stocks()
     trade_manager = TradeManager()
     list_of_trades = generate_trades()
     
     for trade in list_of_trades:
         print('TRADE: {0}'.format(trade))
-        stock = _stock_manager[trade[0]]
+        stock = stock_manager[trade[0]]
         print('STOCKS -- SYMBOL: {0}, MARKET PRICE: {1}, DIVIDEND YEALD: {2}, P/E RATIO: {3}'. format(trade[0], trade[4], stock.dividend_yield(trade[4]), 
                                                                                                       stock.pe_ratio(trade[4])))
         trade_manager.add(Trade(*trade))
@@ -0,0 +1,365 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+from math import ceil, log, sqrt
+from random import getrandbits
+
+import numpy as np
+
+
+class SketchException(Exception):
+    def __init__(self, message_):
+        super(SketchException, self).__init__(message_)
+
+
+class QuantileSketch(object):
+    '''
+    KLL quantile sketch (Karnin, Lang, Liberty: Optimal Quantile Approximation
+    in Streams, 2016) of bounded memory.
+
+    The values are kept in compactors of increasing weight, a value of level h
+    stands for 2**h values of the stream. A full compactor is sorted and every
+    second value of it (from a random offset) is promoted to the next level.
+    The capacities of the levels shrink by 2/3 from the top level downwards, so
+    at most about 3 * k_ values are kept, however long the stream is.
+
+    The rank error of a quantile is below about 1.7 / k_ with 99% probability
+    (with k_ = 200 the median estimate is between the exact 49.2% and 50.8%
+    quantiles). Merging sketches does not worsen the bound, so the sketches of
+    time buckets or of shards can be combined.
+    '''
+
+    __slots__ = ('k', 'count', 'min', 'max', '__levels', '__size', '__max_size')
+
+    SHRINK = 2 / 3
+
+    def __init__(self, k_=200):
+        '''
+        Constructor
+
+        @k_ - Capacity of the top level, the accuracy of the sketch
+        '''
+        if int(k_) < 8:
+            raise SketchException('Non-valid k: {0}'.format(k_))
+        self.k = int(k_)
+        self.count = 0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.__levels = [[]]
+        self.__size = 0
+        self.__max_size = self.__capacity(0)
+
+    def __len__(self):
+        '''
+        @return - Number of the values kept
+        '''
+        return self.__size
+
+    def __capacity(self, level_):
+        return max(2, int(ceil(self.k * self.SHRINK ** (len(self.__levels) - level_ - 1))))
+
+    def __grow(self):
+        self.__levels.append([])
+        self.__max_size = sum(self.__capacity(level) for level in range(len(self.__levels)))
+
+    def __compress(self):
+        '''
+        Compacting the full levels from the bottom until the sketch fits its capacity
+        '''
+        while self.__size >= self.__max_size:
+            for level, values in enumerate(self.__levels):
+                if len(values) < self.__capacity(level):
+                    continue
+                if level + 1 == len(self.__levels):
+                    self.__grow()
+                values.sort()
+                # an odd value out stays at its level
+                odd = len(values) % 2
+                promoted = values[odd + getrandbits(1)::2]
+                self.__levels[level + 1].extend(promoted)
+                self.__size -= len(values) - odd - len(promoted)
+                del values[odd:]
+                if self.__size < self.__max_size:
+                    break
+
+    def update(self, value_):
+        value = float(value_)
+        self.__levels[0].append(value)
+        self.count += 1
+        self.__size += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if self.__size >= self.__max_size:
+            self.__compress()
+
+    def update_many(self, values_):
+        '''
+        @values_ - Array of values
+        '''
+        values = np.asarray(values_, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self.__levels[0].extend(values.tolist())
+        self.count += len(values)
+        self.__size += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.__compress()
+
+    def merge(self, other_):
+        '''
+        Adding the values of another sketch to the sketch
+        '''
+        while len(self.__levels) < len(other_.__levels):
+            self.__grow()
+        for level, values in enumerate(other_.__levels):
+            self.__levels[level].extend(values)
+        self.count += other_.count
+        self.__size += other_.__size
+        self.min = min(self.min, other_.min)
+        self.max = max(self.max, other_.max)
+        self.__compress()
+
+    def quantile(self, quantile_):
+        '''
+        @quantile_ - Between 0 and 1
+
+        @return - Estimate of the quantile, the exact minimum and maximum for 0 and 1, nan without values
+        '''
+        if not 0 <= quantile_ <= 1:
+            raise SketchException('Non-valid quantile: {0}'.format(quantile_))
+        if self.count == 0:
+            return float('nan')
+        if quantile_ == 0:
+            return self.min
+        if quantile_ == 1:
+            return self.max
+        values = np.concatenate([np.asarray(values, dtype=np.float64) for values in self.__levels])
+        weights = np.concatenate([np.full(len(values), 1 << level, dtype=np.int64)
+                                  for level, values in enumerate(self.__levels)])
+        order = np.argsort(values, kind='stable')
+        ranks = np.cumsum(weights[order])
+        return float(values[order][min(int(np.searchsorted(ranks, quantile_ * self.count)), len(ranks) - 1)])
+
+
+class Moments(object):
+    '''
+    Count, mean and variance of a stream, updated by Welford's algorithm and
+    combined by the pairwise formula of Chan, Golub and LeVeque, so batches,
+    time buckets and shards merge without the cancellation of summing squares.
+    '''
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self, count_=0, mean_=0.0, m2_=0.0):
+        '''
+        Constructor
+
+        @count_ - Number of values
+        @mean_ - Mean of the values
+        @m2_ - Sum of the squared deviations from the mean
+        '''
+        self.count = count_
+        self.mean = mean_
+        self.m2 = m2_
+
+    def update(self, value_):
+        self.count += 1
+        delta = value_ - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value_ - self.mean)
+
+    def update_many(self, values_):
+        '''
+        @values_ - Array of values
+        '''
+        values = np.asarray(values_, dtype=np.float64)
+        if len(values):
+            mean = float(values.mean())
+            self.merge(Moments(len(values), mean, float(np.square(values - mean).sum())))
+
+    def merge(self, other_):
+        count = self.count + other_.count
+        if other_.count == 0:
+            return
+        delta = other_.mean - self.mean
+        self.mean += delta * other_.count / count
+        self.m2 += other_.m2 + delta * delta * self.count * other_.count / count
+        self.count = count
+
+    def variance(self):
+        '''
+        @return - Sample variance, 0.0 for less than 2 values
+        '''
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        return sqrt(self.variance())
+
+
+class _Bucket(object):
+    '''
+    Sketches of the trades of a stock in a time bucket
+    '''
+
+    __slots__ = ('prices', 'quantities', 'returns')
+
+    def __init__(self, k_):
+        self.prices = QuantileSketch(k_)
+        self.quantities = QuantileSketch(k_)
+        # log returns of the trades against the previous trade of the stock
+        self.returns = Moments()
+
+
+class _StockStatistics(object):
+    __slots__ = ('buckets', 'log_price', 'latest')
+
+    def __init__(self):
+        self.buckets = {}
+        self.log_price = None
+        self.latest = None
+
+
+class PriceStatistics(object):
+    '''
+    Streaming price statistics of every stock in time buckets: quantile sketches
+    of the trade prices and of the quantities, and the moments of the log returns
+    between consecutive trades (in the order they are added).
+
+    The statistics of a time range are merged from its buckets, so the range is
+    rounded out to whole buckets. The buckets older than the horizon compared to
+    the latest trade of the stock are dropped, so the memory of a stock is bounded
+    by horizon_ / bucket_ buckets of about 6 * k_ values.
+    '''
+
+    def __init__(self, bucket_=60, horizon_=3600, k_=200):
+        '''
+        Constructor
+
+        @bucket_ - Length of a bucket in seconds
+        @horizon_ - Length of the history kept in seconds
+        @k_ - Accuracy of the quantile sketches (see QuantileSketch)
+        '''
+        try:
+            bucket, horizon = int(bucket_), int(horizon_)
+        except (TypeError, ValueError) as error:
+            raise SketchException('Non-valid bucket or horizon: {0}'.format(error))
+        if bucket <= 0 or horizon < bucket:
+            raise SketchException('Non-valid bucket or horizon: {0}, {1}'.format(bucket_, horizon_))
+        QuantileSketch(k_)
+        self.bucket = bucket
+        self.horizon = horizon
+        self.__bucket_ns = bucket * 10**9
+        self.__horizon_ns = horizon * 10**9
+        self.__k = k_
+        self.__stocks = {}
+
+    def __stock(self, symbol_):
+        try:
+            return self.__stocks[symbol_]
+        except KeyError:
+            self.__stocks[symbol_] = _StockStatistics()
+            return self.__stocks[symbol_]
+
+    def __bucket(self, stock_, start_):
+        try:
+            return stock_.buckets[start_]
+        except KeyError:
+            stock_.buckets[start_] = _Bucket(self.__k)
+            return stock_.buckets[start_]
+
+    def __evict(self, stock_, latest_):
+        '''
+        Dropping the buckets which ended before the horizon
+        '''
+        if stock_.latest is not None and latest_ <= stock_.latest:
+            return
+        stock_.latest = latest_
+        since = latest_ - self.__horizon_ns - self.__bucket_ns
+        for start in [start for start in stock_.buckets if start <= since]:
+            del stock_.buckets[start]
+
+    def add(self, symbol_, timestamp_, quantity_, trade_price_):
+        '''
+        Adding a trade to the statistics of its stock
+
+        @symbol_ - Symbol of the stock
+        @timestamp_ - Nanoseconds since epoch
+        @quantity_ - Quantity of the stock
+        @trade_price_ - The price of the stock
+        '''
+        stock = self.__stock(symbol_)
+        start = timestamp_ - timestamp_ % self.__bucket_ns
+        if stock.latest is not None and start <= stock.latest - self.__horizon_ns - self.__bucket_ns:
+            return
+        bucket = self.__bucket(stock, start)
+        bucket.prices.update(trade_price_)
+        bucket.quantities.update(quantity_)
+        log_price = log(trade_price_)
+        if stock.log_price is not None:
+            bucket.returns.update(log_price - stock.log_price)
+        stock.log_price = log_price
+        self.__evict(stock, timestamp_)
+
+    def add_many(self, symbol_, timestamps_, quantities_, trade_prices_):
+        '''
+        Adding a batch of trades of a stock, in the order they are given
+
+        @symbol_ - Symbol of the stock
+        @timestamps_ - int64 array, nanoseconds since epoch
+        @quantities_ - int64 array
+        @trade_prices_ - int64 array
+        '''
+        if len(timestamps_) == 0:
+            return
+        stock = self.__stock(symbol_)
+        latest = int(timestamps_.max())
+        starts = timestamps_ - timestamps_ % self.__bucket_ns
+        log_prices = np.log(trade_prices_)
+        returns = np.diff(log_prices, prepend=np.nan if stock.log_price is None else stock.log_price)
+        # the buckets ended before the horizon are not filled at all
+        live = starts > latest - self.__horizon_ns - self.__bucket_ns
+        unique_starts, inverse = np.unique(starts[live], return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(unique_starts)))
+        quantities, trade_prices, returns = quantities_[live][order], trade_prices_[live][order], returns[live][order]
+        first = 0
+        for start, last in zip(unique_starts.tolist(), bounds.tolist()):
+            bucket = self.__bucket(stock, start)
+            bucket.prices.update_many(trade_prices[first:last])
+            bucket.quantities.update_many(quantities[first:last])
+            bucket_returns = returns[first:last]
+            bucket.returns.update_many(bucket_returns[~np.isnan(bucket_returns)])
+            first = last
+        stock.log_price = float(log_prices[-1])
+        self.__evict(stock, latest)
+
+    def statistics(self, symbol_, start_, end_):
+        '''
+        Statistics of a stock merged from the buckets overlapping a time range
+
+        @symbol_ - Symbol of the stock
+        @start_ - Nanoseconds since epoch, inclusive
+        @end_ - Nanoseconds since epoch, exclusive
+
+        @return - (QuantileSketch of the prices, QuantileSketch of the quantities, Moments of the log returns)
+        '''
+        prices, quantities, returns = QuantileSketch(self.__k), QuantileSketch(self.__k), Moments()
+        stock = self.__stocks.get(symbol_)
+        if stock is not None:
+            first = start_ - start_ % self.__bucket_ns
+            for start in sorted(stock.buckets):
+                if first <= start < end_:
+                    bucket = stock.buckets[start]
+                    prices.merge(bucket.prices)
+                    quantities.merge(bucket.quantities)
+                    returns.merge(bucket.returns)
+        return prices, quantities, returns
+
+    def clear(self):
+        self.__stocks = {}
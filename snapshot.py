@@ -0,0 +1,204 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+import json
+import os
+import zipfile
+
+import numpy as np
+
+
+class SnapshotException(Exception):
+    def __init__(self, message_):
+        super(SnapshotException, self).__init__(message_)
+
+
+NPZ = 'npz'
+PARQUET = 'parquet'
+
+FORMATS = (NPZ, PARQUET)
+
+# trade columns of a snapshot, the symbols are dictionary encoded in symbol_id,
+# the prices are in ticks of the tick size of the snapshot
+COLUMNS = (('timestamp', np.int64),
+           ('symbol_id', np.int32),
+           ('quantity', np.int64),
+           ('buy_or_sell', np.bool_),
+           ('trade_price', np.int64))
+
+# rows of a chunk
+CHUNK_SIZE = 1 << 20
+
+
+def _format_of(path_, format_=None):
+    '''
+    @return - The format given or the one of the extension of the path
+    '''
+    if format_ is None:
+        format_ = os.path.splitext(str(path_))[1].lstrip('.').lower()
+    if format_ not in FORMATS:
+        raise SnapshotException('Unknown snapshot format: {0}'.format(format_))
+    return format_
+
+
+def _pyarrow():
+    '''
+    pyarrow is needed only for the Parquet format
+    '''
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SnapshotException('The Parquet format needs pyarrow')
+    return pyarrow, pyarrow.parquet
+
+
+def write(path_, chunks_, symbols_, stocks_, format_=None, tick_size_=1):
+    '''
+    Writing a snapshot chunk by chunk, so only a single chunk is in memory
+
+    @path_ - Path of the snapshot
+    @chunks_ - Iterable of dicts of the COLUMNS arrays
+    @symbols_ - The symbol table, symbol_id i is symbols_[i]
+    @stocks_ - Reference data: (header, list of stocks) as StockManager.stocks_header gives back
+    @format_ - NPZ or PARQUET, by the extension of the path if it is None
+    @tick_size_ - The price of a tick of the trade_price column (see ticks.TickSize)
+
+    @return - Number of the written trades
+    '''
+    format_ = _format_of(path_, format_)
+    header, stocks = stocks_
+    reference = json.dumps({'symbols': list(symbols_), 'header': list(header), 'stocks': [list(stock) for stock in stocks],
+                            'tick_size': str(tick_size_)})
+    if format_ == NPZ:
+        return _write_npz(path_, chunks_, reference)
+    return _write_parquet(path_, chunks_, symbols_, reference)
+
+
+def _write_npz(path_, chunks_, reference_):
+    '''
+    Every column of every chunk is a separate .npy member of the archive
+    '''
+    def write_array(archive_, name_, array_):
+        with archive_.open(name_ + '.npy', 'w', force_zip64=True) as member:
+            np.lib.format.write_array(member, np.asanyarray(array_), allow_pickle=False)
+
+    count = 0
+    with zipfile.ZipFile(path_, 'w', zipfile.ZIP_STORED) as archive:
+        write_array(archive, 'reference', np.array(reference_))
+        chunk = -1
+        for chunk, columns in enumerate(chunks_):
+            for name, dtype in COLUMNS:
+                write_array(archive, '{0}_{1}'.format(name, chunk), np.asarray(columns[name], dtype=dtype))
+            count += len(columns['timestamp'])
+        write_array(archive, 'chunks', np.array(chunk + 1))
+    return count
+
+
+def _write_parquet(path_, chunks_, symbols_, reference_):
+    '''
+    Every chunk is a row group, the symbols are a dictionary column and the
+    reference data is kept in the metadata of the schema
+    '''
+    pa, pq = _pyarrow()
+    dictionary = pa.array(list(symbols_), type=pa.string())
+    schema = pa.schema([('timestamp', pa.int64()),
+                        ('stock_symbol', pa.dictionary(pa.int32(), pa.string())),
+                        ('quantity', pa.int64()),
+                        ('buy_or_sell', pa.bool_()),
+                        ('trade_price', pa.int64())], metadata={b'reference': reference_.encode()})
+    count = 0
+    with pq.ParquetWriter(path_, schema) as writer:
+        for columns in chunks_:
+            symbol_ids = pa.array(np.asarray(columns['symbol_id'], dtype=np.int32))
+            writer.write_table(pa.Table.from_arrays([pa.array(np.asarray(columns['timestamp'], dtype=np.int64)),
+                                                     pa.DictionaryArray.from_arrays(symbol_ids, dictionary),
+                                                     pa.array(np.asarray(columns['quantity'], dtype=np.int64)),
+                                                     pa.array(np.asarray(columns['buy_or_sell'], dtype=np.bool_)),
+                                                     pa.array(np.asarray(columns['trade_price'], dtype=np.int64))],
+                                                    schema=schema))
+            count += len(columns['timestamp'])
+    return count
+
+
+def _reference(path_, format_):
+    '''
+    @return - The reference data of the snapshot as a dict
+    '''
+    format_ = _format_of(path_, format_)
+    try:
+        if format_ == NPZ:
+            with np.load(path_, allow_pickle=False) as archive:
+                reference = str(archive['reference'])
+        else:
+            _, pq = _pyarrow()
+            reference = pq.read_schema(path_).metadata[b'reference'].decode()
+        return json.loads(reference)
+    except (OSError, KeyError, ValueError, TypeError) as error:
+        raise SnapshotException('Invalid snapshot {0}: {1}'.format(path_, error))
+
+
+def read_reference(path_, format_=None):
+    '''
+    @path_ - Path of the snapshot
+    @format_ - NPZ or PARQUET, by the extension of the path if it is None
+
+    @return - (symbol table, (header, list of stocks))
+    '''
+    reference = _reference(path_, format_)
+    try:
+        return reference['symbols'], (reference['header'], reference['stocks'])
+    except (KeyError, TypeError) as error:
+        raise SnapshotException('Invalid snapshot {0}: {1}'.format(path_, error))
+
+
+def read_tick_size(path_, format_=None):
+    '''
+    @path_ - Path of the snapshot
+    @format_ - NPZ or PARQUET, by the extension of the path if it is None
+
+    @return - The tick size of the prices as a string, '1' for a snapshot written without it
+    '''
+    reference = _reference(path_, format_)
+    try:
+        return str(reference.get('tick_size', '1'))
+    except AttributeError as error:
+        raise SnapshotException('Invalid snapshot {0}: {1}'.format(path_, error))
+
+
+def read_chunks(path_, format_=None, chunk_size_=CHUNK_SIZE):
+    '''
+    Reading the trades of a snapshot chunk by chunk, so files larger than the
+    memory can be processed
+
+    @path_ - Path of the snapshot
+    @format_ - NPZ or PARQUET, by the extension of the path if it is None
+    @chunk_size_ - Rows of a chunk of the Parquet format (NPZ gives back the written chunks)
+
+    @return - Generator of dicts of the COLUMNS arrays
+    '''
+    format_ = _format_of(path_, format_)
+    try:
+        if format_ == NPZ:
+            with np.load(path_, allow_pickle=False) as archive:
+                for chunk in range(int(archive['chunks'])):
+                    yield {name: archive['{0}_{1}'.format(name, chunk)] for name, _ in COLUMNS}
+        else:
+            pa, pq = _pyarrow()
+            symbol_ids = {symbol: i for i, symbol in enumerate(read_reference(path_, format_)[0])}
+            for batch in pq.ParquetFile(path_).iter_batches(batch_size=chunk_size_):
+                # the dictionary of a batch is not necessarily the written symbol table
+                symbols = batch.column('stock_symbol')
+                if not pa.types.is_dictionary(symbols.type):
+                    symbols = symbols.dictionary_encode()
+                lookup = np.array([symbol_ids[symbol] for symbol in symbols.dictionary.to_pylist()], dtype=np.int32)
+                yield {'timestamp': batch.column('timestamp').to_numpy(),
+                       'symbol_id': lookup[symbols.indices.to_numpy(zero_copy_only=False)],
+                       'quantity': batch.column('quantity').to_numpy(),
+                       'buy_or_sell': batch.column('buy_or_sell').to_numpy(zero_copy_only=False),
+                       'trade_price': batch.column('trade_price').to_numpy()}
+    except (OSError, KeyError, ValueError) as error:
+        raise SnapshotException('Invalid snapshot {0}: {1}'.format(path_, error))
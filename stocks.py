@@ -5,7 +5,9 @@ Created on 10 May 2018
 '''
 
 from abc import ABC, ABCMeta, abstractmethod
-from collections import MutableMapping
+from collections.abc import Mapping, MutableMapping
+import csv
+import numpy as np
 
 
 class StockException(Exception):
@@ -17,6 +19,27 @@ class StockManagerException(Exception):
         super(StockManagerException, self).__init__(message_)
 
 
+def _to_float64(values_):
+    '''
+    @values_ - Array of strings
+
+    @return - (float64 array, mask of the valid values), non-valid values are 0
+    '''
+    try:
+        numbers = values_.astype(np.float64)
+        return numbers, np.isfinite(numbers)
+    except ValueError:
+        numbers = np.zeros(len(values_), dtype=np.float64)
+        for i, value in enumerate(values_.tolist()):
+            try:
+                numbers[i] = float(value)
+            except ValueError:
+                numbers[i] = np.nan
+        valid = np.isfinite(numbers)
+        numbers[~valid] = 0
+        return numbers, valid
+
+
 class Stock(ABC):
     '''
     Abstract class for stocks
@@ -39,9 +62,9 @@ class Stock(ABC):
         '''
         P/E ratio : $\frac{Market Price}{Dividend}$
         
-        @market_price_ - The current value of the given stock
+        @market_price_ - The current value of the given stock (a number or a numeric string)
         '''
-        return int(market_price_) / self.last_dividend if self.last_dividend != 0 else 0
+        return float(market_price_) / self.last_dividend if self.last_dividend != 0 else 0
     
     @abstractmethod
     def dividend_yield(self, market_price_):
@@ -49,7 +72,7 @@ class Stock(ABC):
         Abstract function of Stock class
         Because there are two different stock type, namely, common and preferred.
         
-        @market_price_ - The current price of the given stock
+        @market_price_ - The current price of the given stock (a number or a numeric string)
         '''
         
         raise StockException('Abstract function of Stock Abstract class')
@@ -77,7 +100,8 @@ class PreferredStock(Stock):
         
         The used formula is \frac{fixed dividend * par value}{market price}
         '''
-        return self.fixed_dividend * self.par_value / market_price_ if market_price_ != 0 else 0
+        market_price = float(market_price_)
+        return self.fixed_dividend * self.par_value / market_price if market_price != 0 else 0
 
 class CommonStock(Stock):
     '''
@@ -99,7 +123,8 @@ class CommonStock(Stock):
         
         The used formula is \frac{last dividend}{market price}
         '''
-        return (self.last_dividend / market_price_) if market_price_ != 0 else 0
+        market_price = float(market_price_)
+        return (self.last_dividend / market_price) if market_price != 0 else 0
 
 class _SingletonStockManager(type):
     '''
@@ -113,6 +138,12 @@ class _SingletonStockManager(type):
             cls._instance = super(_SingletonStockManager, cls).__call__()
         return cls._instance 
     
+    def new_instance(cls):
+        '''
+        An independent Stock Manager besides the singleton, e.g. the stock universe of an Engine
+        '''
+        return super(_SingletonStockManager, cls).__call__()
+    
 class _CombinedSingletonStockManager(ABCMeta, _SingletonStockManager):
     '''
     Because Stock Manager is a subclass of MutableMapping Abstract Class and MutableMapping's meta class
@@ -125,8 +156,12 @@ class StockManager(MutableMapping, metaclass=_CombinedSingletonStockManager):
     Stock Manager class.
     1) Subclass of MutableMapping
     2) Meta classes: ABCMeta and _SingletonStockManager
-    3) Singleton
+    3) Singleton by default, StockManager.new_instance() gives back an independent one
     '''
+    
+    # attribute list of the stocks given back by stocks_header
+    HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+    
     def __init__(self):
         '''
         Constructor for initialisation
@@ -135,6 +170,7 @@ class StockManager(MutableMapping, metaclass=_CombinedSingletonStockManager):
         self.__type = {'Common' : CommonStock,
             'Preferred' : PreferredStock,
         }
+        self.__packed = None
     
     def __iter__(self):
         '''
@@ -160,12 +196,16 @@ class StockManager(MutableMapping, metaclass=_CombinedSingletonStockManager):
         '''
         return self.__stocks[key]
     
+    def __contains__(self, key):
+        return key in self.__stocks
+    
     def __setitem__(self, key, value):
         '''
         Inherited abstract function - setter
         '''
         if isinstance(value, Stock):
             self.__stocks[key] = value
+            self.__packed = None
         else:
             raise StockManager('Invalid Value')
             
@@ -174,16 +214,22 @@ class StockManager(MutableMapping, metaclass=_CombinedSingletonStockManager):
         Inherited abstract function - delete
         '''
         del self.__stocks[key]
+        self.__packed = None
     
     
     def create_stocks(self, type_, **kwargs):
         '''
         Generate single stock
         
-        @type_ - Type of the stock (Common or Preferred)
+        @type_ - Type of the stock (Common or Preferred, case insensitive)
         @kwargs - Attributes of the given stock
         '''
-        self.__stocks[kwargs['symbol_']] = self.__type[type_](**kwargs)
+        try:
+            stock_type = self.__type[str(type_).capitalize()]
+        except KeyError:
+            raise StockManagerException('Unknown type: {0}'.format(type_))
+        self.__stocks[kwargs['symbol_']] = stock_type(**kwargs)
+        self.__packed = None
     
         
     def create_stocks_header(self, header, stocks):
@@ -197,6 +243,157 @@ class StockManager(MutableMapping, metaclass=_CombinedSingletonStockManager):
             input = dict(filter(lambda x: x[1] != '', zip(header, stock)))
             self.create_stocks(input.pop('type'), **input)
     
+    def load_csv(self, file_):
+        '''
+        Bulk loading of stocks from a CSV file whose first line is the header
+        (the columns of HEADER in any order).
+        The file is read in a single pass and the columns are validated with
+        vectorised operations. If there is any non-valid row, every non-valid
+        row is reported in the exception and no stock is loaded.
+
+        @file_ - Path or an opened text file
+
+        @return - Number of the loaded stocks
+        '''
+        opened = open(file_, newline='') if isinstance(file_, str) else file_
+        try:
+            reader = csv.reader(opened)
+            header = [name.strip() for name in next(reader, [])]
+            missing = [name for name in self.HEADER if name not in header]
+            if missing:
+                raise StockManagerException('Missing columns: {0}'.format(', '.join(missing)))
+            positions = [header.index(name) for name in self.HEADER]
+            width = max(positions) + 1
+            lines, rows = [], []
+            for row in reader:
+                if row:
+                    lines.append(reader.line_num)
+                    rows.append(row if len(row) >= width else row + [''] * (width - len(row)))
+        finally:
+            if opened is not file_:
+                opened.close()
+        if not rows:
+            return 0
+
+        symbols, types, last_dividends, fixed_dividends, par_values = (np.char.strip(np.array([row[i] for row in rows], dtype=str)) 
+                                                                       for i in positions)
+        types = np.char.capitalize(types)
+        last_dividends, valid_last_dividends = _to_float64(last_dividends)
+        par_values, valid_par_values = _to_float64(par_values)
+        has_fixed_dividend = fixed_dividends != ''
+        fixed_dividends, valid_fixed_dividends = _to_float64(np.where(has_fixed_dividend, fixed_dividends, '0'))
+        preferred = types == 'Preferred'
+        _, first = np.unique(symbols, return_index=True)
+        duplicated = np.ones(len(symbols), dtype=bool)
+        duplicated[first] = False
+
+        checks = ((symbols == '', 'empty symbol'),
+                  (duplicated, 'duplicated symbol'),
+                  (~np.isin(types, list(self.__type)), 'unknown type'),
+                  (~valid_last_dividends | (last_dividends != np.trunc(last_dividends)), 'non-valid last_dividend_'),
+                  (~valid_par_values | (par_values != np.trunc(par_values)), 'non-valid par_value_'),
+                  (preferred & ~(has_fixed_dividend & valid_fixed_dividends), 'non-valid fixed_dividend_'),
+                  (~preferred & has_fixed_dividend, 'fixed_dividend_ of a common stock'))
+        errors = {}
+        for failed, message in checks:
+            for i in np.flatnonzero(failed).tolist():
+                errors.setdefault(i, []).append(message)
+        if errors:
+            raise StockManagerException('Non-valid stocks:\n' + '\n'.join(
+                'line {0}: {1}'.format(lines[i], ', '.join(messages)) for i, messages in sorted(errors.items())))
+
+        for symbol, is_preferred, last_dividend, fixed_dividend, par_value in zip(
+                symbols.tolist(), preferred.tolist(), last_dividends.astype(np.int64).tolist(), 
+                fixed_dividends.tolist(), par_values.astype(np.int64).tolist()):
+            self.__stocks[symbol] = (PreferredStock(symbol, last_dividend, fixed_dividend, par_value) if is_preferred 
+                                     else CommonStock(symbol, last_dividend, par_value))
+        self.__packed = None
+        self.__pack()
+        return len(rows)
+
+    def stocks_header(self):
+        '''
+        The stocks in the format of create_stocks_header
+        
+        @return - (HEADER, list of stocks), fixed_dividend_ is '' for common stocks
+        '''
+        types = {stock_type : name for name, stock_type in self.__type.items()}
+        return list(self.HEADER), [[stock.symbol, types[type(stock)], stock.last_dividend, 
+                                    getattr(stock, 'fixed_dividend', ''), stock.par_value] 
+                                   for stock in self.__stocks.values()]
+    
+    def __pack(self):
+        '''
+        Packed array representation of the stocks, it is rebuilt after the stocks are changed
+        
+        @return - dict of the symbols and the last_dividend, fixed_dividend, par_value 
+                  and preferred (mask) arrays in the order of the symbols
+        '''
+        if self.__packed is None:
+            stocks = list(self.__stocks.values())
+            self.__packed = {
+                'symbols' : tuple(self.__stocks),
+                'index' : {symbol : i for i, symbol in enumerate(self.__stocks)},
+                'last_dividend' : np.array([stock.last_dividend for stock in stocks], dtype=np.float64),
+                'fixed_dividend' : np.array([getattr(stock, 'fixed_dividend', 0.0) for stock in stocks], dtype=np.float64),
+                'par_value' : np.array([stock.par_value for stock in stocks], dtype=np.float64),
+                'preferred' : np.array([isinstance(stock, PreferredStock) for stock in stocks], dtype=bool),
+            }
+        return self.__packed
+    
+    @property
+    def symbols(self):
+        '''
+        The symbols in the order of the arrays given back by the batch functions
+        '''
+        return self.__pack()['symbols']
+    
+    def __batch(self, market_prices_):
+        '''
+        @market_prices_ - Market prices of every stock in the order of symbols, or a symbol -> market price mapping
+        
+        @return - (packed stocks, positions of the priced stocks, market prices as float64 array)
+        '''
+        packed = self.__pack()
+        if isinstance(market_prices_, Mapping):
+            try:
+                positions = np.array([packed['index'][symbol] for symbol in market_prices_], dtype=np.intp)
+            except KeyError as error:
+                raise StockManagerException('Unknown stock: {0}'.format(error))
+            prices = np.array(list(market_prices_.values()), dtype=np.float64)
+        else:
+            prices = np.asarray(market_prices_, dtype=np.float64)
+            if prices.shape != (len(packed['symbols']),):
+                raise StockManagerException('Market price is needed for every stock')
+            positions = slice(None)
+        return packed, positions, prices
+    
+    def dividend_yields(self, market_prices_):
+        '''
+        Dividend yield of many stocks at once, see at CommonStock and PreferredStock
+        
+        @market_prices_ - Market prices of every stock in the order of symbols, or a symbol -> market price mapping
+        
+        @return - float64 array of the dividend yields in the order of the market prices
+        '''
+        packed, positions, prices = self.__batch(market_prices_)
+        dividend = np.where(packed['preferred'][positions], 
+                            packed['fixed_dividend'][positions] * packed['par_value'][positions],
+                            packed['last_dividend'][positions])
+        return np.divide(dividend, prices, out=np.zeros_like(prices), where=prices != 0)
+    
+    def pe_ratios(self, market_prices_):
+        '''
+        P/E ratio of many stocks at once, see at Stock
+        
+        @market_prices_ - Market prices of every stock in the order of symbols, or a symbol -> market price mapping
+        
+        @return - float64 array of the P/E ratios in the order of the market prices
+        '''
+        packed, positions, prices = self.__batch(market_prices_)
+        last_dividend = packed['last_dividend'][positions]
+        return np.divide(prices, last_dividend, out=np.zeros_like(prices), where=last_dividend != 0)
+    
     @classmethod
     def _clear(cls):
         '''
@@ -0,0 +1,439 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+import numpy as np
+
+
+class TradeStoreException(Exception):
+    def __init__(self, message_):
+        super(TradeStoreException, self).__init__(message_)
+
+
+def _grown(array_, size_, capacity_):
+    '''
+    @return - A new array of capacity_ elements beginning with the first size_ elements of array_
+    '''
+    grown = np.empty(capacity_, dtype=array_.dtype)
+    grown[:size_] = array_[:size_]
+    return grown
+
+
+class _SymbolIndex(object):
+    '''
+    Secondary index of the trades of a single stock: the timestamps and the row
+    positions of its trades in the store, both in time order.
+    '''
+
+    def __init__(self, capacity_=16):
+        self.size = 0
+        self.timestamps = np.empty(capacity_, dtype=np.int64)
+        self.positions = np.empty(capacity_, dtype=np.int64)
+
+    def __reserve(self, size_):
+        capacity = len(self.positions)
+        if size_ <= capacity:
+            return
+        while capacity < size_:
+            capacity *= TradeStore.GROWTH_FACTOR
+        self.timestamps = _grown(self.timestamps, self.size, capacity)
+        self.positions = _grown(self.positions, self.size, capacity)
+
+    def shift(self, position_, count_=1):
+        '''
+        Rows from position_ are moved by count_ in the store
+        '''
+        start = int(np.searchsorted(self.positions[:self.size], position_))
+        self.positions[start:self.size] += count_
+
+    def insert(self, timestamp_, position_):
+        self.__reserve(self.size + 1)
+        i = int(np.searchsorted(self.positions[:self.size], position_))
+        self.timestamps[i + 1:self.size + 1] = self.timestamps[i:self.size]
+        self.positions[i + 1:self.size + 1] = self.positions[i:self.size]
+        self.timestamps[i] = timestamp_
+        self.positions[i] = position_
+        self.size += 1
+
+    def remove(self, position_):
+        '''
+        Dropping the entry of a row
+        '''
+        i = int(np.searchsorted(self.positions[:self.size], position_))
+        self.timestamps[i:self.size - 1] = self.timestamps[i + 1:self.size]
+        self.positions[i:self.size - 1] = self.positions[i + 1:self.size]
+        self.size -= 1
+
+    def truncate(self, position_):
+        '''
+        Dropping the entries of the rows from position_
+        '''
+        self.size = int(np.searchsorted(self.positions[:self.size], position_))
+
+    def extend(self, timestamps_, positions_):
+        self.__reserve(self.size + len(positions_))
+        self.timestamps[self.size:self.size + len(positions_)] = timestamps_
+        self.positions[self.size:self.size + len(positions_)] = positions_
+        self.size += len(positions_)
+
+    def between(self, start_, end_):
+        '''
+        @return - Row positions of the trades in [start_, end_)
+        '''
+        timestamps = self.timestamps[:self.size]
+        return self.positions[np.searchsorted(timestamps, start_):np.searchsorted(timestamps, end_)]
+
+
+class TradeStore(object):
+    '''
+    Columnar trade storage kept in time order.
+
+    Every attribute of a trade lives in its own preallocated NumPy array, the arrays
+    are grown geometrically, so appending is amortised O(1) and the columns can be
+    read directly without building a DataFrame.
+
+    The rows are sorted by timestamp. A trade arriving out of order is inserted at
+    its place by moving the rows after it, which is cheap when the arrivals are only
+    mildly out of order. Every stock has a secondary index of its rows, so a time
+    range is a binary search plus a contiguous slice (or the positions of a stock).
+
+    Every trade gets a trade id in the order it is added. The timestamp and the
+    stock of every id are kept, so a trade is found by its id with a binary search
+    in the secondary index of its stock, wherever its row was moved to.
+
+    Columns:
+     - timestamp : int64, nanoseconds since epoch
+     - symbol_id : int32, index into the symbol table of the store
+     - quantity : int64
+     - buy_or_sell : bool
+     - trade_price : int64
+     - trade_id : int64
+    '''
+
+    COLUMNS = (('timestamp', np.int64),
+               ('symbol_id', np.int32),
+               ('quantity', np.int64),
+               ('buy_or_sell', np.bool_),
+               ('trade_price', np.int64),
+               ('trade_id', np.int64))
+
+    GROWTH_FACTOR = 2
+
+    # up to this number of stocks in a batch the secondary indices are built with masks
+    MASKED_SYMBOLS = 16
+
+    def __init__(self, capacity_=1024):
+        '''
+        Constructor
+
+        @capacity_ - Number of trades preallocated
+        '''
+        self.__capacity = max(int(capacity_), 1)
+        self.__size = 0
+        self.__columns = {name: np.empty(self.__capacity, dtype=dtype) for name, dtype in self.COLUMNS}
+        self.__symbols = []
+        self.__symbol_ids = {}
+        self.__indices = []
+        # timestamp and symbol_id of every trade id, symbol_id is -1 for the removed trades
+        self.__next_trade_id = 0
+        self.__locations = (np.empty(self.__capacity, dtype=np.int64), np.full(self.__capacity, -1, dtype=np.int32))
+
+    def __len__(self):
+        return self.__size
+
+    @property
+    def capacity(self):
+        return self.__capacity
+
+    @property
+    def symbols(self):
+        '''
+        The symbol table, position i holds the symbol of symbol_id i
+        '''
+        return self.__symbols
+
+    def symbol_id(self, symbol_):
+        '''
+        Interning symbols
+
+        @symbol_ - Symbol of the stock
+
+        @return - The id of the symbol, a new id is assigned at the first occurrence
+        '''
+        try:
+            return self.__symbol_ids[symbol_]
+        except KeyError:
+            self.__symbol_ids[symbol_] = len(self.__symbols)
+            self.__symbols.append(symbol_)
+            self.__indices.append(_SymbolIndex())
+            return self.__symbol_ids[symbol_]
+
+    def find_symbol_id(self, symbol_):
+        '''
+        @return - The id of the symbol or None if it was never stored
+        '''
+        return self.__symbol_ids.get(symbol_)
+
+    @property
+    def next_trade_id(self):
+        '''
+        The trade id of the next trade added
+        '''
+        return self.__next_trade_id
+
+    def allocate_trade_ids(self, count_):
+        '''
+        Reserving the trade ids of trades added later (see extend)
+
+        @return - The first of count_ consecutive trade ids
+        '''
+        first = self.__next_trade_id
+        self.__next_trade_id += int(count_)
+        return first
+
+    def __locate(self, trade_ids_, timestamps_, symbol_ids_):
+        '''
+        Keeping the timestamp and the stock of the trade ids
+        '''
+        timestamps, symbol_ids = self.__locations
+        last = int(np.max(trade_ids_)) + 1
+        if last > len(timestamps):
+            capacity = len(timestamps)
+            while capacity < last:
+                capacity *= self.GROWTH_FACTOR
+            timestamps = _grown(timestamps, len(timestamps), capacity)
+            symbol_ids = np.concatenate((symbol_ids, np.full(capacity - len(symbol_ids), -1, dtype=np.int32)))
+            self.__locations = timestamps, symbol_ids
+        timestamps[trade_ids_] = timestamps_
+        symbol_ids[trade_ids_] = symbol_ids_
+        self.__next_trade_id = max(self.__next_trade_id, last)
+
+    def symbol_id_of(self, trade_id_):
+        '''
+        @return - The id of the stock of a stored trade, None if there is no such trade
+        '''
+        timestamps, symbol_ids = self.__locations
+        if not 0 <= trade_id_ < len(symbol_ids) or symbol_ids[trade_id_] < 0:
+            return None
+        return int(symbol_ids[trade_id_])
+
+    def locate(self, trade_id_):
+        '''
+        @return - The row position of a trade by its trade id, None if there is no such trade
+        '''
+        symbol_id = self.symbol_id_of(trade_id_)
+        if symbol_id is None:
+            return None
+        timestamp = self.__locations[0][trade_id_]
+        rows = self.__indices[symbol_id].between(timestamp, timestamp + 1)
+        matches = rows[self.__columns['trade_id'][rows] == trade_id_]
+        return int(matches[0]) if len(matches) else None
+
+    def latest(self, symbol_id_):
+        '''
+        @return - The row position of the latest trade of a stock (the last added one 
+                  of the same timestamps), None if it has no trade
+        '''
+        index = self.__indices[symbol_id_]
+        return int(index.positions[index.size - 1]) if index.size else None
+
+    def __reserve(self, size_):
+        '''
+        Growing the columns geometrically to hold at least size_ trades
+        '''
+        if size_ <= self.__capacity:
+            return
+        capacity = self.__capacity
+        while capacity < size_:
+            capacity *= self.GROWTH_FACTOR
+        for name, column in self.__columns.items():
+            self.__columns[name] = _grown(column, self.__size, capacity)
+        self.__capacity = capacity
+
+    def append(self, timestamp_, symbol_, quantity_, buy_or_sell_, trade_price_, trade_id_=None):
+        '''
+        Adding a single trade in place, at the end or at its place in time
+
+        @timestamp_ - Nanoseconds since epoch
+        @symbol_ - Symbol of the stock
+        @quantity_ - Quantity of the stock
+        @buy_or_sell_ - The stocks are bought or sold
+        @trade_price_ - The price of the stocks
+        @trade_id_ - Trade id of the trade, the next one by default
+
+        @return - The row position of the trade
+        '''
+        self.__reserve(self.__size + 1)
+        columns = self.__columns
+        timestamps = columns['timestamp']
+        symbol_id = self.symbol_id(symbol_)
+        size = self.__size
+        if size == 0 or timestamp_ >= timestamps[size - 1]:
+            i = size
+        else:
+            i = int(np.searchsorted(timestamps[:size], timestamp_, 'right'))
+            for column in columns.values():
+                column[i + 1:size + 1] = column[i:size]
+            for index in self.__indices:
+                index.shift(i)
+        timestamps[i] = timestamp_
+        columns['symbol_id'][i] = symbol_id
+        columns['quantity'][i] = quantity_
+        columns['buy_or_sell'][i] = buy_or_sell_
+        columns['trade_price'][i] = trade_price_
+        trade_id = self.__next_trade_id if trade_id_ is None else int(trade_id_)
+        columns['trade_id'][i] = trade_id
+        self.__locate(trade_id, timestamp_, symbol_id)
+        self.__indices[symbol_id].insert(timestamp_, i)
+        self.__size += 1
+        return i
+
+    def remove(self, position_):
+        '''
+        Dropping a trade, the rows after it are moved
+
+        @position_ - Row position of the trade
+        '''
+        size = self.__size
+        columns = self.__columns
+        symbol_id = int(columns['symbol_id'][position_])
+        self.__locations[1][columns['trade_id'][position_]] = -1
+        for column in columns.values():
+            column[position_:size - 1] = column[position_ + 1:size]
+        self.__indices[symbol_id].remove(position_)
+        for index in self.__indices:
+            index.shift(position_, -1)
+        self.__size -= 1
+
+    def update(self, position_, quantity_, buy_or_sell_, trade_price_):
+        '''
+        Changing a trade in place, its timestamp and stock stay
+
+        @position_ - Row position of the trade
+        '''
+        columns = self.__columns
+        columns['quantity'][position_] = quantity_
+        columns['buy_or_sell'][position_] = buy_or_sell_
+        columns['trade_price'][position_] = trade_price_
+
+    def extend(self, timestamps_, symbol_ids_, quantities_, buy_or_sells_, trade_prices_, trade_ids_=None):
+        '''
+        Adding a batch of trades in place. A time ordered batch which is not older
+        than the last stored trade is appended, otherwise the batch is merged into
+        the stored trades from the position of its oldest trade.
+
+        @timestamps_ - int64 array, nanoseconds since epoch
+        @symbol_ids_ - int array, ids given by symbol_id
+        @quantities_ - int64 array
+        @buy_or_sells_ - bool array
+        @trade_prices_ - int64 array
+        @trade_ids_ - int64 array, the next trade ids in the order of the batch by default
+        '''
+        count = len(timestamps_)
+        if count == 0:
+            return
+        self.__reserve(self.__size + count)
+        size = self.__size
+        columns = self.__columns
+        if trade_ids_ is None:
+            trade_ids_ = np.arange(self.__next_trade_id, self.__next_trade_id + count, dtype=np.int64)
+        self.__locate(trade_ids_, timestamps_, symbol_ids_)
+        batch = {'timestamp': timestamps_, 'symbol_id': symbol_ids_, 'quantity': quantities_,
+                 'buy_or_sell': buy_or_sells_, 'trade_price': trade_prices_, 'trade_id': trade_ids_}
+
+        ordered = not np.any(timestamps_[1:] < timestamps_[:-1])
+        if ordered and (size == 0 or timestamps_[0] >= columns['timestamp'][size - 1]):
+            start = size
+            for name, column in columns.items():
+                column[size:size + count] = batch[name]
+        else:
+            start = int(np.searchsorted(columns['timestamp'][:size], timestamps_.min(), 'right'))
+            merged = {name: np.concatenate((column[start:size], batch[name])) for name, column in columns.items()}
+            order = np.argsort(merged['timestamp'], kind='stable')
+            for name, column in columns.items():
+                column[start:size + count] = merged[name][order]
+            for index in self.__indices:
+                index.truncate(start)
+        self.__size = size + count
+
+        # the secondary indices of the rows from start
+        symbol_ids = columns['symbol_id'][start:self.__size]
+        timestamps = columns['timestamp'][start:self.__size]
+        counts = np.bincount(symbol_ids, minlength=len(self.__indices))
+        present = np.flatnonzero(counts)
+        if len(present) <= self.MASKED_SYMBOLS:
+            # a mask per stock is cheaper than sorting when there are only a few of them
+            for symbol_id in present.tolist():
+                rows = np.flatnonzero(symbol_ids == symbol_id)
+                self.__indices[symbol_id].extend(timestamps[rows], rows + start)
+        else:
+            order = np.argsort(symbol_ids, kind='stable')
+            first = 0
+            for symbol_id, last in enumerate(np.cumsum(counts).tolist()):
+                if last > first:
+                    rows = order[first:last]
+                    self.__indices[symbol_id].extend(timestamps[rows], rows + start)
+                first = last
+
+    def between(self, start_, end_, symbol_id_=None):
+        '''
+        Trades in a time range
+
+        @start_ - Nanoseconds since epoch, inclusive
+        @end_ - Nanoseconds since epoch, exclusive
+        @symbol_id_ - Id of the stock, trades of every stock if it is None
+
+        @return - A slice (every stock) or an array (single stock) of row positions
+        '''
+        if symbol_id_ is None:
+            timestamps = self.timestamp
+            return slice(int(np.searchsorted(timestamps, start_)), int(np.searchsorted(timestamps, end_)))
+        return self.__indices[symbol_id_].between(start_, end_)
+
+    def column(self, name_):
+        '''
+        @name_ - Name of the column
+
+        @return - Read-only view on the stored part of the column
+        '''
+        try:
+            view = self.__columns[name_][:self.__size]
+        except KeyError:
+            raise TradeStoreException('Unknown column: {0}'.format(name_))
+        view.flags.writeable = False
+        return view
+
+    @property
+    def timestamp(self):
+        return self.column('timestamp')
+
+    @property
+    def symbol_ids(self):
+        return self.column('symbol_id')
+
+    @property
+    def quantity(self):
+        return self.column('quantity')
+
+    @property
+    def buy_or_sell(self):
+        return self.column('buy_or_sell')
+
+    @property
+    def trade_price(self):
+        return self.column('trade_price')
+
+    @property
+    def trade_id(self):
+        return self.column('trade_id')
+
+    @property
+    def nbytes(self):
+        '''
+        @return - Bytes allocated by the columns and the secondary indices
+        '''
+        return (sum(column.nbytes for column in self.__columns.values()) +
+                sum(index.timestamps.nbytes + index.positions.nbytes for index in self.__indices) +
+                sum(locations.nbytes for locations in self.__locations))
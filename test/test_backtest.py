@@ -0,0 +1,89 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import io
+import unittest
+import numpy as np
+import backtest
+from backtest import Scenario, BacktestException
+from engine import Engine
+from clock import EventClock
+from index import AllShareIndex
+import simulation
+
+
+class TestBacktest(unittest.TestCase):
+    def testGrid(self):
+        scenarios = backtest.grid((0, 1, 2), number_of_trades=[100, 200], skew=[0.0, 1.1])
+        self.assertEqual(len(scenarios), 12)
+        self.assertEqual(len(set(scenarios)), 12)
+        self.assertEqual(scenarios[0], backtest.DEFAULTS._replace(number_of_trades=100, skew=0.0, seed=0))
+        with self.assertRaises(BacktestException):
+            backtest.grid(trades=[100])
+        with self.assertRaises(BacktestException):
+            backtest.run([])
+
+    def testRunScenario(self):
+        scenario = backtest.DEFAULTS._replace(number_of_trades=1000, out_of_order=0.05, seed=3)
+        result = backtest.run_scenario(scenario, 60, 15)
+        samples = len(result['time']) // len(simulation.STOCKS)
+        self.assertEqual(set(result), set(backtest.COLUMNS))
+        self.assertTrue(all(len(column) == len(result['time']) for column in result.values()))
+        self.assertEqual(result['trades'][-1], 1000)
+        self.assertEqual(list(result['symbol'][:len(simulation.STOCKS)]), [stock[0] for stock in simulation.STOCKS])
+        self.assertTrue(np.all(np.diff(result['time'][::len(simulation.STOCKS)]) == 60 * 10**9))
+        for name, value in backtest.run_scenario(scenario, 60, 15).items():
+            np.testing.assert_array_equal(value, result[name])
+
+        # the last sample is the same as replaying the whole feed at once
+        columns = simulation.generate_columns(1000, [stock[0] for stock in simulation.STOCKS], 0.0, 0.05, 3, backtest.BEGINING)
+        clock = EventClock()
+        engine = Engine(simulation.HEADER, simulation.STOCKS, clock_=clock)
+        engine.add_many(*columns)
+        clock.observe(int(result['time'][-1]))
+        self.assertAlmostEqual(result['gbce'][-1], engine.trades.gbce_all_share_index(AllShareIndex.SESSION))
+        for position, stock in enumerate(simulation.STOCKS):
+            self.assertAlmostEqual(result['vwsp'][(samples - 1) * len(simulation.STOCKS) + position],
+                                   engine.trades.volume_weighted_stock_price(15, stock[0]))
+
+    def testMarketPrices(self):
+        # the P/E ratios are at the price of the latest trade by timestamp, not by arrival
+        symbols = [stock[0] for stock in simulation.STOCKS]
+        result = backtest.run_scenario(backtest.DEFAULTS._replace(number_of_trades=1000, out_of_order=0.5, seed=3), 60, 15)
+        columns = simulation.generate_columns(1000, symbols, 0.0, 0.5, 3, backtest.BEGINING)
+        last_dividends = np.array([stock[2] for stock in simulation.STOCKS], dtype=np.float64)
+        for sample in range(len(result['time']) // len(symbols)):
+            rows = slice(sample * len(symbols), (sample + 1) * len(symbols))
+            end = result['trades'][rows.start]
+            prices = np.zeros(len(symbols))
+            for position, symbol in enumerate(symbols):
+                traded = np.flatnonzero(columns[0][:end] == symbol)
+                if len(traded):
+                    prices[position] = columns[4][traded[np.argmax(columns[1][traded])]]
+            expected = np.divide(prices, last_dividends, out=np.zeros(len(symbols)), where=last_dividends != 0)
+            np.testing.assert_allclose(result['pe_ratio'][rows], expected)
+
+    def testRun(self):
+        scenarios = backtest.grid((0, 1), number_of_trades=[500], stocks=[0, 20])
+        table = backtest.run(scenarios, 2, 30)
+        self.assertEqual(set(table), set(backtest.COLUMNS + Scenario._fields))
+        self.assertEqual(set(table['scenario'].tolist()), {0, 1, 2, 3})
+        for position, scenario in enumerate(scenarios):
+            rows = table['scenario'] == position
+            self.assertTrue(np.all(table['seed'][rows] == scenario.seed))
+            self.assertEqual(len(set(table['symbol'][rows].tolist())), scenario.stocks or len(simulation.STOCKS))
+            for name, value in backtest.run_scenario(scenario, 30).items():
+                if name != 'scenario':
+                    np.testing.assert_array_equal(value, table[name][rows])
+
+        output = io.StringIO()
+        backtest.write_csv(table, output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), len(table['time']) + 1)
+        self.assertEqual(lines[0].split(','), list(table))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+import numpy as np
+from bars import BarBuilder, BarsException
+from ddt import ddt, data, unpack
+
+
+@ddt
+class TestBarBuilder(unittest.TestCase):
+    
+    @staticmethod
+    def _expected(trades_, resolution_):
+        '''
+        Bars computed directly from the trades
+        '''
+        bars = {}
+        for timestamp, quantity, buy_or_sell, trade_price in trades_:
+            bars.setdefault(timestamp - timestamp % (resolution_ * 10**9), []).append((timestamp, quantity, buy_or_sell, trade_price))
+        expected = {name: [] for name in ('start', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'buy_volume', 'sell_volume', 'trades')}
+        for start in sorted(bars):
+            trades = bars[start]
+            ordered = sorted(trades, key=lambda trade: trade[0])
+            volume = sum(trade[1] for trade in trades)
+            expected['start'].append(start)
+            expected['open'].append(ordered[0][3])
+            expected['high'].append(max(trade[3] for trade in trades))
+            expected['low'].append(min(trade[3] for trade in trades))
+            expected['close'].append(ordered[-1][3])
+            expected['volume'].append(volume)
+            expected['vwap'].append(sum(trade[1] * trade[3] for trade in trades) / volume)
+            expected['buy_volume'].append(sum(trade[1] for trade in trades if trade[2]))
+            expected['sell_volume'].append(sum(trade[1] for trade in trades if not trade[2]))
+            expected['trades'].append(len(trades))
+        return expected
+    
+    @data((0, 1), (1, 10), (2, 1000), (3, 1))
+    @unpack
+    def testBars(self, seed_, batch_):
+        '''
+        Trades in 20 minutes with distinct timestamps, mildly out of order, added one 
+        by one or in batches, the coarser bars are read in between
+        '''
+        rng = np.random.default_rng(seed_)
+        timestamps = np.sort(rng.choice(20 * 60 * 10**6, 3000, replace=False)) * 1000 + 10**18
+        timestamps = timestamps[np.argsort(np.arange(3000) + rng.integers(0, 50, 3000), kind='stable')]
+        quantities = rng.integers(1, 100, 3000)
+        buy_or_sells = rng.integers(0, 2, 3000).astype(bool)
+        trade_prices = rng.integers(1, 1000, 3000)
+        
+        bb = BarBuilder()
+        for start in range(0, 3000, batch_):
+            rows = slice(start, start + batch_)
+            if batch_ == 1:
+                bb.add('TEA', int(timestamps[start]), int(quantities[start]), bool(buy_or_sells[start]), int(trade_prices[start]))
+            else:
+                bb.add_many('TEA', timestamps[rows], quantities[rows], buy_or_sells[rows], trade_prices[rows])
+            if start % 700 == 0:
+                bb.bars('TEA', 300, 0, 2 * 10**18)
+        
+        trades = list(zip(timestamps.tolist(), quantities.tolist(), buy_or_sells.tolist(), trade_prices.tolist()))
+        for resolution in (1, 60, 300):
+            bars = bb.bars('TEA', resolution, 0, 2 * 10**18)
+            expected = self._expected(trades, resolution)
+            for name, values in expected.items():
+                if name == 'vwap':
+                    np.testing.assert_allclose(bars[name], values)
+                else:
+                    self.assertEqual(bars[name].tolist(), values)
+        
+    def testRange(self):
+        bb = BarBuilder((1, 60))
+        bb.add_many('TEA', np.arange(0, 180) * 10**9, np.ones(180, dtype=np.int64), np.ones(180, dtype=bool), np.arange(180))
+        bars = bb.bars('TEA', 60, 60 * 10**9, 120 * 10**9 + 1)
+        self.assertEqual(bars['start'].tolist(), [60 * 10**9, 120 * 10**9])
+        self.assertEqual(bars['open'].tolist(), [60, 120])
+        self.assertEqual(bars['close'].tolist(), [119, 179])
+        self.assertEqual(bars['sell_volume'].tolist(), [0, 0])
+        self.assertEqual(len(bb.bars('ALE', 60, 0, 10**12)['start']), 0)
+    
+    def testSums(self):
+        '''
+        The prefix sums follow the trades added in place, appended and merged out of order
+        '''
+        bb = BarBuilder((1, 60))
+        trades = []
+        def add(timestamp_, quantity_, trade_price_):
+            bb.add('TEA', timestamp_ * 10**8, quantity_, True, trade_price_)
+            trades.append((timestamp_ * 10**8, quantity_, trade_price_))
+        def expected(start_, end_):
+            rows = [trade for trade in trades if start_ <= trade[0] - trade[0] % 10**9 < end_]
+            return sum(trade[1] * trade[2] for trade in rows), sum(trade[1] for trade in rows)
+        for i in range(100):
+            add(i * 5, i + 1, 100 + i)
+        self.assertEqual(bb.sums('TEA', 0, 10**12), expected(0, 10**12))
+        add(496, 3, 7)
+        self.assertEqual(bb.sums('TEA', 10 * 10**9, 50 * 10**9), expected(10 * 10**9, 50 * 10**9))
+        add(12, 1000, 1)
+        add(1000, 1000, 1)
+        for start, end in ((0, 10**12), (10**9, 2 * 10**9), (15 * 10**8, 49 * 10**9), (40 * 10**9, 30 * 10**9)):
+            self.assertEqual(bb.sums('TEA', start, end), expected(start, end))
+        self.assertEqual(bb.sums('ALE', 0, 10**12), (0, 0))
+    
+    def testSumsOverflow(self):
+        '''
+        The ranges beyond an int64 overflow of the prefix sums are summed exactly
+        '''
+        bb = BarBuilder((1, 60))
+        price = 2**40
+        for i in range(40):
+            bb.add('TEA', i * 10**9, 2**21, True, price)
+        self.assertEqual(bb.sums('TEA', 0, 4 * 10**9), (4 * 2**61, 4 * 2**21))
+        self.assertEqual(bb.sums('TEA', 0, 40 * 10**9), (40 * 2**61, 40 * 2**21))
+        self.assertEqual(bb.sums('TEA', 30 * 10**9, 40 * 10**9), (10 * 2**61, 10 * 2**21))
+        bb.add('TEA', 2 * 10**9, 1, True, 1)
+        self.assertEqual(bb.sums('TEA', 0, 3 * 10**9), (3 * 2**61 + 1, 3 * 2**21 + 1))
+        self.assertEqual(bb.sums('TEA', 0, 40 * 10**9), (40 * 2**61 + 1, 40 * 2**21 + 1))
+    
+    @data(False, True)
+    def testBarOverflow(self, batch_):
+        '''
+        A bar whose turnover overflows int64 is detected instead of wrapping
+        '''
+        bb = BarBuilder((1, 60))
+        quantity, price = 2**21, 2**41
+        timestamps = np.array([0, 5 * 10**8, 2 * 10**9], dtype=np.int64)
+        if batch_:
+            bb.add_many('TEA', timestamps, np.full(3, quantity), np.ones(3, dtype=bool), np.full(3, price))
+        else:
+            for timestamp in timestamps.tolist():
+                bb.add('TEA', timestamp, quantity, True, price)
+        self.assertEqual(bb.sums('TEA', 10**9, 3 * 10**9), (2**62, quantity))
+        self.assertEqual(bb.bars('TEA', 1, 10**9, 3 * 10**9)['volume'].tolist(), [quantity])
+        with self.assertRaises(BarsException):
+            bb.sums('TEA', 0, 3 * 10**9)
+        with self.assertRaises(BarsException):
+            bb.bars('TEA', 1, 0, 10**9)
+        with self.assertRaises(BarsException):
+            bb.bars('TEA', 60, 0, 60 * 10**9)
+        bb.replace('TEA', 0, timestamps[:1], np.array([quantity]), np.array([True]), np.array([price]))
+        self.assertEqual(bb.sums('TEA', 0, 3 * 10**9), (2 * 2**62, 2 * quantity))
+        self.assertEqual(bb.bars('TEA', 1, 0, 10**9)['volume'].tolist(), [quantity])
+        with self.assertRaises(BarsException):
+            bb.bars('TEA', 60, 0, 60 * 10**9)
+    
+    @data((), (0, 60), (60, 90), (60, 1), (1, 'x'))
+    def testNonValidResolutions(self, resolutions_):
+        with self.assertRaises(BarsException):
+            BarBuilder(resolutions_)
+    
+    def testUnknownResolution(self):
+        with self.assertRaises(BarsException):
+            BarBuilder().bars('TEA', 5, 0, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+from pandas import Timestamp
+from clock import WallClock, EventClock
+from trades import Trade, TradeManager
+from stocks import StockManager
+
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+          ['JOE', 'Common', 13, '',250]]
+
+
+class TestClock(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._sm = StockManager()
+        cls._sm.create_stocks_header(HEADER, STOCKS)
+        
+    @classmethod
+    def tearDownClass(cls):
+        cls._sm._clear()
+        
+    def tearDown(self):
+        TradeManager._clear()
+        
+    def testWallClock(self):
+        before = Timestamp.now().value
+        now = WallClock().now()
+        self.assertTrue(before <= now <= Timestamp.now().value)
+        
+    def testEventClock(self):
+        clock = EventClock(5)
+        self.assertEqual(clock.now(), 5)
+        clock.observe(10)
+        clock.observe(7)
+        self.assertEqual(clock.now(), 10)
+        self.assertEqual(Trade.create_trade('TEA', 1, Trade.BUY, 1, clock).timestamp, 10)
+        
+    def testReplayAtEventTime(self):
+        '''
+        The windows of a replayed session are evaluated at the time of its trades
+        '''
+        tm = TradeManager()
+        tm.add(Trade('TEA', '2015-01-21 00:12:00', 100, Trade.BUY, 10))
+        tm.add_many([('TEA', '2015-01-21 00:12:20', 100, Trade.BUY, 30), ('ALE', '2015-01-21 00:12:25', 100, Trade.BUY, 50)])
+        self.assertEqual(tm.volume_weighted_stock_price(15), 0.0)
+        
+        clock = EventClock()
+        tm.set_clock(clock)
+        self.assertEqual(tm.now(), Timestamp('2015-01-21 00:12:25').value)
+        self.assertEqual(tm.volume_weighted_stock_price(15), 40.0)
+        self.assertEqual(tm.volume_weighted_stock_price(30), 30.0)
+        tm.add(Trade('TEA', '2015-01-21 00:12:50', 100, Trade.BUY, 10))
+        self.assertIs(tm.clock, clock)
+        self.assertEqual(tm.volume_weighted_stock_price(15), 10.0)
+        self.assertEqual(tm.volume_weighted_stock_price(100, 'TEA'), 50 / 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
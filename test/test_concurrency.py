@@ -0,0 +1,112 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+import threading
+import numpy as np
+from pandas import Timestamp
+from trades import Trade, TradeManager
+from stocks import StockManager
+from index import AllShareIndex
+from ddt import ddt, data, unpack
+
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+          ['JOE', 'Common', 13, '',250]]
+SYMBOLS = [stock[0] for stock in STOCKS]
+
+
+@ddt
+class TestConcurrentTradeManager(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._sm = StockManager()
+        cls._sm.create_stocks_header(HEADER, STOCKS)
+        
+    @classmethod
+    def tearDownClass(cls):
+        cls._sm._clear()
+        
+    def tearDown(self):
+        TradeManager._clear()
+        
+    @staticmethod
+    def _feed(seed_, size_):
+        '''
+        Trades of a writer thread in the last 10 seconds, some of them out of order
+        '''
+        rng = np.random.default_rng(seed_)
+        now = Timestamp.now().value
+        return (rng.choice(SYMBOLS, size_).tolist(), 
+                (now - 10**10 + np.sort(rng.integers(0, 10**10, size_)) - rng.integers(0, 10**9, size_) * (rng.random(size_) < 0.1)).tolist(),
+                rng.integers(1, 1000, size_).tolist(), rng.integers(0, 2, size_).tolist(), rng.integers(1, 500, size_).tolist())
+    
+    @data((4, 4, 300), (8, 2, 200))
+    @unpack
+    def testWritersAndReaders(self, writers_, readers_, size_):
+        feeds = [self._feed(seed, size_) for seed in range(writers_)]
+        tm = TradeManager()
+        done = threading.Event()
+        errors = []
+        
+        def write(feed_, batched_):
+            try:
+                if batched_:
+                    for i in range(0, size_, 50):
+                        tm.add_many(*[column[i:i + 50] for column in feed_])
+                else:
+                    for trade in zip(*feed_):
+                        tm.add(Trade(*trade))
+            except Exception as error:
+                errors.append(error)
+                
+        def read():
+            try:
+                while not done.is_set():
+                    tm.volume_weighted_stock_price(60)
+                    tm.volume_weighted_stock_price(15, 'TEA')
+                    tm.volume_weighted_stock_price(40)
+                    tm.gbce_all_share_index()
+                    tm.gbce_all_share_index(AllShareIndex.WINDOW, 300)
+                    tm.trades_between(0, Timestamp.now().value, 'ALE')
+            except Exception as error:
+                errors.append(error)
+        
+        threads = [threading.Thread(target=write, args=(feed, i % 2)) for i, feed in enumerate(feeds)]
+        reading = [threading.Thread(target=read) for _ in range(readers_)]
+        for thread in reading + threads:
+            thread.start()
+        tm.register_window(30)
+        for thread in threads:
+            thread.join()
+        done.set()
+        for thread in reading:
+            thread.join()
+        self.assertEqual(errors, [])
+        
+        TradeManager._clear()
+        serial = TradeManager()
+        serial.register_window(30)
+        for feed in feeds:
+            serial.add_many(*feed)
+            
+        self.assertEqual(len(tm), writers_ * size_)
+        self.assertEqual(len(serial), len(tm))
+        for symbol in SYMBOLS + [None]:
+            for interval in (30, 60, 300, 1000):
+                self.assertAlmostEqual(tm.volume_weighted_stock_price(interval, symbol), 
+                                       serial.volume_weighted_stock_price(interval, symbol))
+        self.assertAlmostEqual(tm.gbce_all_share_index(), serial.gbce_all_share_index())
+        self.assertAlmostEqual(tm.gbce_all_share_index(AllShareIndex.LATEST), serial.gbce_all_share_index(AllShareIndex.LATEST))
+        trades, expected = tm.trades_between(0, Timestamp.now().value), serial.trades_between(0, Timestamp.now().value)
+        self.assertEqual(trades['timestamp'].tolist(), expected['timestamp'].tolist())
+        self.assertEqual(sorted(zip(trades['timestamp'].tolist(), trades['quantity'].tolist())), 
+                         sorted(zip(expected['timestamp'].tolist(), expected['quantity'].tolist())))
+        
+
+if __name__ == "__main__":
+    unittest.main()
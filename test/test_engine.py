@@ -0,0 +1,172 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+from engine import Engine, EngineException
+from trades import Trade, TradeManager, TradeManagerException
+from stocks import StockManager
+from clock import EventClock
+from index import AllShareIndex
+
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+          ['JOE', 'Common', 13, '',250]]
+
+
+class TestEngine(unittest.TestCase):
+    def tearDown(self):
+        StockManager._clear()
+        TradeManager._clear()
+        
+    def testIsolated(self):
+        first, second = Engine(HEADER, STOCKS[:2], clock_=EventClock()), Engine(HEADER, STOCKS[2:], clock_=EventClock())
+        first.add('TEA', 10**18, 10, Trade.BUY, 100)
+        second.add_many([('ALE', 10**18, 10, Trade.BUY, 50), ('TEA', 10**18, 10, Trade.BUY, 50)])
+        self.assertEqual((len(first.trades), len(second.trades)), (1, 1))
+        self.assertEqual(first.trades.volume_weighted_stock_price(15), 100.0)
+        self.assertEqual(second.trades.volume_weighted_stock_price(15), 50.0)
+        self.assertEqual(len(StockManager()), 0)
+        self.assertEqual(len(TradeManager()), 0)
+        with self.assertRaises(EngineException):
+            first.add('ALE', 10**18, 10, Trade.BUY, 100)
+        with self.assertRaises(TradeManagerException):
+            first.trades.add(second.trade('ALE', 10**18, 10, Trade.BUY, 100))
+            
+    def testSharedStocks(self):
+        stocks = Engine(HEADER, STOCKS).stocks
+        engines = [Engine(stock_manager_=stocks, clock_=EventClock()) for _ in range(3)]
+        for i, engine in enumerate(engines):
+            engine.add('GIN', 10**18, 10, Trade.SELL, 10 * (i + 1))
+        for i, engine in enumerate(engines):
+            self.assertAlmostEqual(engine.trades.gbce_all_share_index(AllShareIndex.LATEST), 10.0 * (i + 1))
+        self.assertIs(engines[0].stocks, engines[2].stocks)
+        with self.assertRaises(EngineException):
+            Engine(HEADER, STOCKS, stock_manager_=stocks)
+        with self.assertRaises(EngineException):
+            Engine(['symbol_'], [['TEA']])
+            
+    def testTradeStock(self):
+        engine = Engine(HEADER, [['ZZZ', 'Common', 8, '', 100]])
+        trade = engine.trade('ZZZ', 1, 10, Trade.BUY, 100)
+        self.assertIs(trade['stock'], engine.stocks['ZZZ'])
+        self.assertEqual(trade, Trade('ZZZ', 1, 10, Trade.BUY, 100, engine.stocks))
+        self.assertIs(Trade.create_trade('ZZZ', 10, Trade.BUY, 100, EventClock(), engine.stocks)['stock'], engine.stocks['ZZZ'])
+            
+    def testCancelAndAmend(self):
+        now = 10**18
+        trades = [('TEA', now - 50 * 10**9, 10, Trade.BUY, 100), ('TEA', now - 20 * 10**9, 20, Trade.SELL, 110),
+                  ('POP', now - 10 * 10**9, 5, Trade.BUY, 200), ('TEA', now, 7, Trade.BUY, 90)]
+        engine = Engine(HEADER, STOCKS, clock_=EventClock(now))
+        self.assertEqual([engine.add(*trade) for trade in trades], [0, 1, 2, 3])
+        engine.trades.amend(1, quantity_=30, trade_price_=120)
+        engine.trades.cancel(2)
+        engine.trades.amend(0, timestamp_=now - 5 * 10**9)
+        with self.assertRaises(TradeManagerException):
+            engine.trades.cancel(2)
+        with self.assertRaises(TradeManagerException):
+            engine.trades.amend(3, quantity_=-1)
+        
+        # the same as adding the corrected trades
+        expected = Engine(HEADER, STOCKS, clock_=EventClock(now))
+        for trade in [('TEA', now - 5 * 10**9, 10, Trade.BUY, 100), ('TEA', now - 20 * 10**9, 30, Trade.SELL, 120), trades[3]]:
+            expected.add(*trade)
+        for interval in (15, 60, 300):
+            self.assertAlmostEqual(engine.trades.volume_weighted_stock_price(interval, 'TEA'), 
+                                   expected.trades.volume_weighted_stock_price(interval, 'TEA'))
+        for mode in (AllShareIndex.LATEST, AllShareIndex.SESSION):
+            self.assertAlmostEqual(engine.trades.gbce_all_share_index(mode), expected.trades.gbce_all_share_index(mode))
+        for resolution in (1, 60, 300):
+            bars = engine.trades.bars(resolution, 0, now + 1, 'TEA')
+            for name, values in expected.trades.bars(resolution, 0, now + 1, 'TEA').items():
+                self.assertEqual(bars[name].tolist(), values.tolist())
+        self.assertEqual(engine.trades.find_trade(0)['timestamp'], now - 5 * 10**9)
+        self.assertEqual(len(engine.trades.bars(1, 0, now + 1, 'POP')['start']), 0)
+            
+    def testLateTrades(self):
+        engine = Engine(HEADER, STOCKS, clock_=EventClock())
+        self.assertIsNone(engine.trades.watermark)
+        with self.assertRaises(TradeManagerException):
+            engine.trades.set_lateness(10, 'drop')
+        with self.assertRaises(TradeManagerException):
+            engine.trades.set_lateness(-1)
+        engine.trades.set_lateness(10)
+        engine.trades.enable_metrics()
+        engine.add('TEA', 10**18, 10, Trade.BUY, 100)
+        self.assertEqual(engine.trades.watermark, 10**18 - 10 * 10**9)
+        engine.add('TEA', 10**18 - 11 * 10**9, 10, Trade.BUY, 200)
+        engine.trades.set_lateness(10, TradeManager.REJECT)
+        with self.assertRaises(TradeManagerException):
+            engine.add('TEA', 10**18 - 11 * 10**9, 10, Trade.BUY, 300)
+        engine.add_many(['TEA', 'TEA'], [10**18 - 11 * 10**9, 10**18 - 9 * 10**9], [10, 10], [True, True], [300, 300])
+        self.assertEqual(len(engine.trades), 3)
+        self.assertEqual(engine.trades.stats()['counters']['trades_late'], 3)
+        with self.assertRaises(TradeManagerException):
+            engine.trades.amend(0, timestamp_=10**18 - 60 * 10**9)
+        self.assertEqual(engine.trades.find_trade(0)['timestamp'], 10**18)
+        self.assertEqual(engine.trades.turnover_and_volume(15, 'TEA', 10**18), (10 * 100 + 10 * 200 + 10 * 300, 30))
+        engine.trades.amend(0, quantity_=20)
+        engine.trades.amend(0, timestamp_=10**18 - 5 * 10**9)
+        self.assertEqual(engine.trades.find_trade(0)['timestamp'], 10**18 - 5 * 10**9)
+
+    def testDefaultTickSize(self):
+        now = 10**18
+        engine = Engine(HEADER, STOCKS, clock_=EventClock(now))
+        # the fractions of a penny are truncated by default
+        engine.trades.add(engine.trade('TEA', now, 10, Trade.BUY, 100.5))
+        self.assertEqual(engine.trades.add_many(['TEA', 'TEA'], [now] * 2, [10, 10], [True] * 2, [99.9, 0.5]).tolist(), [1])
+        self.assertEqual(engine.trades.trades_between(0, now + 1, 'TEA')['trade_price'].tolist(), [100, 99])
+        with self.assertRaises(TradeManagerException):
+            engine.add('TEA', now, 1, Trade.BUY, 0.5)
+        with self.assertRaises(TradeManagerException):
+            Engine(HEADER, STOCKS, tick_size_=1).add('TEA', now, 10, Trade.BUY, 100.5)
+        
+    def testTickSize(self):
+        now = 10**18
+        engine = Engine(HEADER, STOCKS, clock_=EventClock(now), tick_size_='0.0001')
+        self.assertEqual(str(engine.trades.tick_size), '0.0001')
+        engine.add('TEA', now - 10**9, 3, Trade.BUY, '100.0001')
+        engine.add('TEA', now, 7, Trade.SELL, 100.1234)
+        self.assertEqual(engine.trades.add_many(['TEA', 'TEA', 'POP', 'POP'], [now] * 4, [1, 2**62, 1, 1], [True] * 4, 
+                                                [100.00001, 1000, '0.0002', 'x']).tolist(), [0, 1, 3])
+        with self.assertRaises(TradeManagerException):
+            engine.add('TEA', now, 1, Trade.BUY, '100.00001')
+        with self.assertRaises(TradeManagerException):
+            engine.add('TEA', now, 2**62, Trade.BUY, 1000)
+        
+        # (3 * 1000001 + 7 * 1001234) / 10 ticks
+        self.assertEqual(engine.trades.volume_weighted_stock_price(15, 'TEA'), 10008641 / 100000)
+        self.assertEqual(engine.trades.volume_weighted_stock_price(20, 'TEA'), 10008641 / 100000)
+        self.assertEqual(engine.trades.volume_weighted_stock_price_between(0, now + 1, 'TEA'), 10008641 / 100000)
+        self.assertEqual(engine.trades.latest_prices(), {'TEA': 100.1234, 'POP': 0.0002})
+        self.assertEqual(engine.trades.trades_between(0, now + 1, 'TEA')['trade_price'].tolist(), [100.0001, 100.1234])
+        self.assertEqual(engine.trades.find_trade(1)['trade_price'], 100.1234)
+        self.assertAlmostEqual(engine.trades.gbce_all_share_index(AllShareIndex.LATEST), (100.1234 * 0.0002) ** 0.5)
+        bars = engine.trades.bars(60, 0, now + 1, 'TEA')
+        self.assertEqual((bars['open'].tolist(), bars['high'].tolist(), bars['close'].tolist()), ([100.0001], [100.1234], [100.1234]))
+        self.assertAlmostEqual(bars['vwap'][0], 10008641 / 100000)
+        engine.trades.amend(0, trade_price_='100.5')
+        self.assertEqual(engine.trades.find_trade(0)['trade_price'], 100.5)
+        
+        with self.assertRaises(TradeManagerException):
+            engine.trades.set_tick_size('0.01')
+        with self.assertRaises(EngineException):
+            Engine(HEADER, STOCKS, tick_size_=0)
+        # the prices are not truncated by the trades
+        self.assertEqual(engine.trade('TEA', now, 1, Trade.BUY, 100.7).trade_price, 100.7)
+        with self.assertRaises(EngineException):
+            Engine(HEADER, STOCKS).add('TEA', now, 1, Trade.BUY, 'nan')
+
+    def testDefault(self):
+        StockManager().create_stocks_header(HEADER, STOCKS)
+        engine = Engine.default()
+        engine.add('TEA', 10**18, 10, Trade.BUY, 100)
+        self.assertIs(engine.trades, TradeManager())
+        self.assertEqual(len(TradeManager()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
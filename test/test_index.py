@@ -0,0 +1,50 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+from index import AllShareIndex, AllShareIndexException
+from ddt import ddt, data, unpack
+
+
+@ddt
+class TestAllShareIndex(unittest.TestCase):
+
+    def testEmpty(self):
+        index = AllShareIndex()
+        self.assertEqual(index.value(AllShareIndex.SESSION), 0.0)
+        self.assertEqual(index.value(AllShareIndex.LATEST), 0.0)
+
+    @data((AllShareIndex.SESSION, (100 * 10 * 10 * 1000) ** (1 / 4)),
+          (AllShareIndex.LATEST, (10 * 1000) ** (1 / 2)))
+    @unpack
+    def testModes(self, mode_, expected_):
+        index = AllShareIndex()
+        index.add('TEA', 2, 1, 100)
+        index.add('TEA', 1, 1, 10)
+        index.add('TEA', 3, 1, 10)
+        index.add('ALE', 1, 1, 1000)
+        self.assertAlmostEqual(index.value(mode_), expected_)
+
+    def testCache(self):
+        index = AllShareIndex()
+        index.add('TEA', 1, 1, 10)
+        self.assertAlmostEqual(index.value(), 10.0)
+        index.add('ALE', 1, 1, 1000)
+        self.assertAlmostEqual(index.value(), 100.0)
+
+    def testLatestPrices(self):
+        index = AllShareIndex()
+        index.add('TEA', 2, 1, 100)
+        index.add('TEA', 1, 1, 10)
+        index.add_partials('ALE', 0.0, 1, 5, 1000)
+        self.assertEqual(index.latest_prices(), {'TEA': 100, 'ALE': 1000})
+
+    def testFalseMode(self):
+        with self.assertRaises(AllShareIndexException):
+            AllShareIndex().value('median')
+
+
+if __name__ == "__main__":
+    unittest.main()
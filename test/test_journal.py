@@ -0,0 +1,197 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pandas import Timestamp
+from journal import TradeJournal, TradeJournalException
+from trades import Trade, TradeManager, TradeManagerException
+from stocks import StockManager
+from index import AllShareIndex
+from clock import EventClock
+from ddt import ddt, data
+
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+          ['JOE', 'Common', 13, '',250]]
+SYMBOLS = [stock[0] for stock in STOCKS]
+
+
+@ddt
+class TestTradeJournal(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'trades.journal')
+        
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+        
+    @data(1, 7, 1024)
+    def testGrowingAndReopening(self, capacity_):
+        journal = TradeJournal(self._path, capacity_)
+        for i in range(100):
+            journal.append(i, 'TEA', i + 1, i % 2 == 0, 100 + i)
+        journal.extend(np.arange(100, 300), np.array(['ALE', 'GIN'] * 100), np.arange(101, 301), 
+                       np.ones(200, dtype=bool), np.full(200, 7))
+        self.assertEqual(len(journal), 300)
+        journal.close()
+        
+        journal = TradeJournal(self._path)
+        records = journal.records
+        self.assertEqual(records['timestamp'].tolist(), list(range(300)))
+        self.assertEqual(records['symbol'][[0, 100, 101]].tolist(), [b'TEA', b'ALE', b'GIN'])
+        self.assertEqual((records['quantity'] - records['timestamp']).tolist(), [1] * 300)
+        with self.assertRaises(ValueError):
+            records['quantity'][0] = 5
+        journal.close()
+        
+    @data(b'', b'not a journal file', b'SSSTRDJ1')
+    def testNotJournal(self, content_):
+        with open(self._path, 'wb') as journal:
+            journal.write(content_ + bytes(64) if content_ else b'x')
+        with self.assertRaises(TradeJournalException):
+            TradeJournal(self._path)
+            
+    def testTooLongSymbol(self):
+        journal = TradeJournal(self._path)
+        with self.assertRaises(TradeJournalException):
+            journal.append(1, 'TOOLONGSYMBOL', 1, True, 1)
+        with self.assertRaises(TradeJournalException):
+            journal.extend(np.arange(2), np.array(['TEA', 'TOOLONGSYMBOL']), np.ones(2), np.ones(2, dtype=bool), np.ones(2))
+        self.assertEqual(len(journal), 0)
+        journal.close()
+
+
+@ddt
+class TestTradeManagerJournal(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._sm = StockManager()
+        cls._sm.create_stocks_header(HEADER, STOCKS)
+        
+    @classmethod
+    def tearDownClass(cls):
+        cls._sm._clear()
+        
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'trades.journal')
+        
+    def tearDown(self):
+        TradeManager().close_journal()
+        TradeManager._clear()
+        shutil.rmtree(self._directory)
+        
+    @staticmethod
+    def _metrics(trade_manager_, now_):
+        '''
+        @now_ - End of the VWSP windows, fixed so that no trade expires between two evaluations
+
+        @return - (exact metrics, GBCE indices summed up as floats in a different order)
+        '''
+        return ((len(trade_manager_), 
+                 [trade_manager_.turnover_and_volume(interval, symbol, now_) for interval in (15, 100) for symbol in SYMBOLS + [None]],
+                 trade_manager_.gbce_all_share_index(AllShareIndex.LATEST),
+                 {key: value.tolist() for key, value in trade_manager_.trades_between(0, 2**62).items()}),
+                [trade_manager_.gbce_all_share_index(AllShareIndex.SESSION), trade_manager_.gbce_all_share_index(AllShareIndex.WINDOW, 60)])
+    
+    @data(0, 1, 2)
+    def testReplay(self, seed_):
+        rng = np.random.default_rng(seed_)
+        now = Timestamp.now().value
+        tm = TradeManager()
+        self.assertEqual(tm.open_journal(self._path), 0)
+        for i in range(50):
+            tm.add(Trade(SYMBOLS[i % 5], now - int(rng.integers(0, 30 * 10**9)), int(rng.integers(1, 1000)), True, int(rng.integers(1, 500))))
+        size = 500
+        tm.add_many(rng.choice(SYMBOLS + ['XXX'], size).tolist(), (now - rng.integers(0, 30 * 10**9, size)).tolist(), 
+                    rng.integers(-5, 1000, size).tolist(), [False] * size, rng.integers(1, 500, size).tolist())
+        expected, expected_indices = self._metrics(tm, now)
+        tm.close_journal()
+        TradeManager._clear()
+        
+        tm = TradeManager()
+        self.assertEqual(tm.open_journal(self._path), expected[0])
+        metrics, indices = self._metrics(tm, now)
+        self.assertEqual(metrics, expected)
+        for index, expected_index in zip(indices, expected_indices):
+            self.assertAlmostEqual(index, expected_index)
+        tm.add(Trade('TEA', now, 10, True, 10))
+        tm.close_journal()
+        self.assertEqual(len(TradeJournal(self._path)), expected[0] + 1)
+        
+    def testCorrections(self):
+        now = Timestamp.now().value
+        tm = TradeManager()
+        tm.set_clock(EventClock())
+        tm.open_journal(self._path)
+        ids = [tm.add(Trade(SYMBOLS[i % 2], now - i * 10**9, 10 + i, True, 100 + i)) for i in range(4)]
+        tm.add_many(['ALE', 'GIN'], [now, now - 10**9], [5, 6], [True, False], [50, 60])
+        tm.cancel(ids[1])
+        tm.amend(ids[2], quantity_=30, timestamp_=now - 20 * 10**9)
+        tm.amend(ids[2], trade_price_=250)
+        tm.cancel(5)
+        expected, expected_indices = self._metrics(tm, now)
+        tm.close_journal()
+        TradeManager._clear()
+        
+        tm = TradeManager()
+        tm.set_clock(EventClock())
+        self.assertEqual(tm.open_journal(self._path), 4)
+        metrics, indices = self._metrics(tm, now)
+        self.assertEqual(metrics, expected)
+        for index, expected_index in zip(indices, expected_indices):
+            self.assertAlmostEqual(index, expected_index)
+        self.assertEqual(tm.find_trade(ids[2])['trade_price'], 250)
+        self.assertEqual(tm.add(Trade('TEA', now, 10, True, 10)), 6)
+        
+    def testCorrectedIndexAsReplayed(self):
+        now = Timestamp.now().value
+        tm = TradeManager()
+        tm.set_clock(EventClock())
+        tm.open_journal(self._path)
+        big = tm.add(Trade('TEA', now - 10**9, 10**12, True, 10**6))
+        tm.add(Trade('TEA', now, 1, True, 2))
+        amended = tm.add(Trade('POP', now, 10**12, True, 10**6))
+        tm.add_many(['POP', 'ALE'], [now, now], [3, 5], [True, False], [7, 11])
+        tm.cancel(big)
+        tm.amend(amended, quantity_=1, trade_price_=3)
+        expected = [tm.gbce_all_share_index(mode) for mode in (AllShareIndex.SESSION, AllShareIndex.LATEST)]
+        tm.close_journal()
+        TradeManager._clear()
+        
+        tm = TradeManager()
+        tm.set_clock(EventClock())
+        tm.open_journal(self._path)
+        self.assertEqual([tm.gbce_all_share_index(mode) for mode in (AllShareIndex.SESSION, AllShareIndex.LATEST)], expected)
+        self.assertAlmostEqual(expected[0], (2 * 3 * 7 ** 3 * 11 ** 5) ** (1 / 10))
+        
+    def testRejectedByTheJournal(self):
+        self._sm.create_stocks('Common', symbol_='TOOLONGSYMBOL', last_dividend_=0, par_value_=100)
+        try:
+            now = Timestamp.now().value
+            tm = TradeManager()
+            tm.open_journal(self._path)
+            with self.assertRaises(TradeManagerException):
+                tm.add_many(['TEA', 'TOOLONGSYMBOL'], [now, now], [10, 10], [True, True], [100, 100])
+            self.assertEqual((len(tm), tm.next_trade_id), (0, 0))
+            self.assertEqual(tm.add(Trade('TEA', now, 10, True, 100)), 0)
+        finally:
+            del self._sm['TOOLONGSYMBOL']
+        
+    def testJournalOpened(self):
+        tm = TradeManager()
+        tm.open_journal(self._path)
+        with self.assertRaises(TradeManagerException):
+            tm.open_journal(os.path.join(self._directory, 'other.journal'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+import asyncio
+import os
+import tempfile
+import numpy as np
+from engine import Engine
+from clock import EventClock
+from trades import Trade
+from marketdata import (MarketDataPublisher, MarketDataSubscriber, MarketDataException, encode, decode,
+                        RECORD, SYMBOLS, DELTA, HEADER, FRAME)
+from ddt import ddt, data
+import simulation
+
+
+HEADER_ = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100],
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100],
+          ['JOE', 'Common', 13, '',250]]
+
+NOW = 10**18
+
+
+async def _settle(subscriber_, sequence_):
+    '''
+    Receiving until the subscriber is at the sequence number
+    '''
+    while subscriber_.sequence != sequence_:
+        await asyncio.wait_for(subscriber_.receive(), 5)
+
+
+@ddt
+class TestMarketData(unittest.TestCase):
+    def setUp(self):
+        self.engine = Engine(HEADER_, STOCKS, clock_=EventClock(NOW))
+
+    def testEncoding(self):
+        records = np.zeros(2, RECORD)
+        records['id'] = [0, 3]
+        records['vwsp'] = [100.5, 20.0]
+        records['pe_ratio'] = [0.0, 1.5]
+        frame = encode(DELTA, 7, NOW, 42.5, records)
+        self.assertEqual(len(frame), FRAME.size + HEADER.size + 2 * 34)
+        message = decode(frame[FRAME.size:])
+        self.assertEqual((message.kind, message.sequence, message.time, message.gbce), (DELTA, 7, NOW, 42.5))
+        self.assertEqual(message.records[3].vwsp, 20.0)
+        self.assertEqual(message.records[3].pe_ratio, 1.5)
+        symbols = decode(encode(SYMBOLS, 1, NOW, 0.0, [(0, 'TEA'), (1, 'GIN')])[FRAME.size:])
+        self.assertEqual(symbols.records, {0: 'TEA', 1: 'GIN'})
+        symbols = decode(encode(SYMBOLS, 1, NOW, 0.0, [(0, 'ÉTÉ'), (1, 'X' * 255)])[FRAME.size:])
+        self.assertEqual(symbols.records, {0: 'ÉTÉ', 1: 'X' * 255})
+        with self.assertRaises(MarketDataException):
+            encode(SYMBOLS, 1, NOW, 0.0, [(0, 'É' * 128)])
+        with self.assertRaises(MarketDataException):
+            decode(frame[FRAME.size:-1])
+        with self.assertRaises(MarketDataException):
+            decode(b'\x09' + frame[FRAME.size + 1:])
+
+    def testTick(self):
+        publisher = MarketDataPublisher(self.engine.trades)
+        self.assertIsNone(publisher.tick())
+        self.engine.add('TEA', NOW - 10**9, 10, Trade.BUY, 100)
+        self.engine.add('POP', NOW - 10**9, 10, Trade.BUY, 200)
+        self.assertEqual(publisher.publish(), 2)
+        self.assertEqual(publisher.publish(), 0)
+        self.engine.add('POP', NOW, 30, Trade.SELL, 100)
+        frames = publisher.tick()
+        message = decode(frames[FRAME.size:])
+        self.assertEqual(message.kind, DELTA)
+        self.assertEqual(list(message.records), [1])
+        self.assertEqual(message.records[1].vwsp, 125.0)
+        self.assertEqual(message.records[1].price, 100.0)
+        self.assertEqual(message.records[1].pe_ratio, 12.5)
+        self.assertEqual(message.records[1].dividend_yield, 0.08)
+
+    @data(False, True)
+    def testSubscribers(self, unix_):
+        async def run(address_):
+            publisher = MarketDataPublisher(self.engine.trades)
+            self.engine.add('TEA', NOW, 10, Trade.BUY, 100)
+            publisher.publish()
+            address = await publisher.serve(address_)
+            subscribers = [await MarketDataSubscriber().connect(address) for _ in range(3)]
+            for subscriber in subscribers:
+                await _settle(subscriber, 1)
+            self.engine.add('GIN', NOW, 10, Trade.BUY, 120)
+            self.engine.add('TEA', NOW, 30, Trade.BUY, 200)
+            publisher.publish()
+            for subscriber in subscribers:
+                await _settle(subscriber, 2)
+            self.assertEqual(len(publisher), 3)
+            await subscribers[0].close()
+            await publisher.close()
+            self.assertIsNone(await subscribers[1].receive())
+            return publisher, subscribers
+
+        with tempfile.TemporaryDirectory() as directory:
+            publisher, subscribers = asyncio.run(run(os.path.join(directory, 'md.sock') if unix_ else ('127.0.0.1', 0)))
+        for subscriber in subscribers:
+            self.assertEqual(set(subscriber.quotes), {'TEA', 'GIN'})
+            self.assertEqual(subscriber.quotes['TEA'].vwsp, 175.0)
+            self.assertEqual(subscriber.quotes['TEA'].price, 200.0)
+            self.assertAlmostEqual(subscriber.gbce, self.engine.trades.gbce_all_share_index())
+            self.assertEqual(subscriber.gaps, 0)
+        self.assertEqual((publisher.snapshots, publisher.skipped), (3, 0))
+
+    def testSlowSubscriber(self):
+        stocks = simulation.synthetic_stocks(200)
+        symbols = [stock[0] for stock in stocks]
+        engine = Engine(simulation.HEADER, stocks, clock_=EventClock(NOW))
+
+        def trade(price_):
+            engine.add_many(symbols, [NOW] * len(symbols), [10] * len(symbols), [Trade.BUY] * len(symbols),
+                            [price_] * len(symbols))
+            publisher.publish()
+
+        async def run(address_):
+            address = await publisher.serve(address_)
+            subscriber = await MarketDataSubscriber().connect(address)
+            while not len(publisher):
+                await asyncio.sleep(0.001)
+            price = 100
+            # the subscriber does not read until the socket buffers are full
+            while not publisher.skipped:
+                trade(price)
+                price += 1
+                await asyncio.sleep(0)
+            while publisher.snapshots < 2:
+                trade(price)
+                price += 1
+                for _ in range(10):
+                    await asyncio.wait_for(subscriber.receive(), 5)
+            while subscriber.quotes[symbols[0]].price != price - 1:
+                await asyncio.wait_for(subscriber.receive(), 5)
+            await subscriber.close()
+            await publisher.close()
+            return subscriber, price - 1
+
+        publisher = MarketDataPublisher(engine.trades, buffer_size_=1)
+        with tempfile.TemporaryDirectory() as directory:
+            subscriber, price = asyncio.run(run(os.path.join(directory, 'md.sock')))
+        self.assertGreater(publisher.skipped, 0)
+        self.assertEqual(publisher.snapshots, 2)
+        self.assertEqual(subscriber.gaps, 0)
+        self.assertEqual(len(subscriber.quotes), len(symbols))
+        self.assertTrue(all(quote.price == price for quote in subscriber.quotes.values()))
+
+    def testTooLongSymbol(self):
+        with self.assertRaises(MarketDataException):
+            MarketDataPublisher(Engine(HEADER_, [['X' * 256, 'Common', 0, '', 100]]).trades)
+        publisher = MarketDataPublisher(self.engine.trades)
+        self.engine.stocks.create_stocks('Common', symbol_='É' * 128, last_dividend_=0, par_value_=100)
+        self.engine.add('TEA', NOW, 10, Trade.BUY, 100)
+        self.engine.add('É' * 128, NOW, 10, Trade.BUY, 100)
+        with self.assertRaises(MarketDataException):
+            publisher.tick()
+
+    def testFalseParameters(self):
+        with self.assertRaises(MarketDataException):
+            MarketDataPublisher(self.engine.trades, max_rate_=0)
+        async def run():
+            publisher = MarketDataPublisher(self.engine.trades)
+            address = await publisher.serve(('127.0.0.1', 0))
+            try:
+                with self.assertRaises(MarketDataException):
+                    await publisher.serve(('127.0.0.1', 0))
+            finally:
+                await publisher.close()
+            with self.assertRaises(MarketDataException):
+                await MarketDataSubscriber().connect(address)
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+from pandas import Timestamp
+from metrics import Histogram, Metrics, MetricsException, dump
+from trades import Trade, TradeManager, TradeManagerException
+from stocks import StockManager
+from index import AllShareIndex
+from ddt import ddt, data, unpack
+
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100],
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100],
+          ['JOE', 'Common', 13, '',250]]
+
+
+@ddt
+class TestMetrics(unittest.TestCase):
+    @data((0.5, 1e-3), (0.9, 1e-3), (0.99, 0.1), (1.0, 0.1))
+    @unpack
+    def testHistogramQuantile(self, quantile_, expected_):
+        histogram = Histogram()
+        for _ in range(95):
+            histogram.observe(0.0007)
+        for _ in range(5):
+            histogram.observe(0.07)
+        self.assertEqual(histogram.count, 100)
+        self.assertAlmostEqual(histogram.quantile(quantile_), expected_ if expected_ < 0.1 else 0.07)
+
+    def testTimed(self):
+        metrics = Metrics()
+        def divide(a_, b_):
+            return a_ / b_
+        timed = metrics.timed('divide', divide)
+        self.assertEqual(timed(6, 3), 2)
+        with self.assertRaises(ZeroDivisionError):
+            timed(1, 0)
+        stats = metrics.stats()
+        self.assertEqual(stats['operations']['divide']['count'], 2)
+        self.assertEqual(stats['counters'], {'divide_errors': 1})
+
+    def testPrometheus(self):
+        metrics = Metrics()
+        metrics.observe('add', 2e-6)
+        metrics.count('vwsp_scan', 3)
+        lines = metrics.prometheus({'trades': 10}).splitlines()
+        self.assertIn('supersimplestocks_operation_seconds_bucket{operation="add",le="2.5e-06"} 1', lines)
+        self.assertIn('supersimplestocks_operation_seconds_bucket{operation="add",le="+Inf"} 1', lines)
+        self.assertIn('supersimplestocks_operation_seconds_count{operation="add"} 1', lines)
+        self.assertIn('supersimplestocks_events_total{event="vwsp_scan"} 3', lines)
+        self.assertIn('supersimplestocks_trades 10', lines)
+
+    def testDump(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'metrics.prom')
+            dump('a 1\n', path)
+            dump('a 2\n', path)
+            with open(path) as metrics_file:
+                self.assertEqual(metrics_file.read(), 'a 2\n')
+            self.assertEqual(os.listdir(directory), ['metrics.prom'])
+            with self.assertRaises(MetricsException):
+                dump('a 1\n', os.path.join(directory, 'missing', 'metrics.prom'))
+        finally:
+            shutil.rmtree(directory)
+        left, right = socket.socketpair()
+        with left, right:
+            dump('a 3\n', left)
+            self.assertEqual(right.recv(16), b'a 3\n')
+        with self.assertRaises(MetricsException):
+            dump('a 1\n', 42)
+
+
+class TestTradeManagerMetrics(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._sm = StockManager()
+        cls._sm.create_stocks_header(HEADER, STOCKS)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._sm._clear()
+
+    def tearDown(self):
+        TradeManager._clear()
+
+    def testStats(self):
+        tm = TradeManager()
+        now = Timestamp.now().value
+        stats = tm.stats()
+        self.assertEqual((stats['trades'], stats['operations'], stats['counters']), (0, {}, {}))
+
+        tm.enable_metrics()
+        tm.add(Trade('TEA', now, 10, True, 100))
+        tm.add_many(['TEA', 'XXX', 'GIN'], [now, now, now], [10, 10, 10], [True, True, False], [100, 100, 90])
+        tm.volume_weighted_stock_price(15, 'TEA')
+        tm.volume_weighted_stock_price(100, 'TEA')
+        tm.gbce_all_share_index(AllShareIndex.SESSION)
+        tm.gbce_all_share_index(AllShareIndex.SESSION)
+        with self.assertRaises(TradeManagerException):
+            tm.bars(7, now, now, 'TEA')
+
+        stats = tm.stats()
+        self.assertEqual((stats['trades'], stats['symbols']), (3, 2))
+        self.assertGreater(stats['store_bytes'], 0)
+        self.assertEqual((stats['gbce_cache_hits'], stats['gbce_cache_misses']), (1, 1))
+        self.assertEqual({name: value['count'] for name, value in stats['operations'].items()},
+                         {'add': 1, 'add_many': 1, 'volume_weighted_stock_price': 2, 'gbce_all_share_index': 2, 'bars': 1})
+        self.assertEqual(stats['counters'], {'trades_rejected': 1, 'vwsp_window': 1, 'vwsp_scan': 1, 'bars_errors': 1})
+
+        tm.disable_metrics()
+        self.assertNotIn('add', tm.__dict__)
+        tm.add(Trade('TEA', now, 10, True, 100))
+        self.assertEqual(tm.stats()['operations'], {})
+
+    def testDumpMetrics(self):
+        tm = TradeManager()
+        tm.enable_metrics()
+        tm.add(Trade('TEA', Timestamp.now().value, 10, True, 100))
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'metrics.prom')
+            text = tm.dump_metrics(path)
+            with open(path) as metrics_file:
+                self.assertEqual(metrics_file.read(), text)
+            self.assertIn('supersimplestocks_trades 1', text.splitlines())
+            with self.assertRaises(TradeManagerException):
+                tm.dump_metrics(os.path.join(directory, 'missing', 'metrics.prom'))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+import asyncio
+import os
+import tempfile
+from pandas import Timestamp
+from trades import TradeManager
+from stocks import StockManager
+from pipeline import Pipeline, PipelineException, iterable_source, stream_source, file_source, parse_trade
+from ddt import ddt, data, unpack
+
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+          ['JOE', 'Common', 13, '',250]]
+
+
+def _trades(count_):
+    now = Timestamp.now().value
+    return [(STOCKS[i % 5][0], now - (count_ - i) * 10**6, 100 + i, i % 2, 50 + i % 13) for i in range(count_)]
+
+
+@ddt
+class TestPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._sm = StockManager()
+        cls._sm.create_stocks_header(HEADER, STOCKS)
+        
+    @classmethod
+    def tearDownClass(cls):
+        cls._sm._clear()
+        
+    def tearDown(self):
+        TradeManager._clear()
+        
+    @data((1000, 100, 10), (10, 1000, 1), (250, 7, 36))
+    @unpack
+    def testBatching(self, count_, batch_size_, batches_):
+        async def run():
+            pipeline = Pipeline(batch_size_=batch_size_, batch_timeout_=10)
+            return [len(batch) async for batch in pipeline.batches(iterable_source(_trades(count_)))]
+        sizes = asyncio.run(run())
+        self.assertEqual(len(sizes), batches_)
+        self.assertEqual(sum(sizes), count_)
+        
+    def testBackpressureAndConflation(self):
+        trades = _trades(500) + [('TEA1', 0, 1, 1, 1)]
+        
+        async def run():
+            pipeline = Pipeline(batch_size_=50)
+            slow = pipeline.subscribe(maxsize_=1)
+            conflating = pipeline.subscribe(maxsize_=2, conflate_=True)
+            
+            async def consume():
+                updates = []
+                async for update in slow:
+                    updates.append(update)
+                    await asyncio.sleep(0.001)
+                return updates
+            
+            consumer = asyncio.ensure_future(consume())
+            ingested = await pipeline.run(iterable_source(trades))
+            updates = await consumer
+            late = [update async for update in conflating]
+            return ingested, updates, late, conflating.dropped
+        
+        ingested, updates, late, dropped = asyncio.run(run())
+        self.assertEqual(ingested, 500)
+        self.assertEqual(len(TradeManager()), 500)
+        self.assertEqual(sum(update.trades for update in updates), 500)
+        self.assertEqual(sum(update.rejected for update in updates), 1)
+        self.assertEqual(len(late), 1)
+        self.assertGreater(dropped, 0)
+        self.assertAlmostEqual(updates[-1].gbce, TradeManager().gbce_all_share_index())
+        self.assertAlmostEqual(updates[-1].vwsp['TEA'], TradeManager().volume_weighted_stock_price(15, 'TEA'))
+        self.assertAlmostEqual(updates[-1].dividend_yield['ALE'], self._sm['ALE'].dividend_yield(trades[-4][4]))
+        
+    def testStreamAndFileSource(self):
+        lines = ''.join('{0},{1},{2},{3},{4}\n'.format(*trade) for trade in _trades(20)) + 'bad line\n'
+        
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(lines.encode())
+            reader.feed_eof()
+            streamed = await Pipeline().run(stream_source(reader))
+            with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+                f.write(lines)
+            try:
+                TradeManager._clear()
+                read = await Pipeline().run(file_source(f.name))
+            finally:
+                os.remove(f.name)
+            return streamed, read
+        
+        self.assertEqual(asyncio.run(run()), (20, 20))
+        
+    @data(('TEA,1000,10,1,20', ('TEA', 1000, '10', True, '20')),
+          (b'ALE, 2015-JAN-21 00:12:11, 5, 0, 7', ('ALE', '2015-JAN-21 00:12:11', '5', False, '7')),
+          ('POP,1000,10,sell,20', ('POP', 1000, '10', False, '20')),
+          ('POP,1000,10,S,20', ('POP', 1000, '10', False, '20')),
+          ('POP,1000,10,FALSE,20', ('POP', 1000, '10', False, '20')),
+          ('POP,1000,10,Buy,20', ('POP', 1000, '10', True, '20')),
+          ('POP,1000,10,x,20', ('POP', 1000, '10', None, '20')),
+          ('GIN', ('GIN', '', '', None, '')))
+    @unpack
+    def testParseTrade(self, line_, expected_):
+        self.assertEqual(parse_trade(line_), expected_)
+        
+    def testUnknownSideAndMarketPrice(self):
+        now = Timestamp.now().value
+        update = Pipeline().ingest([('TEA', now, 10, True, 120), ('TEA', now - 10**9, 10, True, 80), 
+                                    ('TEA', now, 10, None, 90)])
+        self.assertEqual((update.trades, update.rejected), (2, 1))
+        self.assertEqual(len(TradeManager()), 2)
+        self.assertEqual(update.pe_ratio['TEA'], self._sm['TEA'].pe_ratio(120))
+        
+    def testCloseTimeout(self):
+        async def run():
+            pipeline = Pipeline(batch_size_=10)
+            pipeline.CLOSE_TIMEOUT = 0.01
+            stopping = pipeline.subscribe(maxsize_=1)
+            
+            async def consume():
+                # the subscriber stops reading before the last update
+                return [await stopping.get(), await stopping.get()]
+            
+            consumer = asyncio.ensure_future(consume())
+            ingested = await pipeline.run(iterable_source(_trades(30)))
+            return ingested, len(await consumer), [update async for update in stopping], stopping.dropped
+        
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), 5)), (30, 2, [], 1))
+        
+    def testFalseBatchSize(self):
+        with self.assertRaises(PipelineException):
+            Pipeline(batch_size_=0)
+        
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+from zlib import crc32
+import numpy as np
+from pandas import Timestamp
+from trades import TradeManager
+from stocks import StockManager
+from index import AllShareIndex
+from sharding import ShardedEngine, ShardedEngineException
+from clock import EventClock
+from ddt import ddt, data, unpack
+
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+          ['JOE', 'Common', 13, '',250]]
+SYMBOLS = [stock[0] for stock in STOCKS]
+
+
+@ddt
+class TestShardedEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._sm = StockManager()
+        cls._sm.create_stocks_header(HEADER, STOCKS)
+        
+    @classmethod
+    def tearDownClass(cls):
+        cls._sm._clear()
+        
+    def tearDown(self):
+        TradeManager._clear()
+        
+    @staticmethod
+    def _batches(seed_, count_=4, size_=500):
+        '''
+        Batches of trades in the last 10 seconds, out of order, with some invalid trades
+        '''
+        rng = np.random.default_rng(seed_)
+        now = Timestamp.now().value
+        batches = []
+        for _ in range(count_):
+            symbols = rng.choice(SYMBOLS + ['XXX'], size_).tolist()
+            timestamps = (now - rng.integers(0, 10 * 10**9, size_)).tolist()
+            quantities = rng.integers(-5, 2000, size_).tolist()
+            trade_prices = rng.integers(1, 1000, size_).tolist()
+            batches.append(list(zip(symbols, timestamps, quantities, [True] * size_, trade_prices)))
+        return batches
+
+    @data((1, 0), (2, 1), (3, 2), (4, 3))
+    @unpack
+    def testMatchesSingleProcess(self, workers_, seed_):
+        tm = TradeManager()
+        with ShardedEngine(workers_, HEADER, STOCKS) as engine:
+            for batch in self._batches(seed_):
+                self.assertEqual(engine.add_many(batch).tolist(), tm.add_many(batch).tolist())
+            self.assertEqual(len(engine), len(tm))
+            
+            for interval in (15, 60, 100):
+                self.assertEqual(engine.volume_weighted_stock_price(interval), tm.volume_weighted_stock_price(interval))
+                for symbol in SYMBOLS + ['XXX']:
+                    self.assertEqual(engine.volume_weighted_stock_price(interval, symbol), 
+                                     tm.volume_weighted_stock_price(interval, symbol))
+            for mode in (AllShareIndex.SESSION, AllShareIndex.LATEST):
+                self.assertEqual(engine.gbce_all_share_index(mode), tm.gbce_all_share_index(mode))
+            for interval in (60, 100):
+                self.assertEqual(engine.gbce_all_share_index(AllShareIndex.WINDOW, interval), 
+                                 tm.gbce_all_share_index(AllShareIndex.WINDOW, interval))
+            
+            engine.register_window(100)
+            tm.register_window(100)
+            self.assertEqual(engine.volume_weighted_stock_price(100), tm.volume_weighted_stock_price(100))
+            self.assertEqual(engine.gbce_all_share_index(AllShareIndex.WINDOW, 100), 
+                             tm.gbce_all_share_index(AllShareIndex.WINDOW, 100))
+
+    def testEventClock(self):
+        '''
+        A historical session is evaluated at the time of its latest trade in every worker
+        '''
+        tm = TradeManager()
+        tm.set_clock(EventClock())
+        shift = Timestamp.now().value - Timestamp('2015-01-21').value
+        with ShardedEngine(2, HEADER, STOCKS, clock_=EventClock()) as engine:
+            for batch in self._batches(4, 2):
+                batch = [(symbol, timestamp - shift) + tuple(rest) for symbol, timestamp, *rest in batch]
+                engine.add_many(batch)
+                tm.add_many(batch)
+            self.assertEqual(engine.now(), tm.now())
+            for interval in (15, 5, 100):
+                self.assertGreater(tm.volume_weighted_stock_price(interval), 0)
+                self.assertEqual(engine.volume_weighted_stock_price(interval), tm.volume_weighted_stock_price(interval))
+            self.assertEqual(engine.gbce_all_share_index(AllShareIndex.WINDOW, 5), 
+                             tm.gbce_all_share_index(AllShareIndex.WINDOW, 5))
+
+    def testTickSize(self):
+        tm = TradeManager()
+        tm.set_tick_size('0.25')
+        batch = [(symbol, timestamp, quantity, buy_or_sell, price / 4) for symbol, timestamp, quantity, buy_or_sell, price in self._batches(5, 1)[0]]
+        with ShardedEngine(2, HEADER, STOCKS, tick_size_='0.25') as engine:
+            self.assertEqual(engine.add_many(batch).tolist(), tm.add_many(batch).tolist())
+            self.assertEqual(engine.volume_weighted_stock_price(15), tm.volume_weighted_stock_price(15))
+            self.assertEqual(engine.gbce_all_share_index(), tm.gbce_all_share_index())
+        with self.assertRaises(ShardedEngineException):
+            ShardedEngine(1, HEADER, STOCKS, tick_size_='x')
+
+    def testRouting(self):
+        with ShardedEngine(3, HEADER, STOCKS) as engine:
+            self.assertEqual([engine.shard_of(symbol) for symbol in SYMBOLS], 
+                             [crc32(symbol.encode()) % 3 for symbol in SYMBOLS])
+        
+    @data(0, -1)
+    def testInvalidWorkers(self, workers_):
+        with self.assertRaises(ShardedEngineException):
+            ShardedEngine(workers_, HEADER, STOCKS)
+            
+    def testClosed(self):
+        engine = ShardedEngine(1, HEADER, STOCKS)
+        engine.close()
+        with self.assertRaises(ShardedEngineException):
+            engine.gbce_all_share_index()
+
+
+if __name__ == "__main__":
+    unittest.main()
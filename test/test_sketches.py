@@ -0,0 +1,133 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+import numpy as np
+from sketches import QuantileSketch, Moments, PriceStatistics, SketchException
+from trades import Trade, TradeManager, TradeManagerException
+from stocks import StockManager
+from clock import EventClock
+from ddt import ddt, data, unpack
+
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+          ['JOE', 'Common', 13, '',250]]
+
+
+@ddt
+class TestSketches(unittest.TestCase):
+    def _assertRankError(self, sketch_, values_, error_=0.02):
+        ordered = np.sort(values_)
+        for quantile in (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99):
+            rank = np.searchsorted(ordered, sketch_.quantile(quantile), 'right') / len(ordered)
+            self.assertLess(abs(rank - quantile), error_)
+    
+    @data((0, 1), (1, 1000), (2, 100000))
+    @unpack
+    def testQuantiles(self, seed_, batch_):
+        values = np.random.default_rng(seed_).lognormal(4, 1, 100000)
+        sketch = QuantileSketch()
+        for start in range(0, len(values), batch_):
+            if batch_ == 1:
+                sketch.update(values[start])
+            else:
+                sketch.update_many(values[start:start + batch_])
+        self.assertEqual(sketch.count, len(values))
+        self.assertLess(len(sketch), 3 * sketch.k + 64)
+        self.assertEqual((sketch.quantile(0), sketch.quantile(1)), (values.min(), values.max()))
+        self._assertRankError(sketch, values)
+        
+    def testMerge(self):
+        rng = np.random.default_rng(3)
+        parts = [rng.normal(i, 1, 20000) for i in range(5)]
+        merged = QuantileSketch()
+        for part in parts:
+            sketch = QuantileSketch()
+            sketch.update_many(part)
+            merged.merge(sketch)
+        self._assertRankError(merged, np.concatenate(parts))
+        
+    def testExactWhileSmall(self):
+        sketch = QuantileSketch()
+        sketch.update_many([5, 1, 4, 2, 3])
+        self.assertEqual([sketch.quantile(q) for q in (0.2, 0.5, 0.9)], [1, 3, 5])
+        self.assertTrue(np.isnan(QuantileSketch().quantile(0.5)))
+        with self.assertRaises(SketchException):
+            sketch.quantile(2)
+            
+    def testMoments(self):
+        values = np.random.default_rng(4).normal(1e6, 0.01, 10000)
+        moments, merged = Moments(), Moments()
+        for value in values[:5000].tolist():
+            moments.update(value)
+        other = Moments()
+        other.update_many(values[5000:])
+        merged.merge(moments)
+        merged.merge(other)
+        self.assertEqual(merged.count, len(values))
+        self.assertAlmostEqual(merged.mean, values.mean())
+        self.assertAlmostEqual(merged.variance() / values.var(ddof=1), 1.0, places=6)
+        
+    def testBucketsAndHorizon(self):
+        statistics = PriceStatistics(60, 120)
+        statistics.add('TEA', 0, 1, 100)
+        statistics.add_many('TEA', np.array([61, 62, 130]) * 10**9, np.array([1, 2, 3]), np.array([110, 121, 100]))
+        prices, quantities, returns = statistics.statistics('TEA', 0, 200 * 10**9)
+        self.assertEqual(prices.count, 4)
+        self.assertEqual(returns.count, 3)
+        self.assertAlmostEqual(returns.mean, np.log(100 / 100) / 3)
+        self.assertEqual(statistics.statistics('TEA', 60 * 10**9, 61 * 10**9)[1].quantile(1), 2)
+        statistics.add('TEA', 250 * 10**9, 1, 100)
+        self.assertEqual(statistics.statistics('TEA', 0, 400 * 10**9)[0].count, 2)
+        statistics.add('TEA', 0, 1, 100)
+        self.assertEqual(statistics.statistics('TEA', 0, 400 * 10**9)[0].count, 2)
+        
+    @data((0, 60), (60, 30), ('x', 60))
+    @unpack
+    def testNonValidBuckets(self, bucket_, horizon_):
+        with self.assertRaises(SketchException):
+            PriceStatistics(bucket_, horizon_)
+
+
+class TestTradeManagerStatistics(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._sm = StockManager()
+        cls._sm.create_stocks_header(HEADER, STOCKS)
+        
+    @classmethod
+    def tearDownClass(cls):
+        cls._sm._clear()
+        
+    def tearDown(self):
+        TradeManager._clear()
+        
+    def testPriceStatistics(self):
+        tm = TradeManager()
+        tm.set_clock(EventClock())
+        base = 10**18 - 10**18 % (60 * 10**9)
+        prices = [100, 102, 101, 105, 99]
+        tm.add(Trade('TEA', base, 10, Trade.BUY, prices[0]))
+        tm.add_many(['TEA'] * 4 + ['ALE'], [base + i * 10**9 for i in range(1, 5)] + [base], [20, 30, 40, 50, 1], 
+                    [Trade.BUY] * 5, prices[1:] + [7])
+        statistics = tm.price_statistics(60, 'TEA', (0.2, 0.5, 1))
+        self.assertEqual(statistics['trades'], 5)
+        self.assertEqual(statistics['price'], {0.2: 99, 0.5: 101, 1: 105})
+        self.assertEqual(statistics['quantity'][0.5], 30)
+        log_returns = np.diff(np.log(prices))
+        self.assertAlmostEqual(statistics['volatility'], log_returns.std(ddof=1))
+        self.assertAlmostEqual(statistics['mean_log_return'], log_returns.mean())
+        self.assertEqual(tm.price_statistics(60, 'XXX')['trades'], 0)
+        for interval in (0, 3601, 'x'):
+            with self.assertRaises(TradeManagerException):
+                tm.price_statistics(interval, 'TEA')
+        with self.assertRaises(TradeManagerException):
+            tm.price_statistics(60, 'TEA', (1.5,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy as np
+from pandas import Timestamp
+import snapshot
+from snapshot import SnapshotException
+from trades import TradeManager, TradeManagerException
+from stocks import StockManager
+from index import AllShareIndex
+from ddt import ddt, data, unpack
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+HEADER = ['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_']
+STOCKS = [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+          ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+          ['JOE', 'Common', 13, '',250]]
+SYMBOLS = [stock[0] for stock in STOCKS]
+
+
+@ddt
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        StockManager().create_stocks_header(HEADER, STOCKS)
+        self._directory = tempfile.mkdtemp()
+        
+    def tearDown(self):
+        TradeManager._clear()
+        StockManager._clear()
+        shutil.rmtree(self._directory)
+        
+    @staticmethod
+    def _fill(seed_, size_=1000):
+        rng = np.random.default_rng(seed_)
+        now = Timestamp.now().value
+        tm = TradeManager()
+        tm.add_many(rng.choice(SYMBOLS, size_), now - rng.integers(0, 60 * 10**9, size_), 
+                    rng.integers(1, 1000, size_), rng.integers(0, 2, size_).astype(bool), rng.integers(1, 500, size_))
+        return tm
+    
+    @staticmethod
+    def _history(trade_manager_):
+        return {key: value.tolist() for key, value in trade_manager_.trades_between(0, 2**62).items()}
+        
+    def _roundTrip(self, format_, chunk_size_, seed_):
+        tm = self._fill(seed_)
+        history = self._history(tm)
+        gbce = tm.gbce_all_share_index(AllShareIndex.LATEST)
+        path = os.path.join(self._directory, 'trades.' + format_)
+        self.assertEqual(tm.export(path, chunk_size_=chunk_size_), 1000)
+        
+        TradeManager._clear()
+        StockManager._clear()
+        tm = TradeManager()
+        self.assertEqual(tm.import_(path), 1000)
+        self.assertEqual(StockManager().stocks_header(), (HEADER, STOCKS))
+        self.assertEqual(self._history(tm), history)
+        self.assertEqual(tm.gbce_all_share_index(AllShareIndex.LATEST), gbce)
+        return path
+    
+    @data((1000, 0, 1), (300, 1, 4), (1, 2, 1000))
+    @unpack
+    def testNpzRoundTrip(self, chunk_size_, seed_, chunks_):
+        path = self._roundTrip(snapshot.NPZ, chunk_size_, seed_)
+        chunks = list(snapshot.read_chunks(path))
+        self.assertEqual(len(chunks), chunks_)
+        self.assertEqual(chunks[0]['symbol_id'].dtype, np.int32)
+        
+    @unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+    @data((1000, 0), (300, 1))
+    @unpack
+    def testParquetRoundTrip(self, chunk_size_, seed_):
+        self._roundTrip(snapshot.PARQUET, chunk_size_, seed_)
+        
+    @unittest.skipIf(pyarrow, 'pyarrow is installed')
+    def testParquetWithoutPyarrow(self):
+        with self.assertRaises(TradeManagerException):
+            self._fill(0).export(os.path.join(self._directory, 'trades.parquet'))
+        
+    def testTickSize(self):
+        tm = TradeManager()
+        tm.set_tick_size('0.0001')
+        tm.add_many(['TEA', 'POP', 'GIN'], [10**18] * 3, [10, 20, 30], [True] * 3, [100.1234, '99.9999', 7])
+        path = os.path.join(self._directory, 'trades.npz')
+        tm.export(path)
+        self.assertEqual(snapshot.read_tick_size(path), '0.0001')
+        self.assertEqual(next(snapshot.read_chunks(path))['trade_price'].tolist(), [1001234, 999999, 70000])
+        
+        TradeManager._clear()
+        StockManager._clear()
+        tm = TradeManager()
+        tm.set_tick_size('0.01')
+        self.assertEqual(tm.import_(path), 1)
+        self.assertEqual(tm.trades_between(0, 2**62)['trade_price'].tolist(), [7.0])
+        TradeManager._clear()
+        StockManager._clear()
+        tm = TradeManager()
+        tm.set_tick_size('0.00005')
+        self.assertEqual(tm.import_(path), 3)
+        self.assertEqual(sorted(tm.trades_between(0, 2**62)['trade_price'].tolist()), [7.0, 99.9999, 100.1234])
+        
+    @data(('0.0001', 2**53 + 1), ('0.00005', 2 * (2**53 + 1)), ('0.0002', None))
+    @unpack
+    def testTickSizeExact(self, tick_size_, expected_):
+        '''
+        The ticks beyond the precision of a float are rescaled exactly
+        '''
+        tm = TradeManager()
+        tm.set_tick_size('0.0001')
+        tm.add_many(['TEA'], [10**18], [1], [True], ['900719925474.0993'])
+        self.assertEqual(tm.storage.trade_price[0], 2**53 + 1)
+        path = os.path.join(self._directory, 'trades.npz')
+        tm.export(path)
+        
+        TradeManager._clear()
+        StockManager._clear()
+        tm = TradeManager()
+        tm.set_tick_size(tick_size_)
+        self.assertEqual(tm.import_(path), 0 if expected_ is None else 1)
+        self.assertEqual(tm.storage.trade_price[:len(tm)].tolist(), [] if expected_ is None else [expected_])
+        
+    def testExportWithoutLock(self):
+        tm = self._fill(0)
+        write = snapshot.write
+        blocked = []
+        def writing(*args_):
+            adding = threading.Thread(target=tm.add_many, args=(['TEA'], [Timestamp.now().value], [10], [True], [100]))
+            adding.start()
+            adding.join(5)
+            blocked.append(adding.is_alive())
+            return write(*args_)
+        snapshot.write = writing
+        try:
+            self.assertEqual(tm.export(os.path.join(self._directory, 'trades.npz')), 1000)
+        finally:
+            snapshot.write = write
+        self.assertEqual(blocked, [False])
+        self.assertEqual(len(tm), 1001)
+        
+    def testEmpty(self):
+        path = os.path.join(self._directory, 'empty.npz')
+        self.assertEqual(TradeManager().export(path), 0)
+        self.assertEqual(TradeManager().import_(path), 0)
+    
+    @data('trades.csv', 'trades')
+    def testUnknownFormat(self, file_name_):
+        with self.assertRaises(TradeManagerException):
+            TradeManager().export(os.path.join(self._directory, file_name_))
+        with self.assertRaises(SnapshotException):
+            snapshot.read_reference(os.path.join(self._directory, file_name_))
+    
+    def testMissingFile(self):
+        with self.assertRaises(TradeManagerException):
+            TradeManager().import_(os.path.join(self._directory, 'missing.npz'))
+
+
+if __name__ == "__main__":
+    unittest.main()
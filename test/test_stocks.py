@@ -4,7 +4,8 @@ Created on 10 May 2018
 @author: agocsi
 '''
 import unittest
-from stocks import StockManager, CommonStock, PreferredStock, Stock
+from io import StringIO
+from stocks import StockManager, StockManagerException, CommonStock, PreferredStock, Stock
 from ddt import ddt, data, unpack
 
 @ddt
@@ -36,18 +37,34 @@ class Test(unittest.TestCase):
     @data(('TEA',0,100,100, 0),
           ('POP',8,100,100, 0.08),
           ('ALE',23,60,100, 0.23),
-          ('JOE',13,250,100, 0.13))
+          ('JOE',13,250,100, 0.13),
+          ('POP',8,100,'100', 0.08),
+          ('POP',8,100,'0', 0))
     @unpack
     def test_dividend_yield_common(self, symbol_, last_dividend_, par_value_, price_, expected_value_):
         c = CommonStock(symbol_, last_dividend_, par_value_)
         self.assertEqual(c.dividend_yield(price_), expected_value_)
         
-    @data(('GIN',8, 0.02, 100, 100, 0.02),)
+    @data(('GIN',8, 0.02, 100, 100, 0.02),
+          ('GIN',8, 0.02, 100, '100', 0.02))
     @unpack
     def test_dividend_yield_preferred(self, symbol_, last_dividend_, fixed_dividend_, par_value_, price_, expected_value_):
         c = PreferredStock(symbol_, last_dividend_, fixed_dividend_, par_value_)
         self.assertEqual(c.dividend_yield(price_), expected_value_)
         
+    @data(('TEA',0,100,'100', 0),
+          ('POP',8,100,100, 12.5),
+          ('POP',8,100,'100.5', 100.5 / 8),
+          ('POP',8,100,100.5, 100.5 / 8))
+    @unpack
+    def test_pe_ratio(self, symbol_, last_dividend_, par_value_, price_, expected_value_):
+        c = CommonStock(symbol_, last_dividend_, par_value_)
+        self.assertEqual(c.pe_ratio(price_), expected_value_)
+        
+    def test_false_market_price(self):
+        with self.assertRaises(ValueError):
+            CommonStock('POP', 8, 100).pe_ratio('x')
+        
     def test_stock_manager_singleton(self):
         sm1 = StockManager()
         sm2 = StockManager()
@@ -89,6 +106,71 @@ class Test(unittest.TestCase):
         sm.create_stocks(type_, **value)
         self.assertTrue(len(sm)==1)
         
+    @data([100, 100, 100, 100, 100],
+          [0, 57.5, 1, 1000.9, 3],
+          {'GIN': 10, 'TEA': 0, 'ALE': 43.2})
+    def test_batch_dividend_yields_and_pe_ratios(self, market_prices_):
+        StockManager._clear()
+        sm = StockManager()
+        sm.create_stocks_header(['symbol_', 'type', 'last_dividend_', 'fixed_dividend_', 'par_value_'],
+                                [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+                                 ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+                                 ['JOE', 'Common', 13, '',250]])
+        priced = market_prices_ if isinstance(market_prices_, dict) else dict(zip(sm.symbols, market_prices_))
+        yields = sm.dividend_yields(market_prices_)
+        pe_ratios = sm.pe_ratios(market_prices_)
+        for i, (symbol, price) in enumerate(priced.items()):
+            self.assertAlmostEqual(yields[i], sm[symbol].dividend_yield(price))
+            self.assertAlmostEqual(pe_ratios[i], sm[symbol].pe_ratio(price))
+        StockManager._clear()
+        
+    @data([100, 100], {'TEA1': 100})
+    def test_batch_false_market_prices(self, market_prices_):
+        StockManager._clear()
+        sm = StockManager()
+        sm.create_stocks('Common', symbol_='TEA', last_dividend_=0, par_value_=100)
+        with self.assertRaises(StockManagerException):
+            sm.dividend_yields(market_prices_)
+        StockManager._clear()
+        
+    @data('symbol_,type,last_dividend_,fixed_dividend_,par_value_\n'
+          'TEA,Common,0,,100\nPOP,Common,8,,100\nALE,common,23,,60\nGIN,Preferred,8,0.02,100\nJOE,Common,13,,250\n',
+          'type,par_value_,symbol_,fixed_dividend_,last_dividend_\n'
+          'Common,100,TEA,,0\nCommon,100,POP,,8\n\nCOMMON,60,ALE,,23\nPreferred,100,GIN,0.02,8\nCommon,250,JOE,,13\n')
+    def test_load_csv(self, csv_):
+        StockManager._clear()
+        sm = StockManager()
+        self.assertEqual(sm.load_csv(StringIO(csv_)), 5)
+        self.assertEqual(sm.stocks_header()[1], [['TEA', 'Common', 0, '', 100], ['POP', 'Common', 8, '', 100], 
+                                                 ['ALE', 'Common', 23, '', 60], ['GIN', 'Preferred', 8, 0.02, 100], 
+                                                 ['JOE', 'Common', 13, '', 250]])
+        self.assertAlmostEqual(sm.dividend_yields({'GIN': 10})[0], sm['GIN'].dividend_yield(10))
+        StockManager._clear()
+        
+    def test_load_csv_bad_rows(self):
+        StockManager._clear()
+        sm = StockManager()
+        sm.create_stocks('Common', symbol_='TEA', last_dividend_=0, par_value_=100)
+        csv = ('symbol_,type,last_dividend_,fixed_dividend_,par_value_\n'
+               'POP,Common,8,,100\n,Common,8,,100\nALE,Ordinary,23,,60\nGIN,Preferred,8,,100\n'
+               'JOE,Common,1.5,,x\nPOP,Common,8,0.1,100\n')
+        with self.assertRaises(StockManagerException) as context:
+            sm.load_csv(StringIO(csv))
+        message = str(context.exception)
+        for line in ('line 3: empty symbol', 'line 4: unknown type', 'line 5: non-valid fixed_dividend_', 
+                     'line 6: non-valid last_dividend_, non-valid par_value_', 
+                     'line 7: duplicated symbol, fixed_dividend_ of a common stock'):
+            self.assertIn(line, message)
+        self.assertNotIn('line 2', message)
+        self.assertEqual(list(sm), ['TEA'])
+        StockManager._clear()
+        
+    def test_load_csv_missing_column(self):
+        StockManager._clear()
+        with self.assertRaises(StockManagerException):
+            StockManager().load_csv(StringIO('symbol_,type,last_dividend_\nTEA,Common,0\n'))
+        StockManager._clear()
+        
 
         
 
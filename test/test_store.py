@@ -0,0 +1,93 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+from store import TradeStore, TradeStoreException
+import numpy as np
+from ddt import ddt, data, unpack
+
+
+@ddt
+class TestTradeStore(unittest.TestCase):
+
+    @data(1, 3, 1024)
+    def testGrowing(self, capacity_):
+        ts = TradeStore(capacity_)
+        for i in range(2000):
+            ts.append(i, 'TEA' if i % 2 else 'ALE', i + 1, i % 2 == 0, 100 + i)
+        self.assertEqual(len(ts), 2000)
+        self.assertGreaterEqual(ts.capacity, 2000)
+        self.assertEqual(list(ts.timestamp[:3]), [0, 1, 2])
+        self.assertEqual(list(ts.quantity[-2:]), [1999, 2000])
+        self.assertEqual(ts.symbols, ['ALE', 'TEA'])
+        self.assertEqual(list(ts.symbol_ids[:4]), [0, 1, 0, 1])
+
+    def testReadOnlyColumns(self):
+        ts = TradeStore()
+        ts.append(1, 'TEA', 10, True, 100)
+        with self.assertRaises(ValueError):
+            ts.quantity[0] = 5
+
+    @data(('TEA', 0), ('ALE', 1))
+    @unpack
+    def testSymbolInterning(self, symbol_, id_):
+        ts = TradeStore()
+        ts.symbol_id('TEA')
+        ts.symbol_id('ALE')
+        self.assertEqual(ts.symbol_id(symbol_), id_)
+        self.assertEqual(ts.find_symbol_id(symbol_), id_)
+        self.assertIsNone(ts.find_symbol_id('GIN'))
+
+    @data(0, 1, 5)
+    def testTimeOrder(self, seed_):
+        rng = np.random.default_rng(seed_)
+        timestamps = np.arange(300) * 10 + rng.integers(-25, 25, 300)
+        symbols = rng.choice(['TEA', 'ALE', 'GIN'], 300)
+        ts = TradeStore(4)
+        for timestamp, symbol in zip(timestamps[:100].tolist(), symbols[:100].tolist()):
+            ts.append(timestamp, symbol, timestamp + 1, True, 1)
+        for batch in (slice(100, 200), slice(200, 300)):
+            ts.extend(timestamps[batch], [ts.symbol_id(symbol) for symbol in symbols[batch].tolist()], 
+                      timestamps[batch] + 1, np.ones(100, dtype=bool), np.ones(100))
+        self.assertEqual(ts.timestamp.tolist(), sorted(timestamps.tolist()))
+        self.assertEqual((ts.quantity - ts.timestamp).tolist(), [1] * 300)
+
+        for start, end in ((-100, 5000), (500, 1500), (1200, 1200)):
+            rows = ts.between(start, end)
+            expected = sorted(t for t in timestamps.tolist() if start <= t < end)
+            self.assertEqual(ts.timestamp[rows].tolist(), expected)
+            for symbol in ('TEA', 'ALE', 'GIN'):
+                rows = ts.between(start, end, ts.find_symbol_id(symbol))
+                expected = sorted(t for t, s in zip(timestamps.tolist(), symbols.tolist()) if s == symbol and start <= t < end)
+                self.assertEqual(ts.timestamp[rows].tolist(), expected)
+                self.assertTrue(all(ts.symbols[i] == symbol for i in ts.symbol_ids[rows]))
+
+    def testCorrections(self):
+        ts = TradeStore()
+        for i in range(5):
+            ts.append(10 - i, 'TEA' if i % 2 else 'ALE', i + 1, True, 100 + i)
+        self.assertEqual(ts.next_trade_id, 5)
+        self.assertEqual(ts.trade_id.tolist(), [4, 3, 2, 1, 0])
+        self.assertEqual(ts.symbol_id_of(3), ts.find_symbol_id('TEA'))
+        self.assertEqual(ts.locate(1), 3)
+        ts.update(ts.locate(1), 20, False, 300)
+        self.assertEqual((ts.quantity[3], ts.buy_or_sell[3], ts.trade_price[3]), (20, False, 300))
+        ts.remove(ts.locate(4))
+        self.assertEqual(len(ts), 4)
+        self.assertIsNone(ts.locate(4))
+        self.assertIsNone(ts.symbol_id_of(4))
+        self.assertEqual(ts.trade_id.tolist(), [3, 2, 1, 0])
+        self.assertEqual(ts.locate(0), 3)
+        self.assertEqual(ts.trade_id[ts.latest(ts.find_symbol_id('ALE'))], 0)
+        self.assertEqual(ts.between(0, 20, ts.find_symbol_id('ALE')).tolist(), [1, 3])
+        self.assertIsNone(ts.locate(100))
+
+    def testUnknownColumn(self):
+        with self.assertRaises(TradeStoreException):
+            TradeStore().column('stock')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+from decimal import Decimal
+import numpy as np
+from ticks import TickSize, TickSizeException, exact_sum, notional_fits, INT64_MAX
+from ddt import ddt, data, unpack
+
+
+@ddt
+class TestTickSize(unittest.TestCase):
+
+    @data((1, '1'), ('0.0001', '0.0001'), (0.0001, '0.0001'), (Decimal('0.25'), '0.25'), ('1/3', '1/3'), (5, '5'))
+    @unpack
+    def testTickSize(self, tick_, expected_):
+        tick_size = TickSize(tick_)
+        self.assertEqual(str(tick_size), expected_)
+        self.assertEqual(TickSize(str(tick_size)), tick_size)
+
+    @data(0, -1, 'a', None, '1/0')
+    def testFalseTickSize(self, tick_):
+        with self.assertRaises(TickSizeException):
+            TickSize(tick_)
+
+    @data((100, 1000000), ('100.1234', 1001234), (100.1234, 1001234), (Decimal('0.0001'), 1))
+    @unpack
+    def testTicks(self, price_, expected_):
+        self.assertEqual(TickSize('0.0001').ticks(price_), expected_)
+
+    @data('100.00001', 100.00001, 'a', 2**63)
+    def testFalseTicks(self, price_):
+        with self.assertRaises(TickSizeException):
+            TickSize('0.0001').ticks(price_)
+
+    def testTicksMany(self):
+        tick_size = TickSize('0.0001')
+        ticks, valid = tick_size.ticks_many([100.1234, 0.1 + 0.2, 100.00001, np.nan, np.inf, 1e300])
+        self.assertEqual(valid.tolist(), [True, True, False, False, False, False])
+        self.assertEqual(ticks[valid].tolist(), [1001234, 3000])
+        ticks, valid = tick_size.ticks_many(np.array([1, 2**62]))
+        self.assertEqual(valid.tolist(), [True, False])
+        self.assertEqual(ticks[0], 10000)
+        ticks, valid = tick_size.ticks_many(['100.1234', '7', 'x', '0.00001'])
+        self.assertEqual(valid.tolist(), [True, True, False, False])
+        self.assertEqual(ticks[valid].tolist(), [1001234, 70000])
+        ticks, valid = TickSize(5).ticks_many(np.array(['10', '12', '15']))
+        self.assertEqual(valid.tolist(), [True, False, True])
+        self.assertEqual(ticks[valid].tolist(), [2, 3])
+
+    def testTruncate(self):
+        tick_size = TickSize('0.0001', truncate_=True)
+        self.assertNotEqual(tick_size, TickSize('0.0001'))
+        self.assertEqual(repr(tick_size), "TickSize('0.0001', truncate_=True)")
+        self.assertEqual(tick_size.ticks('100.00019'), 1000001)
+        self.assertEqual(tick_size.ticks(100.00019), 1000001)
+        ticks, valid = tick_size.ticks_many([100.1234, 100.00019, -0.00019, np.nan])
+        self.assertEqual(valid.tolist(), [True, True, True, False])
+        self.assertEqual(ticks[valid].tolist(), [1001234, 1000001, -1])
+        self.assertEqual(TickSize(5, truncate_=True).ticks_many(np.array([10, 14, -14]))[0].tolist(), [2, 2, -2])
+
+    def testRescale(self):
+        ticks = np.array([2**53 + 1, 3, 2**62])
+        rescaled, valid = TickSize('0.00005').rescale(ticks, TickSize('0.0001'))
+        self.assertEqual(valid.tolist(), [True, True, False])
+        self.assertEqual(rescaled[valid].tolist(), [2 * (2**53 + 1), 6])
+        rescaled, valid = TickSize('0.0002').rescale(ticks, TickSize('0.0001'))
+        self.assertEqual(valid.tolist(), [False, False, True])
+        self.assertEqual(rescaled[2], 2**61)
+        self.assertEqual(TickSize(1).rescale(ticks, TickSize(1))[0].tolist(), ticks.tolist())
+
+    def testPrices(self):
+        tick_size = TickSize('0.0001')
+        self.assertEqual(tick_size.price(1001234), 100.1234)
+        self.assertEqual(tick_size.prices(np.array([1001234, 1])).tolist(), [100.1234, 0.0001])
+        self.assertEqual(TickSize(5).price(3), 15)
+        self.assertEqual(TickSize(5).prices(np.array([3])).dtype, np.int64)
+        self.assertEqual(tick_size.vwap(0, 0), 0.0)
+        # 1/3 of a tick, rounded once
+        self.assertEqual(tick_size.vwap(1, 3), 1 / 30000)
+        self.assertEqual(tick_size.vwap(3 * 2**62, 3), 2**62 / 10000)
+
+    def testExactSum(self):
+        self.assertEqual(exact_sum(np.empty(0, dtype=np.int64)), 0)
+        self.assertEqual(exact_sum(np.arange(10)), 45)
+        values = np.full(1000, INT64_MAX // 3, dtype=np.int64)
+        self.assertEqual(exact_sum(values), 1000 * (INT64_MAX // 3))
+        self.assertEqual(exact_sum(np.array([INT64_MAX, INT64_MAX, -INT64_MAX])), INT64_MAX)
+
+    def testNotionalFits(self):
+        self.assertTrue(notional_fits(10, 100))
+        self.assertFalse(notional_fits(2**32, 2**32))
+        self.assertEqual(notional_fits(np.array([1, 2**40]), np.array([2**40, 2**40])).tolist(), [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
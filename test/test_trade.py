@@ -3,9 +3,15 @@ Created on 11 May 2018
 
 @author: agocsi
 '''
+import os
+import subprocess
+import sys
 import unittest
+import numpy as np
 from trades import Trade, TradeManager, TradeManagerException, TradeException
 from stocks import Stock, StockManager
+from index import AllShareIndex
+from pandas import Timestamp, Timedelta
 from ddt import ddt, data, unpack
 
 
@@ -32,6 +38,27 @@ class TestTrade(unittest.TestCase):
         t = Trade(stock_symbol_, timestamp_, quantity_, buy_or_sell_, trade_price_)
         self.assertTrue(t.valid())
 
+    def testImportWithoutPandas(self):
+        '''
+        The engine imports without pandas and without creating the singletons
+        '''
+        script = ('import sys, trades, stocks, sharding, simulation; '
+                  'print("pandas" in sys.modules, stocks.StockManager._instance, trades.TradeManager._instance)')
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(output.decode().split(), ['False', 'None', 'None'])
+    
+    def testReadCompatibility(self):
+        t = Trade('ALE', '2015-JAN-21 00:12:11', 1000, Trade.SELL, 900)
+        self.assertIs(t['stock'], self._sm['ALE'])
+        self.assertEqual(t['timestamp'], Timestamp('2015-JAN-21 00:12:11'))
+        self.assertEqual((t['quantity'], t['buy_or_sell'], t['trade_price']), (1000, Trade.SELL, 900))
+        self.assertEqual(dict(t)['quantity'], 1000)
+        self.assertEqual(t, Trade('ALE', Timestamp('2015-JAN-21 00:12:11'), 1000, Trade.SELL, 900))
+        with self.assertRaises(KeyError):
+            t['price']
+        with self.assertRaises(AttributeError):
+            t.price = 900
+
     @data(('TEA1', '2015-JAN-21 00:12:11', 1000, Trade.BUY, 1000),
           ('TEA', '2015-JAN-42 00:12:11', -111, Trade.BUY, 1000),
           ('TEA', '2015-JANUAR-21 00:12:11', 1000, Trade.BUY, 1000),
@@ -91,11 +118,187 @@ class TestTradeManager(unittest.TestCase):
         tm.add(t)
         self.assertEqual(len(tm), 1)
         
+    def testAddingManyTrades(self):
+        now = Timestamp.now()
+        rows = [('TEA', now, 100, Trade.BUY, 10),
+                ('TEA1', now, 100, Trade.BUY, 10),
+                ('ALE', now - Timedelta(seconds=5), 300, Trade.SELL, 20),
+                ('ALE', '2015-JAN-42 00:12:11', 300, Trade.SELL, 20),
+                ('ALE', now, 0, Trade.SELL, 20),
+                ('ALE', now, 'a', Trade.SELL, 20),
+                ('POP', now, 10, Trade.SELL, -1),
+                ('ALE', '2015-JAN-21 00:12:11', 1000, Trade.SELL, 1000)]
+        tm = TradeManager()
+        rejected = tm.add_many(rows)
+        self.assertEqual(rejected.tolist(), [1, 3, 4, 5, 6])
+        self.assertEqual(len(tm), 3)
+        self.assertAlmostEqual(tm.volume_weighted_stock_price(15), (100*10 + 300*20)/400)
+        self.assertAlmostEqual(tm.volume_weighted_stock_price(15, 'ALE'), 20.0)
+        self.assertAlmostEqual(tm.volume_weighted_stock_price(30, 'ALE'), 20.0)
+        self.assertAlmostEqual(tm.gbce_all_share_index(AllShareIndex.LATEST), (10 * 20) ** (1 / 2))
+        
+    def testAddingManyTradesByColumns(self):
+        now = Timestamp.now().value
+        trades = [Trade('TEA', Timestamp(now - i * 10**8), 100 + i, i % 2, 10 + i % 7) for i in range(100)]
+        tm = TradeManager()
+        for trade in trades:
+            tm.add(trade)
+        expected = (tm.volume_weighted_stock_price(5), tm.gbce_all_share_index(), len(tm))
+        TradeManager._clear()
+        tm = TradeManager()
+        rejected = tm.add_many(['TEA'] * 100, [now - i * 10**8 for i in range(100)], 
+                               [100 + i for i in range(100)], [i % 2 for i in range(100)], [10 + i % 7 for i in range(100)])
+        self.assertEqual(len(rejected), 0)
+        self.assertAlmostEqual(tm.volume_weighted_stock_price(5), expected[0])
+        self.assertAlmostEqual(tm.gbce_all_share_index(), expected[1])
+        self.assertEqual(len(tm), expected[2])
+        
+    @data([('TEA', 1000)], (['TEA'], [1, 2], [1], [1], [1]))
+    def testAddingManyFalseTrades(self, data):
+        tm = TradeManager()
+        with self.assertRaises(TradeManagerException):
+            tm.add_many(*data) if isinstance(data, tuple) else tm.add_many(data)
+        
     @data(1, 'a', True, 0.1)
     def testAddingFalseTrade(self, data):
         tm = TradeManager()
         with self.assertRaises(TradeManagerException):
             tm.add(data)
+    
+    def testVolumeWeightedStockPrice(self):
+        tm = TradeManager()
+        tm.add(Trade.create_trade('TEA', 100, Trade.BUY, 10))
+        tm.add(Trade.create_trade('ALE', 300, Trade.SELL, 20))
+        tm.add(Trade('ALE', '2015-JAN-21 00:12:11', 1000, Trade.SELL, 1000))
+        self.assertAlmostEqual(tm.volume_weighted_stock_price(15), (100*10 + 300*20)/400)
+        
+    @data((15, 'TEA', 10.0), (60, 'ALE', 20.0), (45, 'ALE', 20.0), (45, 'GIN', 0.0), (45, None, 17.5))
+    @unpack
+    def testVolumeWeightedStockPricePerStock(self, interval_, stock_symbol_, expected_):
+        tm = TradeManager()
+        tm.add(Trade.create_trade('TEA', 100, Trade.BUY, 10))
+        tm.add(Trade.create_trade('ALE', 300, Trade.SELL, 20))
+        self.assertAlmostEqual(tm.volume_weighted_stock_price(interval_, stock_symbol_), expected_)
+        
+    def testRegisterWindow(self):
+        tm = TradeManager()
+        tm.add(Trade.create_trade('TEA', 100, Trade.BUY, 10))
+        tm.register_window(45)
+        self.assertIn(45, tm.windows)
+        self.assertAlmostEqual(tm.volume_weighted_stock_price(45, 'TEA'), 10.0)
+        with self.assertRaises(TradeManagerException):
+            tm.register_window(0)
+        
+    @data(None, 15)
+    def testTurnoverAndVolumeAtEarlierTime(self, window_):
+        now = 10**18
+        tm = TradeManager()
+        if window_:
+            tm.register_window(window_)
+        tm.add(Trade('TEA', now, 10, Trade.BUY, 100))
+        self.assertEqual(tm.turnover_and_volume(15, 'TEA', now + 30 * 10**9), (0, 0))
+        self.assertEqual(tm.turnover_and_volume(15, 'TEA', now), (1000, 10))
+        tm.add(Trade('TEA', now + 10 * 10**9, 20, Trade.BUY, 200))
+        self.assertEqual(tm.turnover_and_volume(15, None, now + 5 * 10**9), (1000, 10))
+        self.assertEqual(tm.turnover_and_volume(15, None, now + 10 * 10**9), (5000, 30))
+        self.assertEqual(tm.gbce_partials(AllShareIndex.WINDOW, 15, now)[1], [10])
+        
+    def testTradesBetween(self):
+        tm = TradeManager()
+        tm.add(Trade('TEA', '2015-JAN-21 00:12:13', 100, Trade.BUY, 10))
+        tm.add(Trade('ALE', '2015-JAN-21 00:12:11', 300, Trade.SELL, 20))
+        tm.add(Trade('TEA', '2015-JAN-21 00:12:12', 200, Trade.SELL, 40))
+        tm.add(Trade('TEA', '2015-JAN-21 00:12:20', 200, Trade.SELL, 40))
+        trades = tm.trades_between('2015-JAN-21 00:12:11', '2015-JAN-21 00:12:14')
+        self.assertEqual(trades['stock_symbol'].tolist(), ['ALE', 'TEA', 'TEA'])
+        self.assertEqual(trades['quantity'].tolist(), [300, 200, 100])
+        trades = tm.trades_between(Timestamp('2015-JAN-21 00:12:12'), Timestamp('2015-JAN-21 00:12:13').value, 'TEA')
+        self.assertEqual(trades['trade_price'].tolist(), [40])
+        self.assertEqual(len(tm.trades_between(0, 1, 'GIN')['timestamp']), 0)
+        self.assertAlmostEqual(tm.volume_weighted_stock_price_between('2015-JAN-21 00:12:12', '2015-JAN-21 00:12:14', 'TEA'),
+                               (200*40 + 100*10)/300)
+        with self.assertRaises(TradeManagerException):
+            tm.trades_between('2015-JAN-42', 0)
+        
+    def testBars(self):
+        tm = TradeManager()
+        tm.add(Trade('TEA', '2015-JAN-21 00:12:13', 100, Trade.BUY, 10))
+        tm.add(Trade('TEA', '2015-JAN-21 00:12:12', 200, Trade.SELL, 40))
+        tm.add_many([('TEA', '2015-01-21 00:13:20', 300, Trade.BUY, 20), ('ALE', '2015-01-21 00:12:11', 300, Trade.SELL, 20)])
+        bars = tm.bars(60, '2015-JAN-21 00:12:00', '2015-JAN-21 00:14:00', 'TEA')
+        self.assertEqual(bars['start'].tolist(), [Timestamp('2015-JAN-21 00:12:00').value, Timestamp('2015-JAN-21 00:13:00').value])
+        self.assertEqual(bars['open'].tolist(), [40, 20])
+        self.assertEqual(bars['close'].tolist(), [10, 20])
+        self.assertEqual(bars['buy_volume'].tolist(), [100, 300])
+        self.assertEqual(bars['sell_volume'].tolist(), [200, 0])
+        self.assertAlmostEqual(bars['vwap'][0], (100*10 + 200*40)/300)
+        self.assertEqual(tm.bars(300, '2015-JAN-21 00:10:00', '2015-JAN-21 00:15:00', 'TEA')['volume'].tolist(), [600])
+        with self.assertRaises(TradeManagerException):
+            tm.bars(7, 0, 1, 'TEA')
+        
+    def testBarOverflow(self):
+        tm = TradeManager()
+        tm.add_many(['TEA', 'TEA', 'ALE'], [10**18, 10**18 + 1, 10**18], [2**21] * 3, [True] * 3, [2**41] * 3)
+        self.assertEqual(tm.turnover_and_volume_between(10**18 - 10**9, 10**18 + 10**9), (3 * 2**62, 3 * 2**21))
+        self.assertEqual(tm.turnover_and_volume_between(10**18 - 10**9, 10**18 + 10**9, 'ALE'), (2**62, 2**21))
+        with self.assertRaises(TradeManagerException):
+            tm.bars(1, 10**18, 10**18 + 1, 'TEA')
+        
+    @data(1, 1000)
+    def testVolumeWeightedStockPriceBetweenRanges(self, batch_):
+        '''
+        VWSP of random ranges from the prefix sums of the bars against the trades
+        '''
+        rng = np.random.default_rng(batch_)
+        size = 2000
+        symbols = rng.choice(['TEA', 'ALE', 'GIN'], size)
+        timestamps = 10**18 + rng.integers(0, 600 * 10**9, size)
+        quantities, trade_prices = rng.integers(1, 100, size), rng.integers(1, 1000, size)
+        tm = TradeManager()
+        for start in range(0, size, batch_):
+            rows = slice(start, start + batch_)
+            tm.add_many(symbols[rows].tolist(), timestamps[rows].tolist(), quantities[rows].tolist(), 
+                        [True] * len(symbols[rows]), trade_prices[rows].tolist())
+            tm.volume_weighted_stock_price_between(10**18, 10**18 + 300 * 10**9)
+        for start, end in np.sort(10**18 + rng.integers(-10**9, 610 * 10**9, (50, 2)), axis=1).tolist():
+            for symbol in ('TEA', 'GIN', 'XXX', None):
+                rows = (timestamps >= start) & (timestamps < end) & ((symbols == symbol) if symbol else True)
+                self.assertEqual(tm.turnover_and_volume_between(start, end, symbol), 
+                                 (int(np.dot(quantities[rows], trade_prices[rows])), int(quantities[rows].sum())))
+        self.assertEqual(tm.turnover_and_volume_between(10**18 + 5, 10**18), (0, 0))
+    
+    def testVolumeWeightedStockPriceWithoutTrades(self):
+        self.assertEqual(TradeManager().volume_weighted_stock_price(15), 0.0)
+        
+    @data('a', None)
+    def testVolumeWeightedStockPriceFalseInterval(self, interval_):
+        with self.assertRaises(TradeManagerException):
+            TradeManager().volume_weighted_stock_price(interval_)
+    
+    def testGbceAllShareIndex(self):
+        tm = TradeManager()
+        self.assertEqual(tm.gbce_all_share_index(), 0.0)
+        tm.add(Trade.create_trade('TEA', 1, Trade.BUY, 10))
+        tm.add(Trade.create_trade('ALE', 1, Trade.SELL, 1000))
+        self.assertAlmostEqual(tm.gbce_all_share_index(), 100.0)
+        
+    @data((AllShareIndex.SESSION, None, (100 * 10 * 1000) ** (1 / 3)),
+          (AllShareIndex.LATEST, None, (10 * 1000) ** (1 / 2)),
+          (AllShareIndex.WINDOW, 15, (10 * 1000) ** (1 / 2)),
+          (AllShareIndex.WINDOW, 45, (10 * 1000) ** (1 / 2)))
+    @unpack
+    def testGbceAllShareIndexModes(self, mode_, interval_, expected_):
+        tm = TradeManager()
+        tm.add(Trade('TEA', '2015-JAN-21 00:12:11', 1, Trade.BUY, 100))
+        tm.add(Trade.create_trade('TEA', 1, Trade.BUY, 10))
+        tm.add(Trade.create_trade('ALE', 1, Trade.SELL, 1000))
+        self.assertAlmostEqual(tm.gbce_all_share_index(mode_, interval_), expected_)
+        
+    @data(('median', None), (AllShareIndex.WINDOW, None), (AllShareIndex.WINDOW, 'a'))
+    @unpack
+    def testGbceAllShareIndexFalseMode(self, mode_, interval_):
+        with self.assertRaises(TradeManagerException):
+            TradeManager().gbce_all_share_index(mode_, interval_)
             
     
         
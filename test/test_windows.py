@@ -0,0 +1,114 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+import unittest
+from windows import RollingWindow, RollingWindows, RollingWindowException
+from math import exp
+import numpy as np
+from ddt import ddt, data, unpack
+
+SECOND = 10**9
+
+
+@ddt
+class TestRollingWindow(unittest.TestCase):
+
+    @data(0, -15, 'a')
+    def testFalseLength(self, length_):
+        with self.assertRaises((RollingWindowException, ValueError)):
+            RollingWindow(length_)
+
+    def testEviction(self):
+        w = RollingWindow(15)
+        w.add(0, 10, 100)
+        w.add(10 * SECOND, 30, 200)
+        self.assertAlmostEqual(w.volume_weighted_stock_price(), (10*100 + 30*200) / 40)
+        w.add(16 * SECOND, 10, 300)
+        self.assertEqual(len(w), 2)
+        self.assertAlmostEqual(w.volume_weighted_stock_price(), (30*200 + 10*300) / 40)
+        w.evict(100 * SECOND)
+        self.assertEqual(len(w), 0)
+        self.assertEqual(w.volume_weighted_stock_price(), 0.0)
+
+    def testOutOfOrder(self):
+        w = RollingWindow(15)
+        w.add(10 * SECOND, 10, 100)
+        w.add(20 * SECOND, 10, 300)
+        w.add(12 * SECOND, 20, 200)
+        w.add(1 * SECOND, 20, 1000)
+        self.assertEqual(len(w), 3)
+        w.evict(28 * SECOND)
+        self.assertEqual(len(w), 1)
+        self.assertAlmostEqual(w.volume_weighted_stock_price(), 300.0)
+
+    @data((0, 1, 2, 3, 4, 5), (5, 4, 3, 2, 1, 0), (3, 0, 5, 1, 4, 2))
+    def testAddingMany(self, order_):
+        timestamps = np.array([1, 3, 17, 20, 24, 30]) * SECOND
+        quantities = np.array([10, 20, 30, 40, 50, 60])
+        trade_prices = np.array([100, 200, 300, 400, 500, 600])
+        w1, w2 = RollingWindow(15, 2), RollingWindow(15, 2)
+        w1.add(2 * SECOND, 5, 50)
+        w2.add(2 * SECOND, 5, 50)
+        for i in order_:
+            w1.add(int(timestamps[i]), int(quantities[i]), int(trade_prices[i]))
+        w2.add_many(timestamps[list(order_)], quantities[list(order_)], trade_prices[list(order_)])
+        self.assertEqual(len(w1), len(w2))
+        self.assertEqual((w1.turnover, w1.volume), (w2.turnover, w2.volume))
+        self.assertAlmostEqual(w1.log_turnover, w2.log_turnover)
+        self.assertEqual(w2.volume, 30 + 40 + 50 + 60)
+
+    @data((15, 'TEA', 100.0), (60, 'TEA', 150.0), (60, None, 175.0), (60, 'GIN', 0.0))
+    @unpack
+    def testMultipleWindows(self, length_, symbol_, expected_):
+        ws = RollingWindows((15, 60))
+        ws.add('TEA', 0, 10, 200)
+        ws.add('TEA', 50 * SECOND, 10, 100)
+        ws.add('ALE', 50 * SECOND, 20, 200)
+        turnover, volume, _ = ws.sums(length_, 55 * SECOND, symbol_)
+        self.assertAlmostEqual(turnover / volume if volume else 0.0, expected_)
+
+    def testEarlierTime(self):
+        ws = RollingWindows((15,))
+        ws.add('TEA', 10 * SECOND, 10, 100)
+        self.assertIsNone(ws.sums(15, 5 * SECOND, 'TEA'))
+        self.assertEqual(ws.sums(15, 30 * SECOND, 'TEA')[:2], (0, 0))
+        self.assertIsNone(ws.sums(15, 10 * SECOND))
+
+    def testLogTurnover(self):
+        w = RollingWindow(15)
+        w.add(0, 2, 10)
+        w.add(10 * SECOND, 2, 1000)
+        self.assertAlmostEqual(exp(w.log_turnover / w.volume), 100.0)
+        w.add(20 * SECOND, 1, 100)
+        self.assertAlmostEqual(exp(w.log_turnover / w.volume), 1000 ** (2/3) * 100 ** (1/3))
+
+    def testRemove(self):
+        w = RollingWindow(15)
+        w.add(10 * SECOND, 10, 100)
+        w.add(12 * SECOND, 20, 200)
+        w.add(12 * SECOND, 10, 300)
+        self.assertFalse(w.remove(12 * SECOND, 10, 200))
+        self.assertTrue(w.remove(12 * SECOND, 20, 200))
+        self.assertEqual(len(w), 2)
+        self.assertAlmostEqual(w.volume_weighted_stock_price(), 200.0)
+        w.add(20 * SECOND, 10, 400)
+        self.assertTrue(w.remove(20 * SECOND, 10, 400))
+        self.assertAlmostEqual(w.volume_weighted_stock_price(), 200.0)
+        self.assertTrue(w.remove(10 * SECOND, 10, 100))
+        w.add(40 * SECOND, 10, 400)
+        self.assertFalse(w.remove(12 * SECOND, 10, 300))
+        self.assertTrue(w.remove(40 * SECOND, 10, 400))
+        self.assertEqual((len(w), w.turnover, w.volume, w.log_turnover), (0, 0, 0, 0.0))
+
+    def testRegister(self):
+        ws = RollingWindows((15,))
+        self.assertFalse(ws.register(15))
+        self.assertTrue(ws.register(60))
+        self.assertEqual(ws.lengths, (15, 60))
+        self.assertIn(60, ws)
+
+
+if __name__ == "__main__":
+    unittest.main()
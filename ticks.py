@@ -0,0 +1,270 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+from decimal import Decimal
+from fractions import Fraction
+import numpy as np
+
+
+class TickSizeException(Exception):
+    def __init__(self, message_):
+        super(TickSizeException, self).__init__(message_)
+
+
+INT64_MAX = int(np.iinfo(np.int64).max)
+
+# a float price is on the tick grid if it is within a few units in the last place of it
+_ULPS = 4
+
+
+def _exact(value_):
+    '''
+    @value_ - int, float, Decimal, Fraction or a string like '0.0001' or '1/8'
+
+    @return - The exact value as a Fraction, a float is taken by its shortest representation
+    '''
+    if isinstance(value_, (int, np.integer)):
+        return Fraction(int(value_))
+    if isinstance(value_, (float, np.floating)):
+        return Fraction(repr(float(value_)))
+    if isinstance(value_, (Decimal, Fraction)):
+        return Fraction(value_)
+    return Fraction(str(value_).strip())
+
+
+def exact_sum(values_):
+    '''
+    Sum of an int64 array as an int without int64 overflow. The array is summed
+    at once when the sum surely fits in int64 (the usual case), otherwise in
+    chunks whose sums fit, and the sums of the chunks are added as Python ints.
+
+    @values_ - int64 array
+
+    @return - int
+    '''
+    count = len(values_)
+    if count == 0:
+        return 0
+    largest = max(abs(int(values_.max())), abs(int(values_.min())))
+    if largest * count <= INT64_MAX:
+        return int(values_.sum())
+    chunk = max(INT64_MAX // largest, 1)
+    return sum(int(value) for value in np.add.reduceat(values_, np.arange(0, count, chunk)).tolist())
+
+
+def _rescaled(values_, numerator_, denominator_, truncate_=False):
+    '''
+    @values_ - int64 array
+    @numerator_, @denominator_ - Positive ints
+    @truncate_ - The results are truncated toward zero instead of rejecting the non whole ones
+
+    @return - (int64 array of values_ * numerator_ / denominator_, mask of the results 
+               which are whole numbers (or truncated) fitting in int64)
+    '''
+    if numerator_ == denominator_ == 1:
+        return values_, np.ones(len(values_), dtype=bool)
+    if numerator_ > INT64_MAX or denominator_ > INT64_MAX:
+        valid = values_ == 0
+        return np.zeros(len(values_), dtype=np.int64), valid
+    valid = np.abs(values_) <= INT64_MAX // numerator_
+    scaled = np.where(valid, values_, 0) * numerator_
+    if truncate_:
+        return np.where(valid, np.sign(scaled) * (np.abs(scaled) // denominator_), 0), valid
+    valid &= scaled % denominator_ == 0
+    return np.where(valid, scaled // denominator_, 0), valid
+
+
+def notional_fits(quantities_, ticks_):
+    '''
+    @quantities_ - Positive quantities (int or int64 array)
+    @ticks_ - Positive prices in ticks (int or int64 array)
+
+    @return - quantity * price fits in int64 (bool or bool array)
+    '''
+    return quantities_ <= INT64_MAX // np.maximum(ticks_, 1)
+
+
+class TickSize(object):
+    '''
+    Fixed-point representation of the prices: a price is kept as an int64 number
+    of ticks, so the sums of trade_price * quantity are exact integer sums. A price
+    which is not a whole number of ticks is rejected instead of being rounded, or 
+    truncated toward zero to whole ticks (as int() does) if truncate is set.
+
+    The prices are converted to ticks when the trades are added, and back to prices
+    only when the results are given back: to int for a whole tick size, otherwise
+    to float.
+    '''
+
+    def __init__(self, tick_=1, truncate_=False):
+        '''
+        Constructor
+
+        @tick_ - The price of a tick, e.g. 1 (penny) or '0.0001', a float is taken
+                 by its shortest representation
+        @truncate_ - The prices between two ticks are truncated instead of being rejected
+        '''
+        self.truncate = bool(truncate_)
+        try:
+            self.tick = _exact(tick_)
+        except (TypeError, ValueError, ZeroDivisionError) as error:
+            raise TickSizeException('Invalid tick size: {0}'.format(error))
+        if self.tick <= 0:
+            raise TickSizeException('Invalid tick size: {0}'.format(tick_))
+        # ticks = price * denominator / numerator
+        self.__numerator, self.__denominator = self.tick.numerator, self.tick.denominator
+
+    def __str__(self):
+        '''
+        @return - The tick size as a decimal (e.g. '0.0001') if it has a finite one, otherwise as a fraction
+        '''
+        denominator = self.__denominator
+        for factor in (2, 5):
+            while denominator % factor == 0:
+                denominator //= factor
+        if denominator != 1:
+            return str(self.tick)
+        return format(Decimal(self.__numerator) / Decimal(self.__denominator), 'f')
+
+    def __repr__(self):
+        if self.truncate:
+            return 'TickSize({0!r}, truncate_=True)'.format(str(self))
+        return 'TickSize({0!r})'.format(str(self))
+
+    def __eq__(self, other_):
+        if not isinstance(other_, TickSize):
+            return NotImplemented
+        return self.tick == other_.tick and self.truncate == other_.truncate
+
+    def __hash__(self):
+        return hash((self.tick, self.truncate))
+
+    @property
+    def integral(self):
+        '''
+        The tick size is a whole number, the prices are given back as ints
+        '''
+        return self.__denominator == 1
+
+    def ticks(self, price_):
+        '''
+        @price_ - A price, see ticks_many for the float prices
+
+        @return - The price as an int number of ticks
+        '''
+        if isinstance(price_, (float, np.floating)):
+            ticks, valid = self.ticks_many(np.array([price_], dtype=np.float64))
+            if not valid[0]:
+                raise TickSizeException('The price is not a whole number of ticks of {0}: {1!r}'.format(self, price_))
+            return int(ticks[0])
+        try:
+            ticks = _exact(price_) / self.tick
+        except (TypeError, ValueError, ZeroDivisionError) as error:
+            raise TickSizeException('Invalid price: {0}'.format(error))
+        if ticks.denominator != 1:
+            if not self.truncate:
+                raise TickSizeException('The price is not a whole number of ticks of {0}: {1!r}'.format(self, price_))
+            ticks = Fraction(int(ticks))
+        if abs(ticks.numerator) * self.__numerator > INT64_MAX:
+            raise TickSizeException('The price overflows int64: {0!r}'.format(price_))
+        return ticks.numerator
+
+    def ticks_many(self, prices_):
+        '''
+        Vectorised ticks(). The integers are converted exactly. A float is on the
+        tick grid if it is the nearest float to a whole number of ticks (e.g. 100.1234
+        with a tick of 0.0001), which is rounded to that number. The floats off the 
+        grid are truncated if truncate is set.
+
+        @prices_ - array like
+
+        @return - (int64 array of the prices in ticks, mask of the successfully converted prices)
+        '''
+        numerator, denominator = self.__numerator, self.__denominator
+        values = np.asarray(prices_)
+        if values.dtype.kind in 'iub':
+            return _rescaled(values.astype(np.int64), denominator, numerator, self.truncate)
+        if values.dtype.kind == 'f':
+            with np.errstate(invalid='ignore', over='ignore'):
+                ticks = values * denominator / numerator
+                rounded = np.rint(ticks)
+                on_grid = np.abs(ticks - rounded) <= _ULPS * np.spacing(np.abs(ticks))
+                if self.truncate:
+                    rounded = np.where(on_grid, rounded, np.trunc(ticks))
+                valid = np.isfinite(ticks) & (np.abs(rounded) <= float(INT64_MAX // numerator))
+                if not self.truncate:
+                    valid &= on_grid
+            return np.where(valid, rounded, 0).astype(np.int64), valid
+        if values.dtype.kind in 'US' and len(values) and np.char.isdigit(values).all():
+            # whole numbers as strings (e.g. read from a CSV file)
+            try:
+                return self.ticks_many(values.astype(np.int64))
+            except (OverflowError, ValueError):
+                pass
+
+        result = np.zeros(len(values), dtype=np.int64)
+        valid = np.ones(len(values), dtype=bool)
+        for i, value in enumerate(values.tolist()):
+            try:
+                result[i] = self.ticks(value)
+            except TickSizeException:
+                valid[i] = False
+        return result, valid
+
+    def rescale(self, ticks_, tick_size_):
+        '''
+        Exact conversion of prices in the ticks of another tick size to this one
+
+        @ticks_ - int64 array, prices in ticks of tick_size_
+        @tick_size_ - TickSize of ticks_
+
+        @return - (int64 array of the prices in ticks, mask of the successfully converted prices)
+        '''
+        ratio = tick_size_.tick / self.tick
+        return _rescaled(np.asarray(ticks_, dtype=np.int64), ratio.numerator, ratio.denominator)
+
+    def price(self, ticks_):
+        '''
+        @ticks_ - A price in ticks
+
+        @return - The price, int for a whole tick size, otherwise float
+        '''
+        if self.__denominator == 1:
+            return int(ticks_) * self.__numerator
+        return int(ticks_) * self.__numerator / self.__denominator
+
+    def prices(self, ticks_):
+        '''
+        Vectorised price()
+
+        @ticks_ - int64 array
+
+        @return - int64 array for a whole tick size, otherwise float64 array
+        '''
+        if self.__denominator == 1:
+            return ticks_ * self.__numerator if self.__numerator != 1 else ticks_
+        return ticks_ * self.__numerator / self.__denominator
+
+    def scale(self, value_):
+        '''
+        @value_ - A value measured in ticks (e.g. a mean of prices in ticks)
+
+        @return - The value as a float price
+        '''
+        return value_ * self.__numerator / self.__denominator
+
+    def vwap(self, turnover_, volume_):
+        '''
+        Volume weighted price from exact sums, rounded once
+
+        @turnover_ - Sum of trade_price * quantity, the prices in ticks (int)
+        @volume_ - Sum of quantity (int)
+
+        @return - turnover_ / volume_ as a float price, 0.0 without volume
+        '''
+        if not volume_:
+            return 0.0
+        return int(turnover_) * self.__numerator / (int(volume_) * self.__denominator)
@@ -5,11 +5,22 @@ Created on 10 May 2018
 '''
 
 
-from abc import ABCMeta
-from collections import Iterable
-from pandas import DataFrame, Timestamp, Timedelta
-from math import log, exp
+from decimal import Decimal, InvalidOperation
+from math import isfinite
+from sys import intern
+from threading import Lock, RLock
+import numpy as np
 from stocks import StockManager
+from store import TradeStore
+from windows import RollingWindows, RollingWindowException
+from index import AllShareIndex, AllShareIndexException
+from journal import TradeJournal, TradeJournalException
+from bars import BarBuilder, BarsException
+from metrics import Metrics, MetricsException, dump
+from clock import WALL_CLOCK
+from sketches import PriceStatistics, SketchException
+from ticks import TickSize, TickSizeException, exact_sum, notional_fits
+import snapshot
 
 class TradeManagerException(Exception):
     def __init__(self, message_):
@@ -19,16 +30,125 @@ class TradeException(Exception):
     def __init__(self, message_):
         super(TradeException, self).__init__(message_)
 
-class Trade(dict):
+_NS_MIN, _NS_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+def _pandas():
+    '''
+    pandas is imported only when a timestamp has to be parsed or a Timestamp 
+    has to be built, so the engine imports and runs on integer timestamps without it
+    '''
+    import pandas
+    return pandas
+
+def _to_int64(values_):
+    '''
+    Vectorised int() conversion
+    
+    @values_ - array like
+    
+    @return - (int64 array, mask of the successfully converted values)
+    '''
+    values = np.asarray(values_)
+    if values.dtype.kind in 'iub':
+        return values.astype(np.int64), np.ones(len(values), dtype=bool)
+    if values.dtype.kind == 'f':
+        valid = np.isfinite(values)
+        return np.where(valid, values, 0).astype(np.int64), valid
+    
+    result = np.zeros(len(values), dtype=np.int64)
+    valid = np.ones(len(values), dtype=bool)
+    for i, value in enumerate(values.tolist()):
+        try:
+            result[i] = int(value)
+        except (TypeError, ValueError, OverflowError):
+            valid[i] = False
+    return result, valid
+
+def _to_price(value_):
+    '''
+    @value_ - A price: int, float, Decimal or a string
+    
+    @return - The price without truncation: an int for a whole number, 
+              otherwise the float or the exact Decimal value of the string
+    '''
+    if isinstance(value_, (int, np.integer)):
+        return int(value_)
+    if isinstance(value_, (float, np.floating)):
+        if not isfinite(value_):
+            raise ValueError('Non-finite price: {0!r}'.format(value_))
+        return int(value_) if float(value_).is_integer() else float(value_)
+    try:
+        price = Decimal(str(value_).strip())
+    except InvalidOperation:
+        raise ValueError('Invalid price: {0!r}'.format(value_))
+    if not price.is_finite():
+        raise ValueError('Non-finite price: {0!r}'.format(value_))
+    return int(price) if price == price.to_integral_value() else price
+
+def _to_timestamp_ns(values_):
+    '''
+    Vectorised Timestamp() conversion
+    
+    @values_ - array like of integers (nanoseconds since epoch), datetime64 or timestamps parsable by pandas
+    
+    @return - (int64 array of nanoseconds since epoch, mask of the successfully converted values)
+    '''
+    values = np.asarray(values_)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64), np.ones(len(values), dtype=bool)
+    if values.dtype.kind == 'M':
+        result = values.astype('datetime64[ns]').view(np.int64)
+        return result, ~np.isnat(values)
+    if values.dtype.kind in 'US' and not isinstance(values_, np.ndarray):
+        # numbers mixed with strings are kept as numbers
+        values = np.asarray(values_, dtype=object)
+    
+    converted = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    integers = np.fromiter((isinstance(value, (int, np.integer)) and not isinstance(value, bool) for value in values.tolist()), 
+                           dtype=bool, count=len(values))
+    if integers.any():
+        converted[integers] = values[integers].astype(np.int64).view('datetime64[ns]')
+    others = np.flatnonzero(~integers)
+    if len(others):
+        try:
+            converted[others] = _pandas().to_datetime(values[others], errors='coerce')
+        except (TypeError, ValueError):
+            for i in others.tolist():
+                converted[i] = _pandas().to_datetime(values[i], errors='coerce')
+    return converted.view(np.int64), ~np.isnat(converted)
+
+def _to_ns(value_):
+    '''
+    @value_ - Nanoseconds since epoch or a value Timestamp accepts
+    
+    @return - Nanoseconds since epoch
+    '''
+    if isinstance(value_, (int, np.integer)) and not isinstance(value_, bool):
+        return int(value_)
+    try:
+        return _pandas().Timestamp(value_).value
+    except (TypeError, ValueError) as error:
+        raise TradeManagerException('Invalid time: {0}'.format(error))
+
+class Trade(object):
     '''
     Class of Trade
+    
+    Compact record of a trade: the symbol is an interned string, the timestamp is 
+    nanoseconds since epoch (int), the other attributes are plain ints and a bool, 
+    except a price which is not a whole number (float or Decimal, it is not truncated).
+    For the existing callers the attributes are readable as trade['quantity'], 
+    trade['stock'] gives back the Stock object (of the StockManager the trade was 
+    created with) and trade['timestamp'] a Timestamp.
     '''
-    __sm = StockManager()
+    __slots__ = ('symbol', 'timestamp', 'quantity', 'buy_or_sell', 'trade_price', 'stock_manager')
+    
+    KEYS = ('stock', 'timestamp', 'quantity', 'buy_or_sell', 'trade_price')
     
     BUY = True
     SELL = False
     
-    def __init__(self, stock_symbol_, timestamp_, quantity_, buy_or_sell_, trade_price_):
+    def __init__(self, stock_symbol_, timestamp_, quantity_, buy_or_sell_, trade_price_, stock_manager_=None):
         '''
         Constructor
         
@@ -37,14 +157,17 @@ class Trade(dict):
         @quantity_ - Quantity of the stock
         @buy_or_sell_ - The stocks are bought or sold
         @trade_price_ - The price of the stocks
+        @stock_manager_ - The stocks the symbol is looked up in, the StockManager singleton by default
         '''
         
         try:
-            self['stock'] = self.__sm[str(stock_symbol_)]
-            self['timestamp'] = Timestamp(timestamp_)
-            self['quantity'] = int(quantity_)
-            self['buy_or_sell'] = bool(buy_or_sell_)
-            self['trade_price'] = int(trade_price_)
+            stock_manager = StockManager() if stock_manager_ is None else stock_manager_
+            self.symbol = intern(stock_manager[str(stock_symbol_)].symbol)
+            self.timestamp = timestamp_ if type(timestamp_) is int else _pandas().Timestamp(timestamp_).value
+            self.quantity = int(quantity_)
+            self.buy_or_sell = bool(buy_or_sell_)
+            self.trade_price = _to_price(trade_price_)
+            self.stock_manager = stock_manager_
         except (KeyError, ValueError) as error:
             raise TradeException(str(error))
         
@@ -52,7 +175,7 @@ class Trade(dict):
             raise TradeException('Non-valid input')
             
     @classmethod
-    def create_trade(cls, stock_symbol_, quantity_, buy_or_sell_, trade_price_):
+    def create_trade(cls, stock_symbol_, quantity_, buy_or_sell_, trade_price_, clock_=WALL_CLOCK, stock_manager_=None):
         '''
         Trade is created by using the current time
         
@@ -60,14 +183,48 @@ class Trade(dict):
         @quantity_ - Quantity of the stock
         @buy_or_sell_ - The stocks are bought or sold
         @trade_price_ - The price of the stocks
+        @clock_ - The clock giving the current time, the wall clock by default
+        @stock_manager_ - The stocks the symbol is looked up in, the StockManager singleton by default
+        '''
+        return cls(stock_symbol_, clock_.now(), quantity_, buy_or_sell_, trade_price_, stock_manager_)
+    
+    def __getitem__(self, key_):
+        '''
+        Read access in the former dict style
+        
+        @key_ - One of KEYS
         '''
-        return cls(stock_symbol_, Timestamp.now(), quantity_, buy_or_sell_, trade_price_)
+        if key_ == 'stock':
+            return (StockManager() if self.stock_manager is None else self.stock_manager)[self.symbol]
+        if key_ == 'timestamp':
+            return _pandas().Timestamp(self.timestamp)
+        if key_ in self.KEYS:
+            return getattr(self, key_)
+        raise KeyError(key_)
+    
+    def keys(self):
+        return self.KEYS
+    
+    def __iter__(self):
+        return iter(self.KEYS)
+    
+    def __len__(self):
+        return len(self.KEYS)
+    
+    def __eq__(self, other_):
+        if not isinstance(other_, Trade):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other_, name) for name in self.__slots__[:-1])
+    
+    def __repr__(self):
+        return 'Trade({0!r}, {1!r}, {2!r}, {3!r}, {4!r})'.format(self.symbol, self['timestamp'], self.quantity, 
+                                                             self.buy_or_sell, self.trade_price)
     
     def valid(self):
         '''
         For validation
         '''
-        return self['quantity'] > 0 and self['trade_price'] > 0
+        return self.quantity > 0 and self.trade_price > 0
         
     
 class _SingletonTradeManager(type):
@@ -77,31 +234,113 @@ class _SingletonTradeManager(type):
     '''
     
     _instance = None
+    _lock = Lock()
     def __call__(cls, *args, **kwargs):
         if cls._instance == None:
-            cls._instance = super(_SingletonTradeManager, cls).__call__()
+            with cls._lock:
+                if cls._instance == None:
+                    cls._instance = super(_SingletonTradeManager, cls).__call__()
         return cls._instance 
+    
+    def new_instance(cls, stock_manager_=None):
+        '''
+        An independent Trade Manager besides the singleton, e.g. the trade book of an Engine
+        
+        @stock_manager_ - The stocks of the trades, the StockManager singleton by default
+        '''
+        return super(_SingletonTradeManager, cls).__call__(stock_manager_)
 
 class TradeManager(metaclass=_SingletonTradeManager):
     '''
     Trade Manager class.
     1) Meta classes: _SingletonStockManager
-    2) Singleton
+    2) Singleton by default, TradeManager.new_instance() gives back an independent one
+    3) Thread safe: the rolling windows of the stocks are guarded by STRIPES locks 
+       selected by the symbol, the store and the GBCE accumulators by a single lock 
+       held only while the trades are copied. Writers take the stripes first.
     '''
-    def __init__(self):
+    
+    # window lengths (in seconds) maintained incrementally for every stock
+    WINDOWS = (15, 60, 300)
+    
+    # resolutions (in seconds) of the OHLCV bars of every stock
+    BARS = (1, 60, 300)
+    
+    # bucket and horizon (in seconds) of the price statistics of every stock
+    STATISTICS = (60, 3600)
+    
+    # operations measured when the metrics are enabled
+    INSTRUMENTED = ('add', 'add_many', 'volume_weighted_stock_price', 'volume_weighted_stock_price_between', 
+                    'gbce_all_share_index', 'trades_between', 'bars', 'register_window', 'price_statistics',
+                    'cancel', 'amend')
+    
+    # price of a tick, the prices are stored as whole numbers of ticks (see set_tick_size), 
+    # by default a penny and the fractions of a penny are truncated, as int() did
+    TICK_SIZE = TickSize(1, truncate_=True)
+    
+    # policies of the trades older than the watermark (see set_lateness)
+    ACCEPT = 'accept'
+    REJECT = 'reject'
+    
+    # number of locks the rolling windows of the stocks are striped over
+    STRIPES = 16
+    
+    def __init__(self, stock_manager_=None):
         '''
         Constructor for initialisation
         
-        Because dataframe creation is time consuming, we used timestamps for 
-        checking if the previous dataframe is valid or not
+        Trades are kept in a columnar store, so the metrics are computed directly 
+        on the stored columns instead of rebuilding a dataframe.
+        VWSP of the registered windows and the GBCE All Share Index are maintained 
+        incrementally per stock.
+        
+        @stock_manager_ - The stocks of the trades, the StockManager singleton by default
         '''
         
         super(TradeManager, self).__init__()
-        self.__storage = []
+        self.__stock_manager = stock_manager_
+        self.__storage = TradeStore()
+        self.__windows = RollingWindows(self.WINDOWS)
+        self.__bars = BarBuilder(self.BARS)
+        self.__statistics = PriceStatistics(*self.STATISTICS)
+        self.__index = AllShareIndex()
+        self.__lock = RLock()
+        self.__stripes = [Lock() for _ in range(self.STRIPES)]
+        self.__journal = None
+        self.__metrics = None
+        self.__clock = WALL_CLOCK
+        self.__tick_size = self.TICK_SIZE
+        # latest timestamp added, the allowed lateness (nanoseconds) and the policy of the late trades
+        self.__event_time = None
+        self.__lateness = None
+        self.__late_policy = self.ACCEPT
+        
+    def __stripe(self, symbol_):
+        '''
+        @return - The lock of the rolling windows of the stock
+        '''
+        return self.__stripes[self.__stripe_position(symbol_)]
+    
+    def __stripe_position(self, symbol_):
+        return hash(symbol_) % self.STRIPES
+    
+    def __acquire(self, stripes_):
+        '''
+        Locking the stripes in the order of their positions, and then the store.
+        Every writer locks in this order, so they cannot deadlock.
         
-        self.__df_storage = None
-        self.__df_time = None
-        self.__append_time = None
+        @stripes_ - Positions of the stripes
+        '''
+        stripes = sorted(set(stripes_))
+        for i in stripes:
+            self.__stripes[i].acquire()
+        self.__lock.acquire()
+        return stripes
+    
+    def __release(self, stripes_):
+        self.__lock.release()
+        for i in reversed(stripes_):
+            self.__stripes[i].release()
         
     def add(self, trade_):
         '''
@@ -109,45 +348,947 @@ class TradeManager(metaclass=_SingletonTradeManager):
         
         @trade_ - The trade
         
-        Note: appending time is saved for dataframe validation
+        @return - The trade id of the trade (see cancel and amend)
         '''
         if isinstance(trade_, Trade):
-            self.__storage.append(trade_)
-            self.__append_time = Timestamp.now()
+            if trade_.symbol not in self.stock_manager:
+                raise TradeManagerException('Unknown stock: {0}'.format(trade_.symbol))
+            ticks = self.__ticks(trade_)
+            with self.__stripe(trade_.symbol):
+                with self.__lock:
+                    if self.__late(np.array([trade_.timestamp], dtype=np.int64))[0]:
+                        raise TradeManagerException('Late trade, older than the watermark: {0!r}'.format(trade_))
+                    trade_id = self.__storage.next_trade_id
+                    if self.__journal is not None:
+                        try:
+                            self.__journal.append(trade_.timestamp, trade_.symbol, trade_.quantity, trade_.buy_or_sell, 
+                                                  ticks, trade_id)
+                        except TradeJournalException as error:
+                            raise TradeManagerException(str(error))
+                    self.__storage.append(trade_.timestamp, trade_.symbol, trade_.quantity, trade_.buy_or_sell, ticks)
+                    self.__observe(trade_.timestamp)
+                    self.__index.add(trade_.symbol, trade_.timestamp, trade_.quantity, ticks)
+                self.__windows.add(trade_.symbol, trade_.timestamp, trade_.quantity, ticks)
+                self.__bars.add(trade_.symbol, trade_.timestamp, trade_.quantity, trade_.buy_or_sell, ticks)
+                self.__statistics.add(trade_.symbol, trade_.timestamp, trade_.quantity, ticks)
+            return trade_id
         else:
             raise TradeManagerException('Invalid trade')
         
+    def __ticks(self, trade_):
+        '''
+        @return - The price of the trade in ticks, its notional (trade_price * quantity) has to fit in int64
+        '''
+        try:
+            ticks = self.__tick_size.ticks(trade_.trade_price)
+        except TickSizeException as error:
+            raise TradeManagerException(str(error))
+        if ticks <= 0:
+            raise TradeManagerException('The price is less than a tick: {0!r}'.format(trade_))
+        if not notional_fits(trade_.quantity, ticks):
+            raise TradeManagerException('The notional of the trade overflows int64: {0!r}'.format(trade_))
+        return ticks
+        
+    def add_many(self, stock_symbols_, timestamps_=None, quantities_=None, buy_or_sells_=None, trade_prices_=None):
+        '''
+        adding a batch of trades
+        
+        The trades are given either by columns or by an iterable of 
+        (stock_symbol, timestamp, quantity, buy_or_sell, trade_price) tuples 
+        (as simulation.generate_trades yields) in stock_symbols_.
+        The batch is converted and validated with vectorised operations, the 
+        non-valid trades (e.g. a price which is not a whole number of ticks or a 
+        notional overflowing int64, see set_tick_size) and the late ones if they 
+        are rejected (see set_lateness) are skipped. The added trades get consecutive trade ids in the order of 
+        the batch, from next_trade_id.
+        
+        @stock_symbols_ - Symbols of the stocks or the iterable of trade tuples
+        @timestamps_ - Times of the trades (nanoseconds since epoch, datetime64 or parsable values)
+        @quantities_ - Quantities of the stocks
+        @buy_or_sells_ - The stocks are bought or sold
+        @trade_prices_ - The prices of the stocks (ints, floats or strings like '100.0125')
+        
+        @return - Indices of the rejected trades
+        '''
+        if timestamps_ is None and quantities_ is None and buy_or_sells_ is None and trade_prices_ is None:
+            rows = list(stock_symbols_)
+            if not rows:
+                return np.empty(0, dtype=np.int64)
+            try:
+                stock_symbols_, timestamps_, quantities_, buy_or_sells_, trade_prices_ = zip(*rows)
+            except ValueError as error:
+                raise TradeManagerException('Invalid trades: {0}'.format(error))
+        return self.__add_columns(stock_symbols_, timestamps_, quantities_, buy_or_sells_, trade_prices_, True)
+    
+    def __add_columns(self, stock_symbols_, timestamps_, quantities_, buy_or_sells_, trade_prices_, journal_, in_ticks_=False):
+        '''
+        adding a batch of trades given by columns
+        
+        @journal_ - The trades are written to the journal (if there is one)
+        @in_ticks_ - trade_prices_ is an int64 array of the prices in ticks already, non-positive ones are rejected
+        
+        @return - Indices of the rejected trades
+        '''
+        symbols = np.asarray(stock_symbols_).astype(str)
+        count = len(symbols)
+        if any(len(column) != count for column in (timestamps_, quantities_, buy_or_sells_, trade_prices_)):
+            raise TradeManagerException('Invalid trades: columns of different length')
+        
+        stock_manager = self.stock_manager
+        unique_symbols, inverse = np.unique(symbols, return_inverse=True)
+        known = np.array([symbol in stock_manager for symbol in unique_symbols.tolist()], dtype=bool)
+        timestamps, valid_timestamps = _to_timestamp_ns(timestamps_)
+        quantities, valid_quantities = _to_int64(quantities_)
+        if in_ticks_:
+            trade_prices, valid_trade_prices = np.asarray(trade_prices_, dtype=np.int64), True
+        else:
+            trade_prices, valid_trade_prices = self.__tick_size.ticks_many(trade_prices_)
+        buy_or_sells = np.asarray(buy_or_sells_).astype(bool)
+        
+        valid = (known[inverse] & valid_timestamps & valid_quantities & valid_trade_prices 
+                 & (quantities > 0) & (trade_prices > 0) & notional_fits(quantities, trade_prices))
+        
+        stripes = self.__acquire(self.__stripe_position(symbol) for symbol in unique_symbols[known].tolist())
+        try:
+            try:
+                # the late check, the journal and the store see the same watermark
+                valid[np.flatnonzero(valid)[self.__late(timestamps[valid])]] = False
+                
+                timestamps, quantities, trade_prices = timestamps[valid], quantities[valid], trade_prices[valid]
+                buy_or_sells = buy_or_sells[valid]
+                inverse = inverse[valid]
+                
+                # grouping the trades by stock, keeping their order within a stock
+                order = np.argsort(inverse, kind='stable')
+                bounds = np.cumsum(np.bincount(inverse, minlength=len(unique_symbols)))
+                log_turnovers = quantities * np.log(trade_prices)
+                groups = []
+                start = 0
+                for i, end in enumerate(bounds.tolist()):
+                    if end > start:
+                        groups.append((str(unique_symbols[i]), order[start:end]))
+                    start = end
+                
+                storage = self.__storage
+                symbol_ids = np.array([storage.symbol_id(symbol) if known[i] else -1 
+                                       for i, symbol in enumerate(unique_symbols.tolist())], dtype=np.int32)
+                trade_ids = np.arange(storage.next_trade_id, storage.next_trade_id + len(timestamps), dtype=np.int64)
+                if journal_ and self.__journal is not None:
+                    try:
+                        self.__journal.extend(timestamps, unique_symbols[inverse], quantities, buy_or_sells, trade_prices, trade_ids)
+                    except TradeJournalException as error:
+                        raise TradeManagerException(str(error))
+                storage.extend(timestamps, symbol_ids[inverse], quantities, buy_or_sells, trade_prices, trade_ids)
+                if len(timestamps):
+                    self.__observe(int(timestamps.max()))
+                for symbol, rows in groups:
+                    latest = rows[len(rows) - 1 - np.argmax(timestamps[rows][::-1])]
+                    self.__index.add_partials(symbol, float(log_turnovers[rows].sum()), int(quantities[rows].sum()), 
+                                              int(timestamps[latest]), int(trade_prices[latest]))
+            finally:
+                self.__lock.release()
+            for symbol, rows in groups:
+                self.__windows.add_many(symbol, timestamps[rows], quantities[rows], trade_prices[rows])
+                self.__bars.add_many(symbol, timestamps[rows], quantities[rows], buy_or_sells[rows], trade_prices[rows])
+                self.__statistics.add_many(symbol, timestamps[rows], quantities[rows], trade_prices[rows])
+        finally:
+            for i in reversed(stripes):
+                self.__stripes[i].release()
+        
+        rejected = np.flatnonzero(~valid)
+        self.__count('trades_rejected', len(rejected))
+        return rejected
+        
+    def __late(self, timestamps_):
+        '''
+        Counting the trades older than the watermark
+        
+        @timestamps_ - int64 array, nanoseconds since epoch
+        
+        @return - Mask of the trades rejected by the late policy
+        '''
+        watermark = self.watermark
+        if watermark is None:
+            return np.zeros(len(timestamps_), dtype=bool)
+        late = timestamps_ < watermark
+        if late.any():
+            self.__count('trades_late', int(late.sum()))
+        return late if self.__late_policy == self.REJECT else np.zeros(len(timestamps_), dtype=bool)
+    
+    def __observe(self, timestamp_):
+        '''
+        Moving the clock and the watermark forward to an added trade, the store has to be locked
+        '''
+        self.__clock.observe(timestamp_)
+        if self.__event_time is None or timestamp_ > self.__event_time:
+            self.__event_time = timestamp_
+    
+    @property
+    def next_trade_id(self):
+        '''
+        The trade id of the next added trade
+        '''
+        return self.__storage.next_trade_id
+    
+    def find_trade(self, trade_id_):
+        '''
+        @trade_id_ - Trade id given by add or add_many
+        
+        @return - dict of the trade: stock_symbol, timestamp (nanoseconds since epoch), 
+                  quantity, buy_or_sell, trade_price
+        '''
+        with self.__lock:
+            storage = self.__storage
+            position = storage.locate(trade_id_) if isinstance(trade_id_, (int, np.integer)) else None
+            if position is None:
+                raise TradeManagerException('Unknown trade id: {0!r}'.format(trade_id_))
+            return {'stock_symbol': storage.symbols[storage.symbol_ids[position]], 
+                    'timestamp': int(storage.timestamp[position]), 'quantity': int(storage.quantity[position]), 
+                    'buy_or_sell': bool(storage.buy_or_sell[position]), 
+                    'trade_price': self.__tick_size.price(storage.trade_price[position])}
+    
+    def cancel(self, trade_id_):
+        '''
+        Cancelling a trade: its contribution is retracted from the VWSP windows 
+        and its bar, instead of recomputing them from the stored trades. The GBCE 
+        accumulators of the stock are rebuilt from its stored trades, as subtracting 
+        a float sum would leave rounding errors behind. The price statistics 
+        (sketches) are not corrected.
+        
+        @trade_id_ - Trade id given by add or add_many
+        '''
+        self.__correct(trade_id_, None)
+        self.__count('trades_cancelled')
+    
+    def amend(self, trade_id_, quantity_=None, trade_price_=None, buy_or_sell_=None, timestamp_=None):
+        '''
+        Amending a trade: the contribution of the former trade is retracted (see 
+        cancel) and the amended trade is added with the same trade id. The stock 
+        of a trade can not be amended.
+        
+        @trade_id_ - Trade id given by add or add_many
+        @quantity_, @trade_price_, @buy_or_sell_, @timestamp_ - The new attributes, None keeps the former one
+        '''
+        self.__correct(trade_id_, (timestamp_, quantity_, buy_or_sell_, trade_price_))
+        self.__count('trades_amended')
+    
+    def __correct(self, trade_id_, changes_):
+        '''
+        Cancelling (changes_ is None) or amending a trade
+        
+        @changes_ - (timestamp, quantity, buy_or_sell, trade_price), None keeps the former attribute
+        '''
+        with self.__lock:
+            storage = self.__storage
+            symbol_id = storage.symbol_id_of(trade_id_) if isinstance(trade_id_, (int, np.integer)) else None
+        if symbol_id is None:
+            raise TradeManagerException('Unknown trade id: {0!r}'.format(trade_id_))
+        symbol = storage.symbols[symbol_id]
+        with self.__stripe(symbol):
+            with self.__lock:
+                position = storage.locate(trade_id_)
+                if position is None:
+                    raise TradeManagerException('Unknown trade id: {0!r}'.format(trade_id_))
+                former = (int(storage.timestamp[position]), int(storage.quantity[position]), 
+                          bool(storage.buy_or_sell[position]), int(storage.trade_price[position]))
+                if changes_ is None:
+                    amended = None
+                    correction = (former[0], 0, former[2], former[3])
+                else:
+                    try:
+                        trade = Trade(symbol, *(former[i] if change is None else change for i, change in enumerate(changes_)), 
+                                      stock_manager_=self.stock_manager)
+                    except TradeException as error:
+                        raise TradeManagerException('Invalid amendment: {0}'.format(error))
+                    if changes_[3] is not None:
+                        ticks = self.__ticks(trade)
+                    elif notional_fits(trade.quantity, former[3]):
+                        ticks = former[3]
+                    else:
+                        raise TradeManagerException('The notional of the amended trade overflows int64: {0}'.format(trade_id_))
+                    if trade.timestamp != former[0] and self.__late(np.array([trade.timestamp], dtype=np.int64))[0]:
+                        raise TradeManagerException('Late amendment, older than the watermark: {0!r}'.format(trade))
+                    amended = correction = (trade.timestamp, trade.quantity, trade.buy_or_sell, ticks)
+                if self.__journal is not None:
+                    try:
+                        self.__journal.correct(trade_id_, correction[0], symbol, *correction[1:])
+                    except TradeJournalException as error:
+                        raise TradeManagerException(str(error))
+                
+                if amended is not None and amended[0] == former[0]:
+                    storage.update(position, *amended[1:])
+                else:
+                    storage.remove(position)
+                    if amended is not None:
+                        storage.append(amended[0], symbol, *amended[1:], trade_id_=trade_id_)
+                        self.__observe(amended[0])
+                rows = storage.between(_NS_MIN, _NS_MAX, symbol_id_=symbol_id)
+                quantities = storage.quantity[rows]
+                self.__index.set_session(symbol, float((quantities * np.log(storage.trade_price[rows])).sum()), 
+                                         int(quantities.sum()))
+                latest = storage.latest(symbol_id)
+                if latest is None:
+                    self.__index.set_latest(symbol)
+                else:
+                    self.__index.set_latest(symbol, int(storage.timestamp[latest]), int(storage.trade_price[latest]))
+                
+                # the trades of the bars of the former and the amended trade
+                bars = []
+                for timestamp in sorted({former[0], amended[0]} if amended is not None else {former[0]}):
+                    rows = storage.between(*self.__bars.bounds(timestamp), symbol_id_=symbol_id)
+                    bars.append((timestamp, storage.timestamp[rows], storage.quantity[rows], 
+                                 storage.buy_or_sell[rows], storage.trade_price[rows]))
+            self.__windows.remove(symbol, former[0], former[1], former[3])
+            if amended is not None:
+                self.__windows.add(symbol, amended[0], amended[1], amended[3])
+            for bar in bars:
+                self.__bars.replace(symbol, *bar)
+    
+    def open_journal(self, path_):
+        '''
+        Writing the trades through to an on-disk journal. The trades already in 
+        the journal (e.g. of a session before a restart) are replayed first, the 
+        mapped columns are added as a batch.
+        
+        @path_ - Path of the journal file, it is created if it does not exist
+        
+        @return - Number of the replayed trades
+        '''
+        try:
+            journal = TradeJournal(path_)
+        except (OSError, TradeJournalException) as error:
+            raise TradeManagerException('Invalid journal: {0}'.format(error))
+        with self.__lock:
+            if self.__journal is not None:
+                journal.close()
+                raise TradeManagerException('A journal is already opened: {0}'.format(self.__journal.path))
+            self.__journal = journal
+        stripes = self.__acquire(range(self.STRIPES))
+        try:
+            return self.__restore(journal.records)
+        except TradeManagerException:
+            self.__journal = None
+            journal.close()
+            raise
+        finally:
+            self.__release(stripes)
+    
+    def __restore(self, records_):
+        '''
+        Adding the records of a journal, they were validated when they were written. 
+        The corrections are applied to the trades before they are added, the last 
+        correction of a trade wins. The rows of a stock are found by comparing the 
+        fixed-width symbols as integers, and only the trades which are still live 
+        are loaded into the rolling windows.
+        
+        @records_ - Structured array of TradeJournal.RECORD
+        
+        @return - Number of the added trades
+        '''
+        if len(records_) == 0:
+            return 0
+        corrections = records_[records_['correction']]
+        if len(corrections):
+            records_ = records_[~records_['correction']]
+            if len(records_) == 0:
+                return 0
+        trade_ids = records_['trade_id'].copy()
+        storage = self.__storage
+        written = trade_ids >= 0
+        if written.any() and int(trade_ids[written].min()) < storage.next_trade_id:
+            raise TradeManagerException('The trade ids of the journal are already used')
+        missing = np.flatnonzero(~written)
+        trade_ids[missing] = np.arange(len(missing)) + max(storage.next_trade_id, int(trade_ids.max()) + 1)
+        # the ids of the cancelled trades are not given again
+        last_trade_id = int(trade_ids.max())
+        
+        columns = [records_[name] for name in ('symbol', 'timestamp', 'quantity', 'buy_or_sell', 'trade_price')]
+        if len(corrections):
+            columns = [column.copy() for column in columns]
+            corrected = corrections['trade_id']
+            last = len(corrected) - 1 - np.unique(corrected[::-1], return_index=True)[1]
+            order = np.argsort(trade_ids, kind='stable')
+            positions = order[np.minimum(np.searchsorted(trade_ids[order], corrected[last]), len(order) - 1)]
+            found = trade_ids[positions] == corrected[last]
+            for column, name in zip(columns[1:], ('timestamp', 'quantity', 'buy_or_sell', 'trade_price')):
+                column[positions[found]] = corrections[name][last[found]]
+            # the cancelled trades have 0 quantity
+            kept = columns[2] > 0
+            columns = [column[kept] for column in columns]
+            trade_ids = trade_ids[kept]
+        
+        codes = columns[0].view(np.uint64)
+        symbol_ids = np.full(len(codes), -1, dtype=np.int32)
+        groups = []
+        width = records_.dtype['symbol'].itemsize
+        for symbol in self.stock_manager.symbols:
+            if len(symbol.encode()) > width:
+                continue
+            code = np.array([symbol.encode()], dtype=records_.dtype['symbol']).view(np.uint64)[0]
+            rows = np.flatnonzero(codes == code)
+            if len(rows):
+                symbol_id = storage.symbol_id(intern(symbol))
+                symbol_ids[rows] = symbol_id
+                groups.append((storage.symbols[symbol_id], rows))
+        valid = symbol_ids >= 0
+        
+        if not valid.all():
+            timestamps, quantities, buy_or_sells, trade_prices = (column[valid] for column in columns[1:])
+            trade_ids = trade_ids[valid]
+            positions = np.cumsum(valid) - 1
+            groups = [(symbol, positions[rows]) for symbol, rows in groups]
+        else:
+            timestamps, quantities, buy_or_sells, trade_prices = (np.ascontiguousarray(column) for column in columns[1:])
+        storage.extend(timestamps, symbol_ids[valid], quantities, buy_or_sells, trade_prices, trade_ids)
+        storage.allocate_trade_ids(max(last_trade_id + 1 - storage.next_trade_id, 0))
+        if len(timestamps):
+            self.__observe(int(timestamps.max()))
+        
+        longest = max(self.__windows.lengths, default=0) * 10**9
+        horizon = (self.__statistics.horizon + self.__statistics.bucket) * 10**9
+        for symbol, rows in groups:
+            symbol_timestamps = timestamps[rows]
+            log_turnovers = quantities[rows] * np.log(trade_prices[rows])
+            latest = len(rows) - 1 - int(np.argmax(symbol_timestamps[::-1]))
+            self.__index.add_partials(symbol, float(log_turnovers.sum()), int(quantities[rows].sum()), 
+                                      int(symbol_timestamps[latest]), int(trade_prices[rows[latest]]))
+            live = rows[symbol_timestamps >= symbol_timestamps[latest] - longest]
+            self.__windows.add_many(symbol, timestamps[live], quantities[live], trade_prices[live])
+            self.__bars.add_many(symbol, symbol_timestamps, quantities[rows], buy_or_sells[rows], trade_prices[rows])
+            recent = rows[symbol_timestamps >= symbol_timestamps[latest] - horizon]
+            self.__statistics.add_many(symbol, timestamps[recent], quantities[recent], trade_prices[recent])
+        return len(timestamps)
+    
+    def close_journal(self):
+        '''
+        Stopping writing the trades to the journal
+        '''
+        with self.__lock:
+            if self.__journal is not None:
+                self.__journal.close()
+                self.__journal = None
+        
+    @property
+    def stock_manager(self):
+        '''
+        The stocks of the trades
+        '''
+        return StockManager() if self.__stock_manager is None else self.__stock_manager
+    
+    @property
+    def clock(self):
+        return self.__clock
+    
+    @property
+    def tick_size(self):
+        '''
+        The TickSize the prices are stored in
+        '''
+        return self.__tick_size
+    
+    def set_tick_size(self, tick_size_):
+        '''
+        Setting the price of a tick. The prices are stored as int64 numbers of ticks 
+        (see ticks.TickSize), so a price which is not a whole number of ticks is 
+        rejected (unless a TickSize truncating the prices is given, as TICK_SIZE does), 
+        and every sum of trade_price * quantity is an exact integer sum. 
+        The results are converted to prices only when they are given back.
+        It can be set only while there are no trades, and the journal and the 
+        snapshots keep the prices in ticks as well.
+        
+        @tick_size_ - The price of a tick (e.g. '0.0001' for 1/10000 penny) or a TickSize
+        '''
+        try:
+            tick_size = tick_size_ if isinstance(tick_size_, TickSize) else TickSize(tick_size_)
+        except TickSizeException as error:
+            raise TradeManagerException(str(error))
+        with self.__lock:
+            if len(self.__storage) or self.__journal is not None:
+                raise TradeManagerException('The tick size can not be changed after adding trades or opening a journal')
+            self.__tick_size = tick_size
+    
+    def set_clock(self, clock_):
+        '''
+        Setting the clock the windows are evaluated at (see clock.WallClock and clock.EventClock).
+        An event clock is moved forward to the latest stored trade. The windows 
+        evicted at the time of the former clock are loaded again from the store.
+        
+        @clock_ - The clock, an object with now() and observe(timestamp_)
+        '''
+        stripes = self.__acquire(range(self.STRIPES))
+        try:
+            if len(self.__storage):
+                clock_.observe(int(self.__storage.timestamp[-1]))
+            self.__clock = clock_
+            self.__load_windows()
+        finally:
+            self.__release(stripes)
+    
+    def now(self):
+        '''
+        @return - The current time of the clock (nanoseconds since epoch)
+        '''
+        return self.__clock.now()
+    
+    def set_lateness(self, lateness_=None, policy_=ACCEPT):
+        '''
+        Setting the watermark of the late trades: a trade older than the latest 
+        added trade by more than lateness_ is late. The late trades are counted 
+        (trades_late), and either added (ACCEPT, they are merged into the windows 
+        and the bars at their place) or rejected (REJECT). Without a lateness 
+        every trade is accepted.
+        
+        @lateness_ - Allowed lateness in seconds, None for no watermark
+        @policy_ - ACCEPT or REJECT
+        '''
+        if policy_ not in (self.ACCEPT, self.REJECT):
+            raise TradeManagerException('Invalid late policy: {0}'.format(policy_))
+        try:
+            lateness = None if lateness_ is None else int(float(lateness_) * 10**9)
+        except (TypeError, ValueError) as error:
+            raise TradeManagerException('Invalid lateness: {0}'.format(error))
+        if lateness is not None and lateness < 0:
+            raise TradeManagerException('Invalid lateness: {0}'.format(lateness_))
+        with self.__lock:
+            self.__lateness = lateness
+            self.__late_policy = policy_
+    
+    @property
+    def watermark(self):
+        '''
+        The time (nanoseconds since epoch) the trades older than are late, None without lateness or trades
+        '''
+        event_time, lateness = self.__event_time, self.__lateness
+        return None if event_time is None or lateness is None else event_time - lateness
+    
+    def enable_metrics(self):
+        '''
+        Measuring the latency of the INSTRUMENTED operations and counting the events
+        (queries answered by the rolling windows or by scanning, rejected trades).
+        Without metrics the operations are not wrapped at all.
+        '''
+        with self.__lock:
+            if self.__metrics is None:
+                metrics = Metrics()
+                for name in self.INSTRUMENTED:
+                    setattr(self, name, metrics.timed(name, getattr(self, name)))
+                self.__metrics = metrics
+    
+    def disable_metrics(self):
+        with self.__lock:
+            for name in self.INSTRUMENTED:
+                self.__dict__.pop(name, None)
+            self.__metrics = None
+    
+    def __count(self, name_, value_=1):
+        metrics = self.__metrics
+        if metrics is not None:
+            metrics.count(name_, value_)
+    
+    def stats(self):
+        '''
+        @return - dict of the size of the store and the metrics of the operations:
+                  trades, symbols, store_bytes, store_capacity, windows, journal_records, 
+                  gbce_cache_hits, gbce_cache_misses, operations (latency statistics by 
+                  operation, if the metrics are enabled), counters (events by name)
+        '''
+        with self.__lock:
+            storage = self.__storage
+            stats = {'trades': len(storage), 'symbols': len(storage.symbols), 'store_bytes': storage.nbytes, 
+                     'store_capacity': storage.capacity, 'windows': self.__windows.lengths,
+                     'journal_records': len(self.__journal) if self.__journal is not None else 0,
+                     'gbce_cache_hits': self.__index.hits, 'gbce_cache_misses': self.__index.misses}
+            metrics = self.__metrics
+        stats.update(metrics.stats() if metrics is not None else {'operations': {}, 'counters': {}})
+        return stats
+    
+    def dump_metrics(self, target_):
+        '''
+        Writing the metrics in Prometheus text format
+        
+        @target_ - Path of a file, (host, port) of a TCP listener or a connected socket
+        '''
+        stats = self.stats()
+        gauges = {name: stats[name] for name in ('trades', 'symbols', 'store_bytes', 'store_capacity', 'journal_records')}
+        gauges.update({'gbce_cache_hits_total': stats['gbce_cache_hits'], 'gbce_cache_misses_total': stats['gbce_cache_misses']})
+        text = (self.__metrics or Metrics()).prometheus(gauges)
+        try:
+            dump(text, target_)
+        except MetricsException as error:
+            raise TradeManagerException(str(error))
+        return text
+    
+    def export(self, path_, format_=None, chunk_size_=snapshot.CHUNK_SIZE):
+        '''
+        Writing the trade history and the reference data of the stocks into a 
+        columnar snapshot, the symbols are dictionary encoded
+        
+        @path_ - Path of the snapshot
+        @format_ - 'npz' or 'parquet' (needs pyarrow), by the extension of the path if it is None
+        @chunk_size_ - Number of trades written at once
+        
+        @return - Number of the exported trades
+        '''
+        chunk_size = int(chunk_size_)
+        if chunk_size <= 0:
+            raise TradeManagerException('Non-valid chunk size: {0}'.format(chunk_size_))
+        # the columns are copied under the lock, the file is written without holding it
+        with self.__lock:
+            storage = self.__storage
+            columns = {name: storage.column(name).copy() for name, _ in snapshot.COLUMNS}
+            symbols = list(storage.symbols)
+            tick_size = self.__tick_size
+        chunks = ({name: column[start:start + chunk_size] for name, column in columns.items()} 
+                  for start in range(0, len(columns['timestamp']), chunk_size))
+        try:
+            return snapshot.write(path_, chunks, symbols, self.stock_manager.stocks_header(), format_, tick_size)
+        except (OSError, snapshot.SnapshotException) as error:
+            raise TradeManagerException('Export failed: {0}'.format(error))
+    
+    def import_(self, path_, format_=None):
+        '''
+        Adding the trades of a snapshot chunk by chunk, the stocks of the snapshot 
+        are created in the StockManager
+        
+        @path_ - Path of the snapshot
+        @format_ - 'npz' or 'parquet' (needs pyarrow), by the extension of the path if it is None
+        
+        @return - Number of the imported trades
+        '''
+        try:
+            symbols, (header, stocks) = snapshot.read_reference(path_, format_)
+            tick_size = TickSize(snapshot.read_tick_size(path_, format_))
+            self.stock_manager.create_stocks_header(header, stocks)
+            symbols = np.array(symbols, dtype=str)
+            count = 0
+            for chunk in snapshot.read_chunks(path_, format_):
+                # the prices in the ticks of the snapshot are rescaled exactly to the ticks of the trade manager,
+                # a price which is not a whole number of them is rejected (as 0 ticks)
+                ticks, _ = self.__tick_size.rescale(chunk['trade_price'], tick_size)
+                rejected = self.__add_columns(symbols[chunk['symbol_id']], chunk['timestamp'], chunk['quantity'], 
+                                              chunk['buy_or_sell'], ticks, True, in_ticks_=True)
+                count += len(chunk['timestamp']) - len(rejected)
+            return count
+        except (snapshot.SnapshotException, TickSizeException) as error:
+            raise TradeManagerException('Import failed: {0}'.format(error))
+        
     def __len__(self):
         return len(self.__storage)
+    
+    @property
+    def storage(self):
+        '''
+        The columnar trade store (read-only views on its columns)
+        '''
+        return self.__storage
+        
+    @property
+    def windows(self):
+        '''
+        The registered window lengths in seconds
+        '''
+        return self.__windows.lengths
+    
+    def register_window(self, interval_):
+        '''
+        Registering a window length whose VWSP is maintained incrementally.
+        The already stored trades are loaded into the new windows.
+        
+        @interval_ - Length of the time window in seconds
+        '''
+        stripes = self.__acquire(range(self.STRIPES))
+        try:
+            if not self.__windows.register(interval_):
+                return
+            self.__load_windows()
+        except (TypeError, ValueError, RollingWindowException) as error:
+            raise TradeManagerException('Invalid time interval: {0}'.format(error))
+        finally:
+            self.__release(stripes)
+    
+    def __load_windows(self):
+        '''
+        Loading the stored trades into the windows, every stripe and the store has to be locked
+        '''
+        self.__windows.clear()
+        storage = self.__storage
+        for symbol_id, symbol in enumerate(storage.symbols):
+            rows = storage.between(_NS_MIN, _NS_MAX, symbol_id)
+            self.__windows.add_many(symbol, storage.timestamp[rows], storage.quantity[rows], storage.trade_price[rows])
+        
+    def bars(self, resolution_, start_, end_, stock_symbol_):
+        '''
+        OHLCV bars of a stock starting in a time range [start_, end_)
+        
+        @resolution_ - Length of the bars in seconds, one of BARS
+        @start_ - Beginning of the range (Timestamp, parsable value or nanoseconds since epoch)
+        @end_ - End of the range, exclusive
+        @stock_symbol_ - Symbol of the given stock
         
-    def volume_weighted_stock_price(self, interval_):
+        @return - dict of arrays in time order: start (nanoseconds since epoch), open, high, 
+                  low, close, volume, vwap, buy_volume, sell_volume, trades
+        '''
+        start, end = _to_ns(start_), _to_ns(end_)
+        with self.__stripe(stock_symbol_):
+            try:
+                bars = self.__bars.bars(stock_symbol_, resolution_, start, end)
+            except BarsException as error:
+                raise TradeManagerException(str(error))
+        tick_size = self.__tick_size
+        for name in ('open', 'high', 'low', 'close'):
+            bars[name] = tick_size.prices(bars[name])
+        bars['vwap'] = tick_size.scale(bars['vwap'])
+        return bars
+    
+    def price_statistics(self, interval_, stock_symbol_, quantiles_=(0.5, 0.95)):
+        '''
+        Approximate statistics of the trades of a stock in the last interval_ seconds, 
+        merged from time buckets of streaming sketches (see sketches.PriceStatistics), 
+        so the window is rounded out to whole buckets of STATISTICS.
+        
+        @interval_ - Length of the time window in seconds, at most the horizon of STATISTICS
+        @stock_symbol_ - Symbol of the given stock
+        @quantiles_ - Quantiles of the trade prices and quantities, between 0 and 1
+        
+        @return - dict: trades, price ({quantile: trade price}), quantity ({quantile: quantity}), 
+                  volatility (standard deviation of the log returns between consecutive trades),
+                  mean_log_return
+        '''
+        try:
+            interval = int(interval_)
+        except (TypeError, ValueError) as te:
+            raise TradeManagerException('Invalid time interval: {0}'.format(te))
+        if not 0 < interval <= self.__statistics.horizon:
+            raise TradeManagerException('Invalid time interval: {0}'.format(interval_))
+        now = self.__clock.now()
+        with self.__stripe(stock_symbol_):
+            prices, quantities, returns = self.__statistics.statistics(stock_symbol_, now - interval * 10**9, now + 1)
+        try:
+            return {'trades': prices.count, 
+                    'price': {quantile: self.__tick_size.scale(prices.quantile(quantile)) for quantile in quantiles_},
+                    'quantity': {quantile: quantities.quantile(quantile) for quantile in quantiles_},
+                    'volatility': returns.std(), 'mean_log_return': returns.mean}
+        except SketchException as error:
+            raise TradeManagerException(str(error))
+    
+    def volume_weighted_stock_price(self, interval_, stock_symbol_=None):
         '''
         Formula : \frac{\sum{i}{trade_price_i * qunatity_i}}{\sum{i}{quantity_i}}
         
+        Registered window lengths are answered from the rolling windows, 
+        other lengths by scanning the stored trades.
+        
+        @interval_ - Length of the time window in seconds
+        @stock_symbol_ - Symbol of the given stock, all stocks are used if it is None
+        '''
+        turnover, volume = self.turnover_and_volume(interval_, stock_symbol_)
+        return self.__tick_size.vwap(turnover, volume)
+    
+    def turnover_and_volume(self, interval_, stock_symbol_=None, now_=None):
+        '''
+        The sums VWSP is computed from
+        
+        @interval_ - Length of the time window in seconds
+        @stock_symbol_ - Symbol of the given stock, all stocks are used if it is None
+        @now_ - End of the time window (nanoseconds since epoch, inclusive), the current time by default,
+                the rolling windows answer only for a time not earlier than their latest one, 
+                otherwise the store is scanned
+        
+        @return - (sum of trade_price * quantity with the prices in ticks, sum of quantity) as ints, 
+                  they are exact (see ticks.exact_sum)
         '''
         try:
-            #unfortunately, pandas' DataFrame cannot be appended "in place".
-            if self.__df_time == None or self.__append_time > self.__df_time:
-                self.__df_storage = DataFrame(self.__storage)
-                self.__df_storage.set_index('timestamp')
-                self.__df_time = Timestamp.now()
-            
-            current_df = self.__df_storage[self.__df_storage.timestamp >= Timestamp.now()-Timedelta(seconds = int(interval_))]
-            return sum(current_df.quantity * current_df.trade_price)/sum(current_df.quantity)
-        except TypeError as te:
+            interval = int(interval_)
+        except (TypeError, ValueError) as te:
             raise TradeManagerException('Invalid time interval: {0}'.format(te))
+        now = self.__clock.now() if now_ is None else int(now_)
+        
+        if interval in self.__windows:
+            sums = self.__window_sums(interval, now, stock_symbol_)
+            if sums is not None:
+                self.__count('vwsp_window')
+                return sums[0], sums[1]
+        self.__count('vwsp_scan')
+        with self.__lock:
+            rows = self.__rows(now - interval * 10**9, now + 1, stock_symbol_)
+            quantity = self.__storage.quantity[rows]
+            return exact_sum(quantity * self.__storage.trade_price[rows]), exact_sum(quantity)
+    
+    def __window_sums(self, interval_, now_, stock_symbol_=None):
+        '''
+        Running sums of the rolling windows, every stock is locked separately
+        
+        @return - (sum of trade_price * quantity, sum of quantity, 
+                   list of the sums of quantity * log(trade_price) per stock),
+                  None if a window has no sums for now_ (see RollingWindows.sums)
+        '''
+        symbols = self.__windows.symbols() if stock_symbol_ is None else [stock_symbol_]
+        turnover, volume, log_turnovers = 0, 0, []
+        for symbol in symbols:
+            with self.__stripe(symbol):
+                sums = self.__windows.sums(interval_, now_, symbol)
+            if sums is None:
+                return None
+            turnover += sums[0]
+            volume += sums[1]
+            log_turnovers.extend(sums[2])
+        return turnover, volume, log_turnovers
     
-    def gbce_all_share_index(self):
+    def volume_weighted_stock_price_between(self, start_, end_, stock_symbol_=None):
+        '''
+        VWSP of the trades in an arbitrary time range [start_, end_)
+        
+        @start_ - Beginning of the range (Timestamp, parsable value or nanoseconds since epoch)
+        @end_ - End of the range, exclusive
+        @stock_symbol_ - Symbol of the given stock, all stocks are used if it is None
+        '''
+        turnover, volume = self.turnover_and_volume_between(start_, end_, stock_symbol_)
+        return self.__tick_size.vwap(turnover, volume)
+    
+    def turnover_and_volume_between(self, start_, end_, stock_symbol_=None):
+        '''
+        The sums VWSP is computed from, in an arbitrary time range [start_, end_)
+        
+        The whole bars of the finest resolution in the range are summed from 
+        the prefix sums of the bars, only the trades of the partial bars at 
+        the two ends of the range are read from the store. The whole range is 
+        read from the store if the turnover of a bar in it overflows int64.
+        
+        @start_ - Beginning of the range (Timestamp, parsable value or nanoseconds since epoch)
+        @end_ - End of the range, exclusive
+        @stock_symbol_ - Symbol of the given stock, all stocks are used if it is None
+        
+        @return - (sum of trade_price * quantity with the prices in ticks, sum of quantity) as ints
+        '''
+        start, end = _to_ns(start_), _to_ns(end_)
+        resolution = self.__bars.resolutions[0] * 10**9
+        # the whole bars are [first, last)
+        first, last = -(-start // resolution) * resolution, end - end % resolution
+        if first >= last:
+            first = last = end
+        stripes = self.__acquire(range(self.STRIPES) if stock_symbol_ is None else [self.__stripe_position(stock_symbol_)])
+        try:
+            turnover, volume = 0, 0
+            if first < last:
+                symbols = self.__bars.symbols() if stock_symbol_ is None else [stock_symbol_]
+                try:
+                    for symbol in symbols:
+                        sums = self.__bars.sums(symbol, first, last)
+                        turnover += sums[0]
+                        volume += sums[1]
+                except BarsException:
+                    turnover, volume = 0, 0
+                    first = last = end
+            for edge_start, edge_end in ((start, first), (last, end)):
+                if edge_start < edge_end:
+                    rows = self.__rows(edge_start, edge_end, stock_symbol_)
+                    quantity = self.__storage.quantity[rows]
+                    turnover += exact_sum(quantity * self.__storage.trade_price[rows])
+                    volume += exact_sum(quantity)
+        finally:
+            self.__release(stripes)
+        return turnover, volume
+    
+    def __rows(self, start_, end_, stock_symbol_=None):
+        '''
+        @return - Row positions of the trades in [start_, end_), of a single stock if stock_symbol_ is given
+        '''
+        if stock_symbol_ is None:
+            return self.__storage.between(start_, end_)
+        symbol_id = self.__storage.find_symbol_id(stock_symbol_)
+        if symbol_id is None:
+            return slice(0, 0)
+        return self.__storage.between(start_, end_, symbol_id)
+    
+    def trades_between(self, start_, end_, stock_symbol_=None):
+        '''
+        Trades in a time range [start_, end_), found by binary search
+        
+        @start_ - Beginning of the range (Timestamp, parsable value or nanoseconds since epoch)
+        @end_ - End of the range, exclusive
+        @stock_symbol_ - Symbol of the given stock, all stocks are used if it is None
+        
+        @return - dict of arrays in time order: stock_symbol, timestamp (nanoseconds since epoch), 
+                  quantity, buy_or_sell, trade_price
+        '''
+        start, end = _to_ns(start_), _to_ns(end_)
+        with self.__lock:
+            storage = self.__storage
+            rows = self.__rows(start, end, stock_symbol_)
+            symbols = np.array(storage.symbols, dtype=object)
+            return {'stock_symbol': symbols[storage.symbol_ids[rows]] if len(symbols) else np.empty(0, dtype=object),
+                    'timestamp': storage.timestamp[rows].copy(),
+                    'quantity': storage.quantity[rows].copy(),
+                    'buy_or_sell': storage.buy_or_sell[rows].copy(),
+                    'trade_price': self.__tick_size.prices(storage.trade_price[rows].copy())}
+    
+    def gbce_all_share_index(self, mode_=AllShareIndex.SESSION, interval_=None):
         '''
         Geometric mean for stock prices
         
         RELATIONSHIP WITH LOGARITHMS
         https://en.wikipedia.org/wiki/Geometric_mean#Relationship_with_logarithms
+        
+        @mode_ - AllShareIndex.SESSION : every trade of the session weighted by quantity
+                 AllShareIndex.LATEST : the latest trade price of every stock
+                 AllShareIndex.WINDOW : the trades of the last interval_ seconds weighted by quantity
+        @interval_ - Length of the time window in seconds, only for WINDOW mode
+        '''
+        if mode_ != AllShareIndex.WINDOW:
+            try:
+                with self.__lock:
+                    return self.__tick_size.scale(self.__index.value(mode_))
+            except AllShareIndexException as error:
+                raise TradeManagerException(str(error))
+        return self.__tick_size.scale(AllShareIndex.combine(*self.gbce_partials(mode_, interval_)))
+    
+    def latest_prices(self):
+        '''
+        @return - dict of the latest (by timestamp) trade price of every traded stock
+        '''
+        with self.__lock:
+            prices = self.__index.latest_prices()
+        return {symbol: self.__tick_size.price(price) for symbol, price in prices.items()}
+    
+    def gbce_partials(self, mode_=AllShareIndex.SESSION, interval_=None, now_=None):
         '''
+        The per stock partial sums the GBCE All Share Index is combined from 
+        (see at AllShareIndex.combine)
+        
+        @mode_ - See at gbce_all_share_index
+        @interval_ - Length of the time window in seconds, only for WINDOW mode
+        @now_ - End of the time window (nanoseconds since epoch, inclusive), the current time by default,
+                see at turnover_and_volume
+        
+        @return - (list of the sums of quantity * log(trade_price) with the prices in ticks, 
+                   list of the sums of quantity)
+        '''
+        if mode_ != AllShareIndex.WINDOW:
+            try:
+                with self.__lock:
+                    return self.__index.partials(mode_)
+            except AllShareIndexException as error:
+                raise TradeManagerException(str(error))
+        
         try:
-            return exp(sum([trade['quantity']*log(trade['trade_price']) for trade in self.__storage])/sum([trade['quantity'] for trade in self.__storage]))
-        except ZeroDivisionError:
-            return 0.0
+            interval = int(interval_)
+        except (TypeError, ValueError) as te:
+            raise TradeManagerException('Invalid time interval: {0}'.format(te))
+        now = self.__clock.now() if now_ is None else int(now_)
+        
+        if interval in self.__windows:
+            sums = self.__window_sums(interval, now)
+            if sums is not None:
+                self.__count('gbce_window')
+                return sums[2], [sums[1]]
+        
+        self.__count('gbce_scan')
+        with self.__lock:
+            rows = self.__rows(now - interval * 10**9, now + 1)
+            quantity = self.__storage.quantity[rows]
+            log_turnovers = np.bincount(self.__storage.symbol_ids[rows], weights=quantity * np.log(self.__storage.trade_price[rows]))
+            volume = exact_sum(quantity)
+        return log_turnovers.tolist(), [volume]
         
     @classmethod
     def _clear(cls):
@@ -0,0 +1,335 @@
+'''
+Created on 18 Oct 2026
+
+@author: agocsi
+'''
+
+from math import log
+import numpy as np
+from ticks import exact_sum
+
+
+class RollingWindowException(Exception):
+    def __init__(self, message_):
+        super(RollingWindowException, self).__init__(message_)
+
+
+class RollingWindow(object):
+    '''
+    Sliding time window over the trades of a single stock.
+
+    The trades of the window are kept in time ordered NumPy ring buffers (timestamp,
+    trade_price * quantity, quantity and quantity * log(trade_price)), the running
+    sums are updated when trades enter or leave the window, so VWSP and the geometric
+    mean of the prices are answered in amortised O(1). The integer sums are Python
+    ints summed without int64 overflow (see ticks.exact_sum). Expired trades are dropped
+    from the head with a binary search, batches are appended with a single copy.
+    '''
+
+    def __init__(self, length_, capacity_=64):
+        '''
+        Constructor
+
+        @length_ - Length of the window in seconds
+        @capacity_ - Number of trades preallocated
+        '''
+        self.length = int(length_)
+        if self.length <= 0:
+            raise RollingWindowException('Non-valid window length: {0}'.format(length_))
+        self.__length_ns = self.length * 10**9
+        self.__capacity = max(int(capacity_), 1)
+        self.__timestamps = np.empty(self.__capacity, dtype=np.int64)
+        self.__turnovers = np.empty(self.__capacity, dtype=np.int64)
+        self.__quantities = np.empty(self.__capacity, dtype=np.int64)
+        self.__log_turnovers = np.empty(self.__capacity, dtype=np.float64)
+        self.__head = 0
+        self.__tail = 0
+        self.turnover = 0
+        self.volume = 0
+        self.log_turnover = 0.0
+        # the latest time the window was evicted at, it has no sums for an earlier time
+        self.latest = None
+
+    def __len__(self):
+        return self.__tail - self.__head
+
+    def __columns(self):
+        return (self.__timestamps, self.__turnovers, self.__quantities, self.__log_turnovers)
+
+    def __reserve(self, count_):
+        '''
+        Making room for count_ trades after the tail, the live trades are moved 
+        to the beginning of the buffers and the buffers are grown geometrically
+        '''
+        if self.__tail + count_ <= self.__capacity:
+            return
+        size = self.__tail - self.__head
+        capacity = self.__capacity
+        while (size + count_) * 2 > capacity:
+            capacity *= 2
+        columns = []
+        for column in self.__columns():
+            moved = np.empty(capacity, dtype=column.dtype) if capacity != self.__capacity else column
+            moved[:size] = column[self.__head:self.__tail]
+            columns.append(moved)
+        self.__timestamps, self.__turnovers, self.__quantities, self.__log_turnovers = columns
+        self.__capacity = capacity
+        self.__head, self.__tail = 0, size
+
+    def add(self, timestamp_, quantity_, trade_price_):
+        '''
+        Adding a trade to the window, trades which are expired at the time of the
+        new trade are evicted.
+        An out of order trade is inserted at its place, or ignored if it is 
+        already expired compared to the latest trade of the window.
+
+        @timestamp_ - Nanoseconds since epoch
+        @quantity_ - Quantity of the stock
+        @trade_price_ - The price of the stock
+        '''
+        empty = self.__tail == self.__head
+        if not empty and timestamp_ < self.__timestamps[self.__tail - 1] - self.__length_ns:
+            return
+        turnover = quantity_ * trade_price_
+        log_turnover = quantity_ * log(trade_price_)
+
+        self.__reserve(1)
+        head, tail = self.__head, self.__tail
+        if empty or timestamp_ >= self.__timestamps[tail - 1]:
+            position = tail
+        else:
+            position = head + int(np.searchsorted(self.__timestamps[head:tail], timestamp_, 'right'))
+            for column in self.__columns():
+                column[position + 1:tail + 1] = column[position:tail]
+        self.__timestamps[position] = timestamp_
+        self.__turnovers[position] = turnover
+        self.__quantities[position] = quantity_
+        self.__log_turnovers[position] = log_turnover
+        self.__tail += 1
+
+        self.turnover += turnover
+        self.volume += quantity_
+        self.log_turnover += log_turnover
+        self.evict(int(self.__timestamps[self.__tail - 1]))
+
+    def add_many(self, timestamps_, quantities_, trade_prices_):
+        '''
+        Adding a batch of trades to the window.
+        A time ordered batch which is not older than the latest trade of the window 
+        is appended at once, otherwise the window is merged with the batch.
+
+        @timestamps_ - int64 array, nanoseconds since epoch
+        @quantities_ - int64 array
+        @trade_prices_ - int64 array
+        '''
+        if len(timestamps_) == 0:
+            return
+        empty = self.__tail == self.__head
+        last = None if empty else int(self.__timestamps[self.__tail - 1])
+        latest = int(timestamps_.max()) if empty else max(int(timestamps_.max()), last)
+        live = timestamps_ >= latest - self.__length_ns
+        timestamps = timestamps_[live]
+        quantities = quantities_[live]
+        turnovers = quantities * trade_prices_[live]
+        log_turnovers = quantities * np.log(trade_prices_[live])
+        count = len(timestamps)
+
+        if count and ((not empty and timestamps[0] < last) or np.any(timestamps[1:] < timestamps[:-1])):
+            # out of order batch, the window is merged and its sums are recomputed
+            head, tail = self.__head, self.__tail
+            merged = [np.concatenate((column[head:tail], batch)) 
+                      for column, batch in zip(self.__columns(), (timestamps, turnovers, quantities, log_turnovers))]
+            order = np.argsort(merged[0], kind='stable')
+            self.__head, self.__tail = 0, 0
+            self.__reserve(len(order))
+            for column, values in zip(self.__columns(), merged):
+                column[:len(order)] = values[order]
+            self.__tail = len(order)
+            self.turnover = exact_sum(self.__turnovers[:self.__tail])
+            self.volume = exact_sum(self.__quantities[:self.__tail])
+            self.log_turnover = float(self.__log_turnovers[:self.__tail].sum())
+        elif count:
+            self.__reserve(count)
+            tail = self.__tail
+            for column, values in zip(self.__columns(), (timestamps, turnovers, quantities, log_turnovers)):
+                column[tail:tail + count] = values
+            self.__tail += count
+            self.turnover += exact_sum(turnovers)
+            self.volume += exact_sum(quantities)
+            self.log_turnover += float(log_turnovers.sum())
+        self.evict(latest)
+
+    def remove(self, timestamp_, quantity_, trade_price_):
+        '''
+        Retracting a trade (cancelled or amended) from the window, its contribution
+        is subtracted from the running sums. A trade which is not in the window 
+        (e.g. it is already expired) is ignored.
+
+        @timestamp_ - Nanoseconds since epoch
+        @quantity_ - Quantity of the stock
+        @trade_price_ - The price of the stock
+
+        @return - True if the trade was in the window
+        '''
+        head, tail = self.__head, self.__tail
+        timestamps = self.__timestamps[head:tail]
+        first, last = np.searchsorted(timestamps, timestamp_, 'left'), np.searchsorted(timestamps, timestamp_, 'right')
+        same = np.flatnonzero((self.__quantities[head + first:head + last] == quantity_) &
+                              (self.__turnovers[head + first:head + last] == quantity_ * trade_price_))
+        if len(same) == 0:
+            return False
+        position = head + first + int(same[0])
+        self.turnover -= int(self.__turnovers[position])
+        self.volume -= int(self.__quantities[position])
+        self.log_turnover -= float(self.__log_turnovers[position])
+        for column in self.__columns():
+            column[position:tail - 1] = column[position + 1:tail]
+        self.__tail -= 1
+        if self.__tail == head:
+            self.turnover = 0
+            self.volume = 0
+            self.log_turnover = 0.0
+        return True
+
+    def evict(self, now_):
+        '''
+        Dropping the trades from the head of the window which are older than
+        now_ - length
+
+        @now_ - Nanoseconds since epoch
+        '''
+        if self.latest is None or now_ > self.latest:
+            self.latest = int(now_)
+        since = now_ - self.__length_ns
+        head, tail = self.__head, self.__tail
+        if head == tail or self.__timestamps[head] >= since:
+            return
+        end = head + int(np.searchsorted(self.__timestamps[head:tail], since, 'left'))
+        self.turnover -= exact_sum(self.__turnovers[head:end])
+        self.volume -= exact_sum(self.__quantities[head:end])
+        self.log_turnover -= float(self.__log_turnovers[head:end].sum())
+        self.__head = end
+        if end == tail:
+            self.turnover = 0
+            self.volume = 0
+            self.log_turnover = 0.0
+
+    def volume_weighted_stock_price(self):
+        '''
+        @return - VWSP of the trades in the window, 0.0 for an empty window
+        '''
+        return self.turnover / self.volume if self.volume else 0.0
+
+
+class RollingWindows(object):
+    '''
+    Rolling windows of every stock for a set of window lengths registered up front.
+    '''
+
+    def __init__(self, lengths_=()):
+        '''
+        Constructor
+
+        @lengths_ - Window lengths in seconds
+        '''
+        self.__lengths = []
+        self.__windows = {}
+        for length in lengths_:
+            self.register(length)
+
+    @property
+    def lengths(self):
+        return tuple(self.__lengths)
+
+    def __contains__(self, length_):
+        return length_ in self.__lengths
+
+    def symbols(self):
+        '''
+        @return - List of the stocks having windows
+        '''
+        return list(self.__windows)
+
+    def register(self, length_):
+        '''
+        Registering a new window length for every stock
+
+        @length_ - Length of the window in seconds
+
+        @return - True if the length was not registered before
+        '''
+        length = RollingWindow(length_).length
+        if length in self.__lengths:
+            return False
+        self.__lengths.append(length)
+        for windows in self.__windows.values():
+            windows[length] = RollingWindow(length)
+        return True
+
+    def __windows_of(self, symbol_):
+        '''
+        @return - The windows of the stock, they are created at the first trade of the stock
+        '''
+        try:
+            return self.__windows[symbol_].values()
+        except KeyError:
+            self.__windows[symbol_] = {length: RollingWindow(length) for length in self.__lengths}
+            return self.__windows[symbol_].values()
+
+    def add(self, symbol_, timestamp_, quantity_, trade_price_):
+        '''
+        Adding a trade to every window of the stock
+        '''
+        for window in self.__windows_of(symbol_):
+            window.add(timestamp_, quantity_, trade_price_)
+
+    def add_many(self, symbol_, timestamps_, quantities_, trade_prices_):
+        '''
+        Adding a batch of trades of a stock to its windows
+
+        @symbol_ - Symbol of the stock
+        @timestamps_ - int64 array, nanoseconds since epoch
+        @quantities_ - int64 array
+        @trade_prices_ - int64 array
+        '''
+        for window in self.__windows_of(symbol_):
+            window.add_many(timestamps_, quantities_, trade_prices_)
+
+    def remove(self, symbol_, timestamp_, quantity_, trade_price_):
+        '''
+        Retracting a trade from every window of the stock (see RollingWindow.remove)
+        '''
+        for window in self.__windows.get(symbol_, {}).values():
+            window.remove(timestamp_, quantity_, trade_price_)
+
+    def sums(self, length_, now_, symbol_=None):
+        '''
+        Running sums of the windows after evicting the expired trades
+
+        @length_ - A registered window length in seconds
+        @now_ - Nanoseconds since epoch
+        @symbol_ - Symbol of the stock, all stocks are summed up if it is None
+
+        @return - (sum of trade_price * quantity, sum of quantity, 
+                   list of the sums of quantity * log(trade_price) per stock),
+                  None if a window was evicted after now_ already (its trades 
+                  before now_ are partly dropped)
+        '''
+        if symbol_ is None:
+            windows = [windows[length_] for windows in list(self.__windows.values())]
+        elif symbol_ in self.__windows:
+            windows = [self.__windows[symbol_][length_]]
+        else:
+            windows = []
+        if any(window.latest is not None and window.latest > now_ for window in windows):
+            return None
+        turnover, volume, log_turnovers = 0, 0, []
+        for window in windows:
+            window.evict(now_)
+            turnover += window.turnover
+            volume += window.volume
+            log_turnovers.append(window.log_turnover)
+        return turnover, volume, log_turnovers
+
+    def clear(self):
+        self.__windows = {}